@@ -0,0 +1,86 @@
+"""
+Gunicorn configuration.
+
+``GUNICORN_PROFILE`` selects the worker model:
+
+- ``sync``: one request per process. Most isolated, most memory per request.
+- ``gthread`` (default): threads per process. Views mostly wait on the
+  database and cache, so threads overlap that I/O at little memory cost,
+  which suits a 512 MB machine.
+- ``uvicorn``: ``UvicornWorker`` serving the ASGI application; long articles
+  stream through async iterators there (``news.streaming``).
+
+The app is preloaded in the master so workers share its memory
+copy-on-write; see ``news.workers`` for the warm-up and RSS recycling hooks.
+Compare the profiles with ``manage.py benchmark_profiles``.
+"""
+
+import os
+
+PROFILES = {
+    "sync": {
+        "worker_class": "sync",
+        "workers": 2,
+        "threads": 1,
+    },
+    "gthread": {
+        "worker_class": "gthread",
+        "workers": 2,
+        "threads": 4,
+    },
+    "uvicorn": {
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "workers": 2,
+        "threads": 1,
+        "wsgi_app": "marketingnyt.asgi:application",
+    },
+}
+
+profile_name = os.environ.get("GUNICORN_PROFILE", "gthread")
+if profile_name not in PROFILES:
+    raise RuntimeError(f"Unknown GUNICORN_PROFILE {profile_name!r}, expected one of {', '.join(PROFILES)}")
+profile = PROFILES[profile_name]
+os.environ["GUNICORN_PROFILE"] = profile_name
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+wsgi_app = profile.get("wsgi_app", "marketingnyt.wsgi:application")
+worker_class = profile["worker_class"]
+workers = int(os.environ.get("WEB_CONCURRENCY", profile["workers"]))
+threads = int(os.environ.get("GUNICORN_THREADS", profile["threads"]))
+
+# Import Django and the project once; workers share those pages
+preload_app = True
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = 20
+keepalive = 5
+
+# Backstop against slow leaks; jitter keeps workers from restarting together
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = 100
+
+# Heartbeat files on tmpfs, so a slow disk cannot make workers look hung
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# Recycle a worker once its RSS passes this many MB (0 disables)
+os.environ.setdefault("GUNICORN_MAX_RSS_MB", "200")
+
+accesslog = None
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+
+def when_ready(server):
+    from news.workers import warm_shared
+
+    warm_shared()
+    server.log.info("Profile %s: %s workers x %s threads", profile_name, workers, threads)
+
+
+def post_fork(server, worker):
+    from news.popularity import start_view_count_flusher
+    from news.workers import start_memory_watchdog, warm_worker
+
+    warm_worker()
+    start_memory_watchdog()
+    start_view_count_flusher()
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "marketingnyt.settings.prod")
 
 application = get_asgi_application()
+
+# 103 Early Hints on servers with the http.response.early_hint extension
+from news.preload import EarlyHintsMiddleware  # noqa: E402
+
+application = EarlyHintsMiddleware(application)
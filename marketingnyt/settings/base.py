@@ -38,7 +38,6 @@ DJANGO_APPS = [
 # Cloudinary - MUST be before wagtail apps
 CLOUDINARY_APPS = [
     "cloudinary_storage",
-    "cloudinary",
 ]
 
 WAGTAIL_APPS = [
@@ -65,9 +64,16 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + CLOUDINARY_APPS + WAGTAIL_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
-    "django.middleware.cache.UpdateCacheMiddleware",
+    "news.workers.WorkerMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "django.middleware.http.ConditionalGetMiddleware",
+    "news.compression.CompressionMiddleware",
+    "news.baking.BakedPageMiddleware",
+    "news.page_cache.AnonymousPageCacheMiddleware",
+    "news.cache_policy.CachePolicyMiddleware",
+    "news.preload.PreloadLinkMiddleware",
+    "news.database.ReplicaReadsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -75,7 +81,6 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "wagtail.contrib.redirects.middleware.RedirectMiddleware",
-    "django.middleware.cache.FetchFromCacheMiddleware",
 ]
 
 ROOT_URLCONF = "marketingnyt.urls"
@@ -107,12 +112,63 @@ DATABASES = {
     }
 }
 
+# Connections are kept open between requests instead of paying a TCP and
+# TLS handshake per request; health checks replace connections the server
+# or a proxy closed while idle
+DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", 600))
+
+# Under the uvicorn profile (gunicorn.conf.py) sync views run in a thread
+# pool whose threads come and go, and Django only closes a thread's
+# connection at the end of a request on that thread, so persistent
+# connections leak until the database runs out of slots. Connections are
+# closed after every request there, unless DB_POOL provides a pool.
+ASGI_WORKERS = os.environ.get("GUNICORN_PROFILE") == "uvicorn"
+
+# Use a psycopg 3 connection pool per process instead (Django 5.1+ with
+# psycopg[pool] installed); shared by a gthread worker's threads
+DB_POOL = os.environ.get("DB_POOL", "False").lower() == "true"
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", 1))
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", 4))
+
+
+def _pool_supported():
+    import importlib.util
+
+    import django
+
+    return django.VERSION >= (5, 1) and importlib.util.find_spec("psycopg_pool") is not None
+
+
+def _database(url):
+    import dj_database_url
+
+    conn_max_age = 0 if ASGI_WORKERS else DB_CONN_MAX_AGE
+    config = dj_database_url.parse(url, conn_max_age=conn_max_age, conn_health_checks=True)
+    if DB_POOL and config["ENGINE"] == "django.db.backends.postgresql" and _pool_supported():
+        # Django refuses persistent connections together with a pool
+        config["CONN_MAX_AGE"] = 0
+        config.setdefault("OPTIONS", {})["pool"] = {
+            "min_size": DB_POOL_MIN_SIZE,
+            "max_size": DB_POOL_MAX_SIZE,
+            "timeout": 5,
+        }
+    return config
+
+
 # Override with PostgreSQL if DATABASE_URL is provided
 DATABASE_URL = os.getenv("DATABASE_URL")
 if DATABASE_URL:
     try:
-        import dj_database_url
-        DATABASES["default"] = dj_database_url.parse(DATABASE_URL)
+        DATABASES["default"] = _database(DATABASE_URL)
+    except ImportError:
+        pass
+
+# Read replica for anonymous GET requests, see news/database.py
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+if DATABASE_URL and DATABASE_REPLICA_URL:
+    try:
+        DATABASES["replica"] = {**_database(DATABASE_REPLICA_URL), "TEST": {"MIRROR": "default"}}
+        DATABASE_ROUTERS = ["news.database.ReplicaRouter"]
     except ImportError:
         pass
 
@@ -150,88 +206,57 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 WAGTAIL_SITE_NAME = "MarketingNyt.dk"
 WAGTAIL_ENABLE_UPDATE_CHECK = False
 
-# Cache configuration with fallback
+# Cache configuration. Redis is connected on first use and replaced by a
+# per-process cache while unreachable (news/cache_backends.py), so settings
+# never touch the network and cold starts do not wait on Redis
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
-try:
-    import redis
-    redis_client = redis.from_url(REDIS_URL)
-    redis_client.ping()
-
-    CACHES = {
-        "default": {
-            "BACKEND": "django_redis.cache.RedisCache",
-            "LOCATION": REDIS_URL,
-            "OPTIONS": {
-                "CLIENT_CLASS": "django_redis.client.DefaultClient",
-                "CONNECTION_POOL_KWARGS": {
-                    "max_connections": 50,
-                    "retry_on_timeout": True,
-                },
-                "IGNORE_EXCEPTIONS": True,
-            },
-            "KEY_PREFIX": "marketingnyt",
-            "TIMEOUT": 300,
-        },
-        "sessions": {
-            "BACKEND": "django_redis.cache.RedisCache",
-            "LOCATION": REDIS_URL,
-            "OPTIONS": {
-                "CLIENT_CLASS": "django_redis.client.DefaultClient",
-                "IGNORE_EXCEPTIONS": True,
-            },
-            "KEY_PREFIX": "marketingnyt_sessions",
-            "TIMEOUT": 86400,
-        },
-        "pages": {
-            "BACKEND": "django_redis.cache.RedisCache",
-            "LOCATION": REDIS_URL,
-            "OPTIONS": {
-                "CLIENT_CLASS": "django_redis.client.DefaultClient",
-                "IGNORE_EXCEPTIONS": True,
-            },
-            "KEY_PREFIX": "marketingnyt_pages",
-            "TIMEOUT": 1800,
-        },
-        "images": {
-            "BACKEND": "django_redis.cache.RedisCache",
-            "LOCATION": REDIS_URL,
-            "OPTIONS": {
-                "CLIENT_CLASS": "django_redis.client.DefaultClient",
-                "IGNORE_EXCEPTIONS": True,
-            },
-            "KEY_PREFIX": "marketingnyt_images",
-            "TIMEOUT": 3600,
-        }
-    }
-except (ImportError, redis.ConnectionError, redis.TimeoutError):
-    CACHES = {
-        "default": {
-            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-            "LOCATION": "marketingnyt-default",
-            "TIMEOUT": 300,
-        },
-        "sessions": {
-            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-            "LOCATION": "marketingnyt-sessions",
-            "TIMEOUT": 86400,
-        },
-        "pages": {
-            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-            "LOCATION": "marketingnyt-pages",
-            "TIMEOUT": 1800,
-        },
-        "images": {
+
+def _cache(name, timeout, **options):
+    if not REDIS_URL:
+        return {
             "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-            "LOCATION": "marketingnyt-images",
-            "TIMEOUT": 3600,
+            "LOCATION": f"marketingnyt-{name}",
+            "TIMEOUT": timeout,
         }
+    return {
+        "BACKEND": "news.cache_backends.FallbackRedisCache",
+        "LOCATION": REDIS_URL,
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "SOCKET_CONNECT_TIMEOUT": 0.5,
+            "SOCKET_TIMEOUT": 0.5,
+            **options,
+        },
+        "KEY_PREFIX": "marketingnyt" if name == "default" else f"marketingnyt_{name}",
+        "TIMEOUT": timeout,
     }
 
-CACHE_MIDDLEWARE_ALIAS = "default"
-CACHE_MIDDLEWARE_SECONDS = 300
-CACHE_MIDDLEWARE_KEY_PREFIX = "marketingnyt"
-CACHE_MIDDLEWARE_ANONYMOUS_ONLY = True
+
+CACHES = {
+    "default": _cache("default", 300, CONNECTION_POOL_KWARGS={
+        "max_connections": 50,
+        "retry_on_timeout": True,
+    }),
+    "sessions": _cache("sessions", 86400),
+    "pages": _cache("pages", 1800),
+    "images": _cache("images", 3600),
+}
+
+# Full pages for anonymous visitors, see news/page_cache.py. Entries are
+# invalidated by cache tags on publish, so the timeout can be long
+PAGE_CACHE_TIMEOUT = int(os.environ.get("PAGE_CACHE_TIMEOUT", 6 * 60 * 60))
+
+# Serve baked copies of public pages from BAKE_ROOT and rebake them on
+# publish, see news/baking.py. BAKE_HOST defaults to the default Site
+STATIC_BAKING = os.environ.get("STATIC_BAKING", "False").lower() == "true"
+BAKE_ROOT = Path(os.environ.get("BAKE_ROOT") or BASE_DIR / "baked")
+BAKE_HOST = os.environ.get("BAKE_HOST", "")
+
+# Shared-cache headers per view, see news/cache_policy.py. Purged cache tags
+# are forwarded to the CDN by CDN_PURGE_BACKEND (news.cdn.LogPurger logs only)
+SURROGATE_KEY_HEADER = os.environ.get("SURROGATE_KEY_HEADER", "Surrogate-Key")
+CDN_PURGE_BACKEND = os.environ.get("CDN_PURGE_BACKEND", "news.cdn.LogPurger")
 
 # Session configuration
 SESSION_ENGINE = "django.contrib.sessions.backends.db"
@@ -260,7 +285,6 @@ CSP_FONT_SRC = ("'self'", "fonts.gstatic.com")
 CSP_CONNECT_SRC = ("'self'", "*.google-analytics.com")
 
 # Performance optimizations
-USE_ETAGS = True
 USE_L10N = True
 
 # Logging
@@ -311,17 +335,8 @@ LOGGING = {
     },
 }
 
-# Cloudinary Configuration
-import cloudinary
-import cloudinary.uploader
-import cloudinary.api
-
-cloudinary.config(
-    cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME', ''),
-    api_key=os.getenv('CLOUDINARY_API_KEY', ''),
-    api_secret=os.getenv('CLOUDINARY_API_SECRET', ''),
-)
-
+# Cloudinary is configured from CLOUDINARY_STORAGE by cloudinary_storage
+# when the media storage is first used, not while settings load
 CLOUDINARY_STORAGE = {
     'CLOUD_NAME': os.getenv('CLOUDINARY_CLOUD_NAME', ''),
     'API_KEY': os.getenv('CLOUDINARY_API_KEY', ''),
@@ -332,16 +347,84 @@ CLOUDINARY_STORAGE = {
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Media storage backends, picked with MEDIA_STORAGE:
+# - "cloudinary": upload and serve straight from Cloudinary
+# - "cached": local content-addressed cache in front of Cloudinary, URLs are
+#   built locally (optionally on MEDIA_CDN_URL) and uploads run in the background
+# - "local": the same cache without an upstream, needs no credentials
+MEDIA_STORAGE = os.getenv("MEDIA_STORAGE", "cloudinary")
+MEDIA_CDN_URL = os.getenv("MEDIA_CDN_URL", MEDIA_URL)
+MEDIA_CACHE_MAX_SIZE = int(os.getenv("MEDIA_CACHE_MAX_SIZE", str(2 * 1024 ** 3)))
+
+MEDIA_STORAGE_BACKENDS = {
+    "cloudinary": {
+        "BACKEND": "cloudinary_storage.storage.MediaCloudinaryStorage",
+    },
+    "cached": {
+        "BACKEND": "news.storage.CachedMediaStorage",
+        "OPTIONS": {
+            "base_url": MEDIA_CDN_URL,
+            "max_size": MEDIA_CACHE_MAX_SIZE,
+            "upstream": "cloudinary_storage.storage.MediaCloudinaryStorage",
+        },
+    },
+    "local": {
+        "BACKEND": "news.storage.CachedMediaStorage",
+    },
+}
+
+# Serve /media/ from the local cache when it is in front of the remote store
+SERVE_MEDIA = MEDIA_STORAGE in ("cached", "local")
+
 # Modern Django storage configuration (Django 4.2+)
 STORAGES = {
-    'default': {
-        'BACKEND': 'cloudinary_storage.storage.MediaCloudinaryStorage',
-    },
+    'default': MEDIA_STORAGE_BACKENDS[MEDIA_STORAGE],
     'staticfiles': {
         'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
     },
 }
 
 # Wagtail-specific storage settings
-WAGTAILIMAGES_IMAGE_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
-WAGTAILDOCS_DOCUMENT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
\ No newline at end of file
+WAGTAILIMAGES_IMAGE_FILE_STORAGE = STORAGES['default']['BACKEND']
+WAGTAILDOCS_DOCUMENT_FILE_STORAGE = STORAGES['default']['BACKEND']
+
+# Responsive images: <picture> sources in order of preference, JPEG last as
+# the <img> fallback. Breakpoints live in news/responsive_images.py
+RESPONSIVE_IMAGE_FORMATS = os.environ.get("RESPONSIVE_IMAGE_FORMATS", "avif,webp,jpeg").split(",")
+
+# Build inline image placeholders on a background thread after upload
+IMAGE_PLACEHOLDERS_ASYNC = True
+
+# /metrics/ is open to staff and to requests with this bearer token
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Article views are counted in the cache and flushed to ArticleStats by one
+# worker every VIEW_COUNT_FLUSH_INTERVAL seconds (0 leaves it to the
+# flush_view_counts command); popularity halves every POPULARITY_HALF_LIFE_HOURS
+VIEW_COUNT_FLUSH_INTERVAL = int(os.environ.get("VIEW_COUNT_FLUSH_INTERVAL", 60))
+POPULARITY_HALF_LIFE_HOURS = float(os.environ.get("POPULARITY_HALF_LIFE_HOURS", 48))
+
+# "Trender nu" on the home page: views per minute over the last
+# TRENDING_WINDOW_MINUTES, halving in weight every TRENDING_HALF_LIFE_MINUTES
+TRENDING_WINDOW_MINUTES = int(os.environ.get("TRENDING_WINDOW_MINUTES", 120))
+TRENDING_HALF_LIFE_MINUTES = float(os.environ.get("TRENDING_HALF_LIFE_MINUTES", 30))
+
+# Article pages with at least this many body blocks are streamed block by
+# block unless the page cache is filling (see news/streaming.py); 0 turns it off
+ARTICLE_STREAMING_MIN_BLOCKS = int(os.environ.get("ARTICLE_STREAMING_MIN_BLOCKS", 12))
+
+# Read-only JSON API at /api/v1/ (see news/api.py): public, no sessions
+REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": ["news.renderers.ORJSONRenderer"],
+    "DEFAULT_PARSER_CLASSES": [],
+    "DEFAULT_AUTHENTICATION_CLASSES": [],
+    "DEFAULT_PERMISSION_CLASSES": ["rest_framework.permissions.AllowAny"],
+    "UNAUTHENTICATED_USER": None,
+}
+
+# Refresh stale TieredCache entries on a background thread
+CACHE_REFRESH_ASYNC = True
+
+# Cold start budgets enforced by `manage.py startup_profile`
+STARTUP_IMPORT_BUDGET_MS = float(os.environ.get("STARTUP_IMPORT_BUDGET_MS", 1500))
+STARTUP_REQUEST_BUDGET_MS = float(os.environ.get("STARTUP_REQUEST_BUDGET_MS", 1000))
@@ -18,6 +18,11 @@ DATABASES = {
     }
 }
 
+# Media runs offline by default; set MEDIA_STORAGE=cached to test against Cloudinary
+MEDIA_STORAGE = os.getenv("MEDIA_STORAGE", "local")
+SERVE_MEDIA = MEDIA_STORAGE in ("cached", "local")
+STORAGES = {**STORAGES, "default": MEDIA_STORAGE_BACKENDS[MEDIA_STORAGE]}
+
 # Email backend for development
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
@@ -37,5 +37,14 @@ PASSWORD_HASHERS = [
 # Email backend for tests
 EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
 
-# Media files for tests
+# Media files for tests, stored locally without Cloudinary
 MEDIA_ROOT = "/tmp/marketingnyt_test_media"
+MEDIA_STORAGE = "local"
+SERVE_MEDIA = True
+STORAGES = {**STORAGES, "default": MEDIA_STORAGE_BACKENDS["local"]}
+
+# Build image placeholders inline so tests see them immediately
+IMAGE_PLACEHOLDERS_ASYNC = False
+
+# Refresh stale cache entries inline so tests are deterministic
+CACHE_REFRESH_ASYNC = False
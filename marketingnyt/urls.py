@@ -2,15 +2,18 @@
 URL configuration for marketingnyt project.
 """
 
+import re
+
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.contrib.sitemaps import views as sitemap_views
-from django.urls import include, path
+from django.urls import include, path, re_path
 from wagtail import urls as wagtail_urls
 from wagtail.admin import urls as wagtailadmin_urls
 from wagtail.documents import urls as wagtaildocs_urls
 
+from news import api as news_api
 from news import views as news_views
 
 urlpatterns = [
@@ -23,14 +26,36 @@ urlpatterns = [
     path("sitemap-<section>.xml", news_views.sitemap_section, name="django.contrib.sitemaps.views.sitemap"),
     path("feed.xml", news_views.rss_feed, name="rss_feed"),
     path("healthz", news_views.health_check, name="health_check"),
+    path("metrics/", news_views.metrics, name="metrics"),
+    path("v/<int:article_id>/", news_views.article_view, name="article_view"),
     # Category URLs
     path("category/<slug:category_slug>/", news_views.category_detail, name="category_detail"),
     # Tag URLs
+    path("tag/", news_views.tag_index, name="tag_index"),
     path("tag/<slug:tag_slug>/", news_views.tag_detail, name="tag_detail"),
+    # Archive URLs
+    path("arkiv/", news_views.archive_index, name="archive_index"),
+    re_path(r"^arkiv/(?P<year>\d{4})/(?P<month>\d{2})/$", news_views.archive_month, name="archive_month"),
+    # API URLs
+    path("api/v1/articles/", news_api.ArticleList.as_view(), name="api_article_list"),
+    path("api/v1/articles/<int:article_id>/", news_api.ArticleDetail.as_view(), name="api_article_detail"),
+    path("api/v1/categories/", news_api.CategoryList.as_view(), name="api_category_list"),
+    path("api/v1/tags/", news_api.TagList.as_view(), name="api_tag_list"),
     # Wagtail URLs (catch-all) - handles all pages including ArticlePage and BasicPage
     path("", include(wagtail_urls)),
 ]
 
+# Serve media from the local media cache (see news.storage)
+if getattr(settings, "SERVE_MEDIA", False):
+    urlpatterns.insert(
+        0,
+        re_path(
+            r"^%s(?P<path>.+)$" % re.escape(settings.MEDIA_URL.lstrip("/")),
+            news_views.media_file,
+            name="media_file",
+        ),
+    )
+
 # Serve media files in development
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
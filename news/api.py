@@ -0,0 +1,296 @@
+"""
+Read-only JSON API under ``/api/v1/`` for articles, categories and tags.
+
+Listings read the same summary tables as the HTML pages: articles come
+from ``ArticleCard``, tags from ``TagStats``. Each endpoint runs one query
+per resource type it returns, whatever the page size:
+
+* ``?fields=id,title`` returns only those fields, and the query loads only
+  the columns behind them (no category join without ``category``)
+* ``?include=body`` adds the article body blocks, read with one more query
+  for the whole page
+* pages are cursors over an indexed ordering (``?cursor=``, ``?limit=``),
+  so no ``COUNT`` query and no deep ``OFFSET``
+
+Responses go through the page cache like any page: views record their
+cache tags and policy, so publishing an article purges exactly the API
+responses that showed it. Each response has a weak ``ETag`` over its JSON,
+which ``ConditionalGetMiddleware`` answers with 304s, and is rendered with
+orjson (``news.renderers``).
+"""
+
+import hashlib
+
+from django.urls import reverse
+from rest_framework import generics, serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+
+from .cache_policy import set_cache_policy
+from .cache_tags import add_cache_tags, article_tags
+from .models import ArticleCard, ArticlePage, ArticlePageTag, Category, TagStats
+from .tag_stats import TAG_INDEX_TAG
+
+MAX_PAGE_SIZE = 100
+
+
+class Cursor(CursorPagination):
+    page_size = 20
+    page_size_query_param = "limit"
+    max_page_size = MAX_PAGE_SIZE
+
+
+class ArticleCursor(Cursor):
+    # Matches the card_published index
+    ordering = ("-published_at", "-article_id")
+
+
+class CategoryCursor(Cursor):
+    ordering = "name"
+
+
+class TagCursor(Cursor):
+    # Unique and unchanging, as cursors need
+    ordering = "tag_id"
+
+
+class SparseFieldsMixin:
+    """Serializer taking ``fields``, the names to keep of those it declares."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class CategorySummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = ["id", "name", "slug"]
+
+
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Category
+        fields = ["id", "name", "slug", "description", "url"]
+
+    def get_url(self, category):
+        return self.context["request"].build_absolute_uri(
+            reverse("category_detail", args=[category.slug])
+        )
+
+
+class TagSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    name = serializers.CharField(source="tag.name")
+    slug = serializers.CharField(source="tag.slug")
+    url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TagStats
+        fields = ["name", "slug", "article_count", "latest_published_at", "url"]
+
+    def get_url(self, stats):
+        return self.context["request"].build_absolute_uri(
+            reverse("tag_detail", args=[stats.tag.slug])
+        )
+
+
+class ArticleSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    id = serializers.IntegerField(source="article_id")
+    url = serializers.SerializerMethodField()
+    category = CategorySummarySerializer()
+    body = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ArticleCard
+        fields = [
+            "id", "title", "slug", "url", "summary", "author", "category", "published_at",
+            "tags", "pictures", "video_url", "video_poster_url", "external_url", "body",
+        ]
+
+    def get_url(self, card):
+        return self.context["request"].build_absolute_uri(card.url)
+
+    def get_body(self, card):
+        return self.context["bodies"].get(card.article_id, [])
+
+
+class SparseListMixin:
+    """
+    ``?fields=`` and ``?include=`` handling for a read-only endpoint.
+
+    ``columns`` maps each field to the model fields it reads, which are all
+    that the queryset loads; ``includes`` are the fields left out unless
+    asked for. Subclasses list the cache tags of what they return in
+    ``cache_tags``.
+    """
+
+    columns = {}
+    includes = ()
+    cache_policy = "listing"
+
+    def requested_fields(self):
+        if not hasattr(self, "_fields"):
+            names = list(self.columns)
+            fields = self._param_list("fields", names)
+            includes = self._param_list("include", self.includes)
+            if fields is None:
+                fields = [name for name in names if name not in self.includes]
+            self._fields = [name for name in names if name in fields or name in (includes or ())]
+        return self._fields
+
+    def _param_list(self, param, allowed):
+        value = self.request.query_params.get(param)
+        if value is None:
+            return None
+        names = [name.strip() for name in value.split(",") if name.strip()]
+        unknown = sorted(set(names) - set(allowed))
+        if unknown:
+            raise ValidationError({param: [f"Unknown: {', '.join(unknown)}. Choose from: {', '.join(allowed)}."]})
+        return names
+
+    def only_columns(self, queryset, always=()):
+        columns = set(always)
+        for name in self.requested_fields():
+            columns.update(self.columns[name])
+        return queryset.only(*columns)
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs["fields"] = self.requested_fields()
+        return super().get_serializer(*args, **kwargs)
+
+    def cache_tags(self, objects):
+        return []
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if response.status_code == 200:
+            objects = getattr(self, "_objects", [])
+            add_cache_tags(request._request, *self.cache_tags(objects))
+            set_cache_policy(request._request, self.cache_policy)
+            response.render()
+            # The same JSON whichever encoding carries it, hence weak
+            response["ETag"] = f'W/"{hashlib.md5(response.content, usedforsecurity=False).hexdigest()}"'
+        return response
+
+
+class ArticleMixin(SparseListMixin):
+    serializer_class = ArticleSerializer
+    columns = {
+        "id": ["article_id"],
+        "title": ["title"],
+        "slug": ["slug"],
+        "url": ["url"],
+        "summary": ["summary"],
+        "author": ["author"],
+        "category": ["category__id", "category__name", "category__slug"],
+        "published_at": ["published_at"],
+        "tags": ["tags"],
+        "pictures": ["pictures"],
+        "video_url": ["video_url"],
+        "video_poster_url": ["video_poster_url"],
+        "external_url": ["external_url"],
+        "body": [],
+    }
+    includes = ("body",)
+
+    def get_queryset(self):
+        cards = ArticleCard.objects.all()
+        if "category" not in self.requested_fields():
+            cards = cards.select_related(None)
+        # The cursor reads published_at
+        return self.only_columns(cards, always=["article_id", "published_at"])
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["bodies"] = self._bodies
+        return context
+
+    def load_bodies(self, cards):
+        self._objects = cards
+        self._bodies = {}
+        if "body" in self.requested_fields() and cards:
+            rows = ArticlePage.objects.filter(pk__in=[card.article_id for card in cards])
+            self._bodies = {
+                pk: list(body.raw_data) for pk, body in rows.order_by().values_list("pk", "body")
+            }
+
+    def cache_tags(self, cards):
+        return article_tags(*cards)
+
+
+class ArticleList(ArticleMixin, generics.ListAPIView):
+    """Live articles, newest first; filter with ``?category=`` and ``?tag=`` slugs."""
+
+    pagination_class = ArticleCursor
+
+    def get_queryset(self):
+        cards = super().get_queryset()
+        category = self.request.query_params.get("category")
+        if category:
+            cards = cards.filter(category__slug=category)
+        tag = self.request.query_params.get("tag")
+        if tag:
+            cards = cards.filter(
+                article_id__in=ArticlePageTag.objects.filter(tag__slug=tag).values("content_object_id")
+            )
+        return cards
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        self.load_bodies(page)
+        return page
+
+    def cache_tags(self, cards):
+        # "feed" is purged whenever an article is published, unpublished or deleted
+        return ["feed", *super().cache_tags(cards)]
+
+
+class ArticleDetail(ArticleMixin, generics.RetrieveAPIView):
+    lookup_field = "article_id"
+    cache_policy = "article"
+
+    def get_object(self):
+        card = super().get_object()
+        self.load_bodies([card])
+        return card
+
+
+class CategoryList(SparseListMixin, generics.ListAPIView):
+    serializer_class = CategorySerializer
+    pagination_class = CategoryCursor
+    columns = {
+        "id": ["id"],
+        "name": ["name"],
+        "slug": ["slug"],
+        "description": ["description"],
+        "url": ["slug"],
+    }
+
+    def get_queryset(self):
+        # Saving a category purges "site", which every response carries
+        return self.only_columns(Category.objects.all(), always=["id", "name"])
+
+
+class TagList(SparseListMixin, generics.ListAPIView):
+    """Tags with live articles, with their counts from ``TagStats``."""
+
+    serializer_class = TagSerializer
+    pagination_class = TagCursor
+    columns = {
+        "name": ["tag__name"],
+        "slug": ["tag__slug"],
+        "article_count": ["article_count"],
+        "latest_published_at": ["latest_published_at"],
+        "url": ["tag__slug"],
+    }
+
+    def get_queryset(self):
+        stats = TagStats.objects.filter(article_count__gt=0).select_related("tag")
+        return self.only_columns(stats, always=["tag", "tag__id"])
+
+    def cache_tags(self, stats):
+        return [TAG_INDEX_TAG]
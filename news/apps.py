@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class NewsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "news"
+
+    def ready(self):
+        from django.conf import settings
+
+        from . import signals  # noqa: F401
+        from .cache_tags import register_purge_listener
+        from .cdn import get_purger
+
+        register_purge_listener(get_purger())
+        if settings.STATIC_BAKING:
+            from .baking import schedule_rebake
+
+            register_purge_listener(schedule_rebake)
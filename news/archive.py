@@ -0,0 +1,123 @@
+"""
+Maintenance of the ``ArchiveMonth`` buckets behind ``/arkiv/``.
+
+Months are calendar months in ``TIME_ZONE``. ``refresh_archive_months``
+recounts only the months given from ``ArticleCard``; ``sync_cards`` calls
+it with the months an article was and is listed in, so a publish touches
+at most two buckets. ``rebuild_archive`` recounts everything, for the
+migration and ``build_article_cards``.
+
+Each month page carries the cache tag ``archive:<year>-<month>`` and the
+archive index ``archive``; both are purged when a bucket changes, so past
+months can be cached for long and marked immutable. A month page also
+links to the nearest older and newer months with articles, so when a
+month gains its first article or loses its last, the months on either
+side of it are purged as well.
+"""
+
+import datetime
+
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+
+from .cache_tags import purge_tags
+from .models import ArchiveMonth, ArticleCard
+
+ARCHIVE_TAG = "archive"
+
+
+def month_tag(year, month):
+    return f"{ARCHIVE_TAG}:{year:04d}-{month:02d}"
+
+
+def month_of(value):
+    """``(year, month)`` of the aware datetime ``value`` in ``TIME_ZONE``."""
+    local = timezone.localtime(value, timezone.get_default_timezone())
+    return local.year, local.month
+
+
+def month_bounds(year, month):
+    """Aware datetimes starting ``(year, month)`` and the month after it."""
+    start = datetime.datetime(year, month, 1)
+    end = datetime.datetime(year + month // 12, month % 12 + 1, 1)
+    zone = timezone.get_default_timezone()
+    return timezone.make_aware(start, zone), timezone.make_aware(end, zone)
+
+
+def is_past_month(year, month, now=None):
+    return (year, month) < month_of(now or timezone.now())
+
+
+def month_cards(year, month):
+    """Cards published in ``(year, month)``, newest first."""
+    start, end = month_bounds(year, month)
+    return ArticleCard.objects.filter(
+        published_at__gte=start, published_at__lt=end
+    ).order_by("-published_at", "-article_id")
+
+
+def _bucket(year, month):
+    """``ArchiveMonth`` field values for ``(year, month)`` as the cards stand."""
+    cards = month_cards(year, month)
+    summary = cards.aggregate(
+        count=Count("pk"), first=Min("published_at"), last=Max("published_at")
+    )
+    if not summary["count"]:
+        return {
+            "article_count": 0,
+            "first_article_id": None,
+            "last_article_id": None,
+            "first_published_at": None,
+            "last_published_at": None,
+        }
+    return {
+        "article_count": summary["count"],
+        "first_article_id": cards.reverse().values_list("article_id", flat=True).first(),
+        "last_article_id": cards.values_list("article_id", flat=True).first(),
+        "first_published_at": summary["first"],
+        "last_published_at": summary["last"],
+    }
+
+
+def refresh_archive_months(months):
+    """Recount ``months``, ``(year, month)`` pairs; returns those that changed."""
+    changed = []
+    appeared_or_emptied = []
+    for year, month in sorted(set(months)):
+        values = _bucket(year, month)
+        current = ArchiveMonth.objects.filter(year=year, month=month).values(*values).first()
+        if current == values or (current is None and not values["article_count"]):
+            continue
+        bucket, _ = ArchiveMonth.objects.update_or_create(year=year, month=month, defaults=values)
+        changed.append((year, month))
+        if bool(current and current["article_count"]) != bool(values["article_count"]):
+            appeared_or_emptied.append(bucket)
+    if changed:
+        # Their neighbour links now skip or reach the month
+        linked = {
+            (other.year, other.month)
+            for bucket in appeared_or_emptied
+            for other in neighbours(bucket)
+            if other is not None
+        }
+        purge_tags(ARCHIVE_TAG, *(month_tag(year, month) for year, month in sorted(set(changed) | linked)))
+    return changed
+
+
+def rebuild_archive():
+    """Recount every month with cards or a bucket; returns the number of months in use."""
+    months = {month_of(value) for value in ArticleCard.objects.values_list("published_at", flat=True)}
+    months |= set(ArchiveMonth.objects.filter(article_count__gt=0).values_list("year", "month"))
+    refresh_archive_months(months)
+    return ArchiveMonth.objects.filter(article_count__gt=0).count()
+
+
+def neighbours(bucket):
+    """The nearest older and newer months with articles, found by key."""
+    months = ArchiveMonth.objects.filter(article_count__gt=0)
+    older = months.filter(year=bucket.year, month__lt=bucket.month) | months.filter(year__lt=bucket.year)
+    newer = months.filter(year=bucket.year, month__gt=bucket.month) | months.filter(year__gt=bucket.year)
+    return (
+        older.order_by("-year", "-month").first(),
+        newer.order_by("year", "month").first(),
+    )
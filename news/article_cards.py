@@ -0,0 +1,107 @@
+"""
+Maintenance of the ``ArticleCard`` projection table.
+
+``sync_cards`` writes the card of every live article given and removes the
+cards of the rest; signal handlers call it on publish, unpublish and move,
+and ``build_article_cards`` runs it over all articles. The cover pictures
+for ``CARD_BREAKPOINTS`` are built here, once per publish, instead of per
+listing request, and the ``TagStats`` and ``ArchiveMonth`` buckets of the
+tags and months on the old and new cards are recounted.
+"""
+
+import logging
+
+from .archive import month_of, refresh_archive_months
+from .cache import popular_cache
+from .cache_tags import purge_tags
+from .models import ArticleCard, ArticlePage
+from .responsive_images import get_picture
+from .tag_stats import refresh_tag_stats
+
+logger = logging.getLogger(__name__)
+
+# Every image slot a list template can show a card in
+CARD_BREAKPOINTS = ("hero", "card", "card_small", "teaser")
+
+
+def card_pictures(image):
+    pictures = {}
+    if image is None:
+        return pictures
+    for name in CARD_BREAKPOINTS:
+        try:
+            pictures[name] = get_picture(image, name)
+        except Exception as e:
+            # A missing original should not keep the article off listings
+            logger.warning("Could not build %s picture for image %s: %s", name, image.pk, e)
+    return pictures
+
+
+def card_values(page):
+    """Field values of the card for ``page``, an ``ArticlePage``."""
+    video = page.cover_video
+    return {
+        "title": page.title,
+        "slug": page.slug,
+        # Same as the article_url filter
+        "url": page.external_url or f"/{page.slug}/",
+        "external_url": page.external_url or "",
+        "summary": page.summary,
+        "author": page.author,
+        "category_id": page.category_id,
+        "published_at": page.published_at,
+        "cover_image_id": page.cover_image_id,
+        "pictures": card_pictures(page.cover_image),
+        "video_url": video.file.url if video and video.file else "",
+        "video_poster_url": (
+            video.thumbnail.file.url if video and video.thumbnail_id else ""
+        ),
+        "tags": [{"name": tag.name, "slug": tag.slug} for tag in page.tags.all()],
+        "listed_on_home": page.listed_on_home,
+        "listed_in_related": page.listed_in_related,
+    }
+
+
+def article_queryset():
+    return ArticlePage.objects.for_listing().select_related(
+        "cover_image__placeholder", "cover_video__thumbnail"
+    )
+
+
+def sync_cards(article_ids):
+    """Bring the cards of ``article_ids`` in line with their articles."""
+    article_ids = set(article_ids)
+    # Tags and months the articles were listed under until now
+    tag_slugs = set()
+    months = set()
+    old_cards = ArticleCard.objects.filter(article_id__in=article_ids).values_list("tags", "published_at")
+    for tags, published_at in old_cards:
+        tag_slugs.update(tag["slug"] for tag in tags)
+        months.add(month_of(published_at))
+    live = list(article_queryset().filter(pk__in=article_ids, is_live=True))
+    for page in live:
+        values = card_values(page)
+        tag_slugs.update(tag["slug"] for tag in values["tags"])
+        months.add(month_of(page.published_at))
+        ArticleCard.objects.update_or_create(article_id=page.pk, defaults=values)
+    stale = article_ids - {page.pk for page in live}
+    if stale:
+        ArticleCard.objects.filter(article_id__in=stale).delete()
+    refresh_tag_stats(tag_slugs)
+    refresh_archive_months(months)
+    # Views are counted for live articles only
+    popular_cache.delete("live-ids")
+    # The most read lists hold cards; their pages are purged with the article
+    popular_cache.delete_pattern("most-read:*")
+    return len(live)
+
+
+def refresh_cards_for_images(image_ids):
+    """Rebuild the cards whose cover is one of ``image_ids`` and purge their pages."""
+    article_ids = list(
+        ArticleCard.objects.filter(cover_image_id__in=image_ids).values_list("article_id", flat=True)
+    )
+    if article_ids:
+        sync_cards(article_ids)
+        # Cached pages still carry the old picture URLs
+        purge_tags(*(f"article:{article_id}" for article_id in article_ids))
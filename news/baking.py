@@ -0,0 +1,382 @@
+"""
+Static baking of public pages.
+
+``bake_site`` renders the anonymous routes (home, pages, category and tag
+lists, the tag cloud, archive months, the feed and sitemaps) through the normal request stack and writes
+them under ``BAKE_ROOT``, next to ``.gz``, ``.br`` and ``.zst`` copies
+(see ``news.compression``). ``BakedPageMiddleware`` serves those files to anonymous
+visitors before Django resolves a URL, picking the smallest encoding the
+client accepts.
+
+With ``STATIC_BAKING`` on, purging cache tags (see ``news.cache_tags``)
+rebakes only the routes depending on them on a background thread, so a
+publish refreshes the article, its category and tag lists, home, feed and
+sitemaps. Each machine bakes its own directory; run ``bake_site`` after a
+deploy to fill it.
+
+Purge listeners only run on the machine that purged, so each baked file
+also records the versions of its cache tags, which live in the shared
+``pages`` cache. A file with a purged tag is not served: the request goes
+on to Django and this machine rebakes the routes of that tag.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.core.handlers.wsgi import WSGIHandler
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils.http import http_date
+
+from .cache_tags import get_cache_tags, purged_tags, tag_versions
+from .compression import compress_variants, negotiate
+from .page_cache import BAKE_HEADER, is_cacheable_request, is_cacheable_response
+
+logger = logging.getLogger(__name__)
+
+SITEMAP_SECTIONS = ("articles", "categories", "static", "archive")
+
+CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".xml": "application/xml; charset=utf-8",
+}
+
+SUFFIXES = {"br": ".br", "zstd": ".zst", "gzip": ".gz"}
+
+# Response headers kept next to each baked file and replayed with it
+HEADERS_SUFFIX = ".headers"
+# Versions of the cache tags a baked file was rendered with
+TAGS_SUFFIX = ".tags"
+
+# Baking runs off the request path, so use the strongest levels
+BAKE_LEVELS = {"br": 11, "zstd": 19, "gzip": 9}
+
+_executor = None
+_lock = threading.Lock()
+_pending = set()
+
+
+def get_bake_root():
+    return Path(settings.BAKE_ROOT)
+
+
+def route_path(route, root=None):
+    """File under the bake root for ``route``, or ``None`` if it cannot be baked."""
+    root = Path(root or get_bake_root()).resolve()
+    relative = route.lstrip("/")
+    if not relative or relative.endswith("/"):
+        relative += "index.html"
+    path = (root / relative).resolve()
+    if root not in path.parents or path.suffix not in CONTENT_TYPES:
+        return None
+    return path
+
+
+def _page_route(page):
+    parts = page.get_url_parts()
+    return parts[2] if parts else None
+
+
+def all_routes():
+    """Every route served to anonymous visitors that can be baked."""
+    from wagtail.models import Page
+
+    from .models import ArchiveMonth, Category, TagStats
+
+    routes = ["/", reverse("rss_feed"), *sitemap_routes()]
+    for page in Page.objects.live().public().filter(depth__gt=1).specific():
+        routes.append(_page_route(page))
+    for slug in Category.objects.values_list("slug", flat=True):
+        routes.append(reverse("category_detail", args=[slug]))
+    routes.append(reverse("tag_index"))
+    tag_slugs = TagStats.objects.filter(article_count__gt=0).values_list("tag__slug", flat=True)
+    for slug in tag_slugs:
+        routes.append(reverse("tag_detail", args=[slug]))
+    routes.append(reverse("archive_index"))
+    for bucket in ArchiveMonth.objects.filter(article_count__gt=0):
+        routes.append(bucket.get_absolute_url())
+    return _unique(routes)
+
+
+def sitemap_routes():
+    return [reverse("sitemap_index")] + [
+        reverse("django.contrib.sitemaps.views.sitemap", args=[section])
+        for section in SITEMAP_SECTIONS
+    ]
+
+
+def routes_for_tags(tags):
+    """Routes whose content depends on any of the cache ``tags``."""
+    from wagtail.models import Page
+
+    from .cache_tags import SITE_TAG
+    from .models import ArticlePage, Category, CategoryPage
+
+    if SITE_TAG in tags:
+        return all_routes()
+
+    routes = []
+    page_ids = []
+    for tag in tags:
+        kind, _, value = tag.partition(":")
+        if tag in ("home", "trending"):
+            routes.append("/")
+        elif tag == "feed":
+            routes.append(reverse("rss_feed"))
+        elif tag == "sitemap":
+            routes.extend(sitemap_routes())
+        elif kind in ("page", "article") and value.isdigit():
+            page_ids.append(int(value))
+        elif kind == "category" and value.isdigit():
+            page_ids.extend(
+                CategoryPage.objects.filter(category_id=value).values_list("id", flat=True)
+            )
+            slug = Category.objects.filter(id=value).values_list("slug", flat=True).first()
+            if slug:
+                routes.append(reverse("category_detail", args=[slug]))
+        elif kind == "tag" and value:
+            routes.append(reverse("tag_detail", args=[value]))
+        elif tag == "tags":
+            routes.append(reverse("tag_index"))
+        elif tag == "archive":
+            routes.append(reverse("archive_index"))
+        elif kind == "archive" and value:
+            year, _, month = value.partition("-")
+            routes.append(reverse("archive_month", args=[year, month]))
+        elif kind == "most-read" and (value.isdigit() or value == "all"):
+            # The sidebar of the category's articles and listings
+            category_id = int(value) if value.isdigit() else None
+            page_ids.extend(
+                ArticlePage.objects.live().filter(category_id=category_id).values_list("id", flat=True)
+            )
+            page_ids.extend(
+                CategoryPage.objects.filter(category_id=category_id).values_list("id", flat=True)
+            )
+            slug = Category.objects.filter(id=category_id).values_list("slug", flat=True).first()
+            if slug:
+                routes.append(reverse("category_detail", args=[slug]))
+    # Unpublished pages keep their route so their files get removed
+    for page in Page.objects.filter(id__in=page_ids).specific():
+        routes.append(_page_route(page))
+    return _unique(routes)
+
+
+def _unique(routes):
+    return list(dict.fromkeys(route for route in routes if route))
+
+
+def _write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".bake-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _variants(path):
+    suffixes = list(SUFFIXES.values()) + [HEADERS_SUFFIX, TAGS_SUFFIX]
+    return [path] + [path.with_name(path.name + suffix) for suffix in suffixes]
+
+
+def baked_header_names():
+    return ("Cache-Control", settings.SURROGATE_KEY_HEADER, "Link")
+
+
+def _read_json(path, suffix):
+    try:
+        return json.loads(path.with_name(path.name + suffix).read_bytes())
+    except (OSError, ValueError):
+        return {}
+
+
+def read_baked_headers(path):
+    return _read_json(path, HEADERS_SUFFIX)
+
+
+def read_baked_tags(path):
+    return _read_json(path, TAGS_SUFFIX)
+
+
+def write_baked(path, content, headers=None, tags=None):
+    """
+    Write ``content``, its compressed copies, ``headers`` and the cache tag
+    versions ``tags`` to ``path``.
+
+    Returns False when the content and headers did not change; then only
+    the tag versions are updated.
+    """
+    headers = headers or {}
+    tags = tags or {}
+    try:
+        changed = path.read_bytes() != content or read_baked_headers(path) != headers
+    except OSError:
+        changed = True
+    if changed:
+        compressed = compress_variants(content, BAKE_LEVELS, min_size=0)
+        # Compressed copies first, so the plain file never announces stale ones
+        _write(path.with_name(path.name + HEADERS_SUFFIX), json.dumps(headers).encode())
+        for encoding, suffix in SUFFIXES.items():
+            variant = path.with_name(path.name + suffix)
+            if encoding in compressed:
+                _write(variant, compressed[encoding])
+            else:
+                variant.unlink(missing_ok=True)
+        _write(path, content)
+    # Last, so new versions never vouch for the old content
+    if read_baked_tags(path) != tags:
+        _write(path.with_name(path.name + TAGS_SUFFIX), json.dumps(tags).encode())
+    return changed
+
+
+def remove_baked(path):
+    removed = False
+    for variant in _variants(path):
+        try:
+            variant.unlink()
+            removed = True
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def _bake_host():
+    if settings.BAKE_HOST:
+        return settings.BAKE_HOST
+    from wagtail.models import Site
+
+    site = Site.objects.filter(is_default_site=True).first()
+    return site.hostname if site else "localhost"
+
+
+def bake_routes(routes, root=None):
+    """
+    Render ``routes`` and write the bakeable ones below ``root``.
+
+    Routes that no longer render a public page have their files removed.
+    Returns a dict with the number of ``written``, ``unchanged`` and
+    ``removed`` routes.
+    """
+    root = Path(root or get_bake_root())
+    # The project's middleware stack, as a live request goes through it
+    handler = WSGIHandler()
+    factory = RequestFactory(HTTP_HOST=_bake_host(), HTTP_X_BAKE_REQUEST="1")
+    counts = {"written": 0, "unchanged": 0, "removed": 0}
+    for route in routes:
+        path = route_path(route, root)
+        if path is None:
+            continue
+        request = factory.get(route)
+        # Not closed: request_finished would drop the database connection
+        # between routes
+        response = handler.get_response(request)
+        if is_cacheable_response(response, allow_streaming=True):
+            content = b"".join(response.streaming_content) if response.streaming else response.content
+            headers = {name: response[name] for name in baked_header_names() if response.has_header(name)}
+            tags = tag_versions(get_cache_tags(request))
+            counts["written" if write_baked(path, content, headers, tags) else "unchanged"] += 1
+        elif remove_baked(path):
+            counts["removed"] += 1
+            logger.info("Removed baked %s (status %s)", route, response.status_code)
+    return counts
+
+
+def rebake_tags(tags):
+    """Rebake the routes depending on purged cache ``tags``."""
+    try:
+        counts = bake_routes(routes_for_tags(tags))
+        logger.info("Rebaked for %s: %s", ", ".join(sorted(tags)), counts)
+    except Exception:
+        logger.exception("Rebaking for %s failed", ", ".join(sorted(tags)))
+
+
+def _drain():
+    try:
+        while True:
+            with _lock:
+                tags = set(_pending)
+                _pending.clear()
+            if not tags:
+                return
+            rebake_tags(tags)
+    finally:
+        connections.close_all()
+
+
+def schedule_rebake(tags):
+    """
+    Purge listener: rebake on a background thread.
+
+    Tags purged while a rebake runs are collected into the next one.
+    """
+    global _executor
+
+    with _lock:
+        idle = not _pending
+        _pending.update(tags)
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bake")
+    if idle:
+        _executor.submit(_drain)
+
+
+class BakedPageMiddleware:
+    """Serve baked files to anonymous visitors, bypassing the rest of Django."""
+
+    def __init__(self, get_response):
+        if not settings.STATIC_BAKING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.serve(request)
+        return response if response is not None else self.get_response(request)
+
+    def serve(self, request):
+        if request.META.get("QUERY_STRING") or BAKE_HEADER in request.headers:
+            return None
+        if not is_cacheable_request(request):
+            return None
+        path = route_path(request.path)
+        if path is None:
+            return None
+        stale = purged_tags(read_baked_tags(path))
+        if stale:
+            # Purged on another machine; render live until rebaked here
+            schedule_rebake(stale)
+            return None
+
+        accepted = request.headers.get("Accept-Encoding", "")
+        offered = set(SUFFIXES)
+        while (encoding := negotiate(accepted, offered)) is not None:
+            response = self._file_response(path.with_name(path.name + SUFFIXES[encoding]), path, encoding)
+            if response is not None:
+                return response
+            offered.discard(encoding)
+        return self._file_response(path, path, None)
+
+    def _file_response(self, file_path, original, encoding):
+        try:
+            with open(file_path, "rb") as f:
+                content = f.read()
+                mtime = os.fstat(f.fileno()).st_mtime
+        except OSError:
+            return None
+        response = HttpResponse(
+            content, content_type=CONTENT_TYPES[original.suffix], headers=read_baked_headers(original)
+        )
+        response["Content-Length"] = str(len(content))
+        response["Last-Modified"] = http_date(mtime)
+        response["Vary"] = "Accept-Encoding"
+        response["X-Cache"] = "BAKED"
+        if encoding:
+            response["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,335 @@
+"""
+Two-tier cache with stampede protection.
+
+``TieredCache`` puts a small per-process LRU (L1) in front of a shared
+Django cache backend (L2, Redis in production) and adds what a plain
+check-compute-set lacks:
+
+* single-flight: one caller per key computes a missing value, within the
+  process through a lock and across workers through an ``add()`` lock in
+  L2; everybody else waits for the result instead of recomputing it
+* probabilistic early recomputation (XFetch): the closer a value is to
+  expiry and the slower it was to compute, the more likely a read triggers
+  a refresh, so hot keys are renewed before they expire
+* stale-while-revalidate: expired values are kept for ``stale_ttl`` more
+  seconds and served while a single refresh runs in the background
+
+Values are stored with the time they took to compute and their logical
+expiry. An optional ``serializer`` (see ``news.cards``) encodes them to
+compact bytes for L2; L1 keeps the decoded objects. L1 entries live for
+at most ``l1_timeout`` seconds, which bounds how long another worker can
+serve a value after ``delete()``. Values handed out from L1 are shared
+between callers; treat them as read-only.
+
+Hit, miss and refresh counters are kept per namespace and published
+through ``news.instrumentation``.
+"""
+
+import fnmatch
+import logging
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+from django.db import connections
+
+from .instrumentation import register_metrics
+
+logger = logging.getLogger(__name__)
+
+_refresh_executor = None
+_refresh_executor_lock = threading.Lock()
+
+
+def get_backend(alias):
+    """The cache backend ``alias``, or ``default`` when it is not configured."""
+    try:
+        return caches[alias]
+    except InvalidCacheBackendError:
+        return caches["default"]
+
+
+def _refresh_in_background(func):
+    global _refresh_executor
+
+    if not getattr(settings, "CACHE_REFRESH_ASYNC", True):
+        func()
+        return
+    with _refresh_executor_lock:
+        if _refresh_executor is None:
+            _refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+
+    def run():
+        try:
+            func()
+        finally:
+            connections.close_all()
+
+    _refresh_executor.submit(run)
+
+
+class LRU:
+    """Thread-safe size-bounded mapping with per-entry expiry."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        if self.maxsize <= 0 or timeout <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_matching(self, pattern):
+        with self._lock:
+            for key in [k for k in self._data if fnmatch.fnmatchcase(k, pattern)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TieredCache:
+    """
+    Cache facade for one namespace.
+
+    ``alias`` is the shared backend; ``l1_size`` and ``l1_timeout`` size the
+    per-process layer (0 disables it). ``beta`` tunes early recomputation,
+    higher refreshes earlier. ``lock_timeout`` bounds how long a computation
+    may hold the lock and how long waiters block before computing themselves.
+    ``serializer`` is an object with ``dumps``/``loads`` used for L2 values.
+    """
+
+    STAT_NAMES = (
+        "l1_hits", "l2_hits", "misses", "stale_hits",
+        "early_refreshes", "computes", "lock_waits", "errors",
+    )
+
+    def __init__(self, namespace, alias="default", l1_size=256, l1_timeout=10,
+                 stale_ttl=300, lock_timeout=10, beta=1.0, serializer=None):
+        self.namespace = namespace
+        self.alias = alias
+        self.l1 = LRU(l1_size)
+        self.l1_timeout = l1_timeout
+        self.stale_ttl = stale_ttl
+        self.lock_timeout = lock_timeout
+        self.beta = beta
+        self.serializer = serializer
+
+        self._stats = dict.fromkeys(self.STAT_NAMES, 0)
+        self._stats_lock = threading.Lock()
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+
+        register_metrics(f"cache.{namespace}", self.stats)
+
+    # Keys and storage -----------------------------------------------------
+
+    @property
+    def backend(self):
+        return get_backend(self.alias)
+
+    def make_key(self, key):
+        return f"{self.namespace}:{key}"
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def _store(self, full_key, value, timeout, delta):
+        entry = (value, delta, time.time() + timeout)
+        payload = self.serializer.dumps(value) if self.serializer else value
+        self.backend.set(full_key, (payload, delta, entry[2]), timeout + self.stale_ttl)
+        self.l1.set(full_key, entry, min(self.l1_timeout, timeout))
+        return entry
+
+    def _load(self, full_key):
+        entry = self.l1.get(full_key)
+        if entry is not None:
+            return entry, "l1_hits"
+        entry = self._backend_get(full_key)
+        if entry is not None:
+            remaining = entry[2] - time.time()
+            if remaining > 0:
+                self.l1.set(full_key, entry, min(self.l1_timeout, remaining))
+            return entry, "l2_hits"
+        return None, "misses"
+
+    def _backend_get(self, full_key):
+        entry = self.backend.get(full_key)
+        if entry is None or self.serializer is None:
+            return entry
+        payload, delta, expires = entry
+        try:
+            return self.serializer.loads(payload), delta, expires
+        except Exception as e:
+            # Written by an incompatible version; treat it as a miss
+            logger.warning("Could not decode cached %s: %s", full_key, e)
+            return None
+
+    def _should_refresh_early(self, delta, expires):
+        # XFetch: -log(U) is exponentially distributed, so the odds rise as
+        # expiry approaches, scaled by how long the value took to compute
+        return time.time() - delta * self.beta * math.log(1 - random.random()) >= expires
+
+    # Locking --------------------------------------------------------------
+
+    def _lock_key(self, full_key):
+        return f"{full_key}:lock"
+
+    def _acquire(self, full_key):
+        return self.backend.add(self._lock_key(full_key), 1, self.lock_timeout)
+
+    def _release(self, full_key):
+        self.backend.delete(self._lock_key(full_key))
+
+    def _compute(self, full_key, compute, timeout):
+        started = time.monotonic()
+        value = compute()
+        self._count("computes")
+        return self._store(full_key, value, timeout, time.monotonic() - started)
+
+    def _refresh(self, full_key, compute, timeout):
+        if not self._acquire(full_key):
+            return
+        try:
+            self._compute(full_key, compute, timeout)
+        except Exception:
+            # The stale value stays in place until the next attempt
+            self._count("errors")
+            logger.exception("Refreshing %s failed", full_key)
+        finally:
+            self._release(full_key)
+
+    # Public API -----------------------------------------------------------
+
+    def get_or_set(self, key, compute, timeout=300):
+        """
+        Return the cached value of ``key``, computing it with ``compute()``
+        when missing. Only one caller computes a missing key at a time.
+        """
+        full_key = self.make_key(key)
+        entry, source = self._load(full_key)
+
+        if entry is not None:
+            value, delta, expires = entry
+            if time.time() >= expires:
+                self._count("stale_hits")
+                _refresh_in_background(lambda: self._refresh(full_key, compute, timeout))
+            elif self._should_refresh_early(delta, expires):
+                self._count(source)
+                self._count("early_refreshes")
+                _refresh_in_background(lambda: self._refresh(full_key, compute, timeout))
+            else:
+                self._count(source)
+            return value
+
+        self._count("misses")
+        return self._single_flight(full_key, compute, timeout)[0]
+
+    def _single_flight(self, full_key, compute, timeout):
+        with self._flights_lock:
+            flight = self._flights.get(full_key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[full_key] = {"event": threading.Event(), "entry": None}
+
+        if not leader:
+            # Another thread of this process is computing the value
+            self._count("lock_waits")
+            flight["event"].wait(self.lock_timeout)
+            if flight["entry"] is not None:
+                return flight["entry"]
+            return self._compute(full_key, compute, timeout)
+
+        try:
+            flight["entry"] = self._leader_compute(full_key, compute, timeout)
+            return flight["entry"]
+        finally:
+            with self._flights_lock:
+                self._flights.pop(full_key, None)
+            flight["event"].set()
+
+    def _leader_compute(self, full_key, compute, timeout):
+        if self._acquire(full_key):
+            try:
+                return self._compute(full_key, compute, timeout)
+            finally:
+                self._release(full_key)
+
+        # Another worker holds the lock; wait for its value to show up
+        self._count("lock_waits")
+        deadline = time.monotonic() + self.lock_timeout
+        delay = 0.01
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            delay = min(delay * 2, 0.2)
+            entry = self._backend_get(full_key)
+            if entry is not None:
+                return entry
+        return self._compute(full_key, compute, timeout)
+
+    def get(self, key, default=None):
+        entry, source = self._load(self.make_key(key))
+        self._count(source)
+        return default if entry is None else entry[0]
+
+    def set(self, key, value, timeout=300):
+        self._store(self.make_key(key), value, timeout, 0)
+
+    def delete(self, key):
+        full_key = self.make_key(key)
+        self.l1.delete(full_key)
+        self.backend.delete(full_key)
+
+    def delete_pattern(self, pattern):
+        """Delete keys matching a glob ``pattern``; L2 needs django-redis for this."""
+        full_pattern = self.make_key(pattern)
+        self.l1.delete_matching(full_pattern)
+        if hasattr(self.backend, "delete_pattern"):
+            self.backend.delete_pattern(full_pattern)
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        hits = stats["l1_hits"] + stats["l2_hits"] + stats["stale_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = round(hits / lookups, 4) if lookups else None
+        stats["l1_size"] = len(self.l1)
+        return stats
+
+
+# Per-category listing flags, see Category.listing_flags
+category_cache = TieredCache("categories")
+# Most read lists and the IDs views are counted for, see news.popularity
+popular_cache = TieredCache("popular")
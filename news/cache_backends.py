@@ -0,0 +1,117 @@
+"""
+Cache backend that connects to Redis on first use and falls back locally.
+
+Settings used to ping Redis while being imported, which blocked every cold
+start on a network round trip (or a long timeout when Redis was down) and
+fixed the choice of backend for the life of the process.
+``FallbackRedisCache`` instead imports ``django_redis`` and connects when
+the cache is first used. When Redis fails, operations go to a per-process
+``LocMemCache`` for ``RETRY_AFTER`` seconds before Redis is tried again,
+so an outage degrades to local caching instead of a miss on every call.
+"""
+
+import logging
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+
+logger = logging.getLogger(__name__)
+
+RETRY_AFTER = 30
+
+
+class FallbackRedisCache(BaseCache):
+    """``django_redis`` ``RedisCache``, created lazily, with a local fallback."""
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        self._server = server
+        self._params = params
+        self._redis = None
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+        self._local = LocMemCache(f"fallback-{params.get('KEY_PREFIX', '')}", {
+            "TIMEOUT": params.get("TIMEOUT", 300),
+            "KEY_PREFIX": params.get("KEY_PREFIX", ""),
+        })
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            with self._lock:
+                if self._redis is None:
+                    from django_redis.cache import RedisCache
+
+                    self._redis = RedisCache(self._server, self._params)
+        return self._redis
+
+    def _call(self, method, *args, **kwargs):
+        if time.monotonic() >= self._down_until:
+            try:
+                return getattr(self.redis, method)(*args, **kwargs)
+            except Exception as e:
+                if not _is_connection_error(e):
+                    raise
+                self._down_until = time.monotonic() + RETRY_AFTER
+                logger.warning("Redis unavailable, caching locally for %ss: %s", RETRY_AFTER, e)
+        local = getattr(self._local, method, None)
+        # LocMemCache cannot match key patterns; its entries expire on their own
+        return local(*args, **kwargs) if local else None
+
+    @property
+    def is_fallback(self):
+        return time.monotonic() < self._down_until
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call("add", key, value, timeout, version=version)
+
+    def get(self, key, default=None, version=None):
+        return self._call("get", key, default, version=version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call("set", key, value, timeout, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call("touch", key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        return self._call("delete", key, version=version)
+
+    def get_many(self, keys, version=None):
+        return self._call("get_many", keys, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call("set_many", data, timeout, version=version)
+
+    def delete_many(self, keys, version=None):
+        return self._call("delete_many", keys, version=version)
+
+    def has_key(self, key, version=None):
+        return self._call("has_key", key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        return self._call("incr", key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        return self._call("decr", key, delta, version=version)
+
+    def delete_pattern(self, pattern, version=None):
+        return self._call("delete_pattern", pattern, version=version)
+
+    def clear(self):
+        self._local.clear()
+        return self._call("clear")
+
+    def close(self, **kwargs):
+        if self._redis is not None:
+            self._redis.close(**kwargs)
+
+
+def _is_connection_error(error):
+    # django_redis wraps connection failures in ConnectionInterrupted
+    from django_redis.exceptions import ConnectionInterrupted
+    from redis.exceptions import ConnectionError, TimeoutError
+
+    return isinstance(error, (ConnectionInterrupted, ConnectionError, TimeoutError, OSError))
@@ -0,0 +1,98 @@
+"""
+Shared-cache headers for public pages.
+
+Views name a policy with ``set_cache_policy(request, "article")``;
+``CachePolicyMiddleware`` turns it into ``Cache-Control`` for anonymous
+responses and lists the request's cache tags (see ``news.cache_tags``) in
+``Surrogate-Key``, so a CDN can keep pages for a long time and drop them
+by article, category or tag when ``news.cdn`` purges those keys.
+
+Browsers get a short ``max-age`` because they cannot be purged; shared
+caches get ``s-maxage`` plus ``stale-while-revalidate`` and
+``stale-if-error`` to keep serving through refreshes and origin errors.
+Responses to visitors with a session are marked ``private``; configure the
+CDN to bypass its cache when the session cookie is present.
+"""
+
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+
+from .cache_tags import get_cache_tags
+from .page_cache import is_cacheable_request, is_cacheable_response
+
+REQUEST_ATTR = "_cache_policy"
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Lifetimes in seconds for browsers (``max_age``) and shared caches."""
+
+    max_age: int
+    s_maxage: int
+    stale_while_revalidate: int = 0
+    stale_if_error: int = 0
+    # For pages that do not change once complete; purges still reach the CDN
+    immutable: bool = False
+
+    def header(self):
+        directives = ["public", f"max-age={self.max_age}", f"s-maxage={self.s_maxage}"]
+        if self.stale_while_revalidate:
+            directives.append(f"stale-while-revalidate={self.stale_while_revalidate}")
+        if self.stale_if_error:
+            directives.append(f"stale-if-error={self.stale_if_error}")
+        if self.immutable:
+            directives.append("immutable")
+        return ", ".join(directives)
+
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+# Purges keep shared copies fresh, so s-maxage is bounded by how long a
+# missed purge may stay visible rather than by how often pages change
+POLICIES = {
+    "home": CachePolicy(max_age=60, s_maxage=5 * 60, stale_while_revalidate=10 * 60, stale_if_error=DAY),
+    "article": CachePolicy(max_age=5 * 60, s_maxage=HOUR, stale_while_revalidate=DAY, stale_if_error=7 * DAY),
+    "listing": CachePolicy(max_age=60, s_maxage=10 * 60, stale_while_revalidate=HOUR, stale_if_error=DAY),
+    "feed": CachePolicy(max_age=5 * 60, s_maxage=15 * 60, stale_while_revalidate=HOUR, stale_if_error=DAY),
+    "sitemap": CachePolicy(max_age=HOUR, s_maxage=HOUR, stale_while_revalidate=DAY, stale_if_error=7 * DAY),
+    "page": CachePolicy(max_age=5 * 60, s_maxage=HOUR, stale_while_revalidate=DAY, stale_if_error=7 * DAY),
+    # Months that are over; only an edit to an old article changes them
+    "archive": CachePolicy(max_age=DAY, s_maxage=30 * DAY, stale_while_revalidate=DAY, stale_if_error=30 * DAY, immutable=True),
+}
+
+
+def set_cache_policy(request, name):
+    """Use the policy ``name`` from ``POLICIES`` for the response to ``request``."""
+    if name not in POLICIES:
+        raise ValueError(f"Unknown cache policy: {name}")
+    if request is not None:
+        setattr(request, REQUEST_ATTR, name)
+
+
+def get_cache_policy(request):
+    name = getattr(request, REQUEST_ATTR, None)
+    return POLICIES[name] if name else None
+
+
+class CachePolicyMiddleware:
+    """Add ``Cache-Control`` and ``Surrogate-Key`` to responses of views with a policy."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.key_header = getattr(settings, "SURROGATE_KEY_HEADER", "Surrogate-Key")
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        policy = get_cache_policy(request)
+        if policy is None or response.has_header("Cache-Control"):
+            return response
+
+        if not is_cacheable_request(request):
+            patch_cache_control(response, private=True)
+        elif is_cacheable_response(response, allow_streaming=True):
+            response["Cache-Control"] = policy.header()
+            response[self.key_header] = " ".join(sorted(get_cache_tags(request)))
+        return response
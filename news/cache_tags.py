@@ -0,0 +1,111 @@
+"""
+Dependency tags for cached pages.
+
+Views declare what a response was built from with ``add_cache_tags``, e.g.
+``article:12``, ``category:3``, ``tag:seo``, ``home`` or ``feed``. Every
+page also carries ``site``, for changes that touch the shared layout.
+
+Invalidation uses tag versions: each tag has a version number in the
+``pages`` cache, cached entries remember the versions they were built
+with, and ``purge_tags`` bumps the versions so older entries stop
+matching. This works on any cache backend, needs no key index, and a
+version lost to eviction simply invalidates the entries that used it.
+
+``purge_tags`` also notifies the functions registered with
+``register_purge_listener`` (static rebakes, CDN purges).
+"""
+
+import logging
+import time
+
+from .cache import get_backend
+
+logger = logging.getLogger(__name__)
+
+REQUEST_ATTR = "_cache_tags"
+SITE_TAG = "site"
+VERSION_PREFIX = "cachetag:"
+
+_purge_listeners = []
+
+
+def add_cache_tags(request, *tags):
+    """Record that the response to ``request`` depends on ``tags``."""
+    if request is None:
+        return
+    if not hasattr(request, REQUEST_ATTR):
+        setattr(request, REQUEST_ATTR, {SITE_TAG})
+    getattr(request, REQUEST_ATTR).update(str(tag) for tag in tags if tag)
+
+
+def get_cache_tags(request):
+    """The tags recorded for ``request``, always including ``site``."""
+    return set(getattr(request, REQUEST_ATTR, ())) | {SITE_TAG}
+
+
+def article_tags(*articles):
+    """Tags for pages showing ``articles``, pages or cards alike."""
+    return [f"article:{article.id}" for article in articles if article]
+
+
+def _version_key(tag):
+    return f"{VERSION_PREFIX}{tag}"
+
+
+def _new_version():
+    # Not a counter starting at 1, so a version lost to eviction never
+    # comes back with a value an old entry recorded
+    return time.time_ns()
+
+
+def tag_versions(tags):
+    """Current ``{tag: version}``, creating versions for new tags."""
+    backend = get_backend("pages")
+    keys = {_version_key(tag): tag for tag in tags}
+    found = backend.get_many(list(keys))
+    versions = {keys[key]: version for key, version in found.items()}
+    for key, tag in keys.items():
+        if tag not in versions:
+            version = _new_version()
+            if not backend.add(key, version, None):
+                version = backend.get(key, version)
+            versions[tag] = version
+    return versions
+
+
+def purged_tags(recorded):
+    """The tags in ``recorded``, ``{tag: version}``, purged since they were recorded."""
+    if not recorded:
+        return set()
+    backend = get_backend("pages")
+    current = backend.get_many([_version_key(tag) for tag in recorded])
+    return {
+        tag for tag, version in recorded.items() if current.get(_version_key(tag)) != version
+    }
+
+
+def versions_match(recorded):
+    """Whether no tag in ``recorded`` has been purged since it was recorded."""
+    return not purged_tags(recorded)
+
+
+def register_purge_listener(listener):
+    """Call ``listener(tags)`` after tags are purged."""
+    if listener not in _purge_listeners:
+        _purge_listeners.append(listener)
+
+
+def purge_tags(*tags):
+    """Invalidate every cached entry depending on any of ``tags``."""
+    tags = {str(tag) for tag in tags if tag}
+    if not tags:
+        return
+    backend = get_backend("pages")
+    backend.set_many({_version_key(tag): _new_version() for tag in tags}, None)
+    logger.info("Purged cache tags: %s", ", ".join(sorted(tags)))
+
+    for listener in _purge_listeners:
+        try:
+            listener(tags)
+        except Exception:
+            logger.exception("Purge listener %r failed", listener)
@@ -0,0 +1,40 @@
+"""
+Purging surrogate keys at a CDN.
+
+``CDN_PURGE_BACKEND`` names a ``Purger`` subclass. It is registered as a
+purge listener (see ``news.cache_tags``), so every purged cache tag is
+also purged as a surrogate key at the edge. ``LogPurger``, the default,
+only logs the keys; a CDN integration implements ``purge_keys``.
+"""
+
+import logging
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = "news.cdn.LogPurger"
+
+
+class Purger:
+    """Interface for CDN purge backends."""
+
+    def purge_keys(self, keys):
+        """Invalidate every edge copy tagged with any of ``keys``."""
+        raise NotImplementedError
+
+    def __call__(self, tags):
+        self.purge_keys(sorted(tags))
+
+
+class LogPurger(Purger):
+    """Stand-in for deployments without a CDN: records what would be purged."""
+
+    def purge_keys(self, keys):
+        logger.info("CDN purge (not sent): %s", " ".join(keys))
+
+
+def get_purger():
+    backend = getattr(settings, "CDN_PURGE_BACKEND", "") or DEFAULT_BACKEND
+    return import_string(backend)()
@@ -0,0 +1,203 @@
+"""
+Response compression: gzip, brotli and zstd.
+
+Cacheable pages are compressed once when they are stored, at high levels
+and in every available encoding (``compress_variants``), and cached hits
+pick the stored variant the client prefers (``negotiate``). Everything
+else goes through ``CompressionMiddleware``, which compresses text
+responses above ``MIN_SIZE`` at cheaper levels on each request, and
+streamed ones chunk by chunk (``compress_stream``, or ``acompress_stream``
+for the async streams of ASGI responses).
+
+``brotli`` and ``zstandard`` are optional; without them only gzip is used.
+"""
+
+import gzip
+import re
+import zlib
+
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Below about one TCP packet compression saves nothing noticeable
+MIN_SIZE = 860
+
+# Server preference when the client rates encodings equally
+PREFERENCE = ("br", "zstd", "gzip")
+
+# Done once per cache fill: spend CPU for size
+STORE_LEVELS = {"br": 9, "zstd": 12, "gzip": 9}
+# Done on every uncached request: favour speed on a shared vCPU
+DYNAMIC_LEVELS = {"br": 4, "zstd": 3, "gzip": 5}
+
+COMPRESSIBLE_TYPES = (
+    "text/html", "text/plain", "text/xml", "application/xml",
+    "application/rss+xml", "application/atom+xml", "application/json",
+)
+
+_CODING = re.compile(r"^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$")
+_STRONG_ETAG = re.compile(r'^\s*"')
+
+
+def available_encodings():
+    """Encodings this process can produce, in order of preference."""
+    available = {"gzip"}
+    if brotli is not None:
+        available.add("br")
+    if zstandard is not None:
+        available.add("zstd")
+    return [encoding for encoding in PREFERENCE if encoding in available]
+
+
+def compress(data, encoding, level):
+    if encoding == "gzip":
+        return gzip.compress(data, level, mtime=0)
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def _stream_compressor(encoding, level):
+    """``(process, flush, finish)`` of a streaming compressor for ``encoding``."""
+    if encoding == "gzip":
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        process, flush, finish = compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+    elif encoding == "br":
+        compressor = brotli.Compressor(quality=level)
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    elif encoding == "zstd":
+        compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        process, finish = compressor.compress, compressor.flush
+        flush = lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+    else:
+        raise ValueError(f"Unsupported encoding: {encoding}")
+    return process, flush, finish
+
+
+def compress_stream(chunks, encoding, level):
+    """Compress ``chunks`` as one stream, flushing after each so none waits for the next."""
+    process, flush, finish = _stream_compressor(encoding, level)
+    for chunk in chunks:
+        data = process(chunk) + flush()
+        if data:
+            yield data
+    yield finish()
+
+
+async def acompress_stream(chunks, encoding, level):
+    """``compress_stream`` for the async iterators of responses streamed under ASGI."""
+    process, flush, finish = _stream_compressor(encoding, level)
+    async for chunk in chunks:
+        data = process(chunk) + flush()
+        if data:
+            yield data
+    yield finish()
+
+
+def decompress(data, encoding):
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "br":
+        return brotli.decompress(data)
+    if encoding == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def negotiate(accept_encoding, offered):
+    """
+    The encoding from ``offered`` the client prefers, or ``None`` for identity.
+
+    Follows the ``q`` values of ``Accept-Encoding`` and breaks ties with
+    ``PREFERENCE``; ``*`` matches any encoding not listed explicitly.
+    """
+    weights = {}
+    for part in (accept_encoding or "").lower().split(","):
+        match = _CODING.match(part)
+        if not match:
+            continue
+        try:
+            weights[match[1]] = float(match[2]) if match[2] else 1.0
+        except ValueError:
+            continue
+
+    best, best_weight = None, 0.0
+    for encoding in PREFERENCE:
+        if encoding not in offered:
+            continue
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def is_compressible(response):
+    content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+    return content_type in COMPRESSIBLE_TYPES and not response.has_header("Content-Encoding")
+
+
+def compress_variants(data, levels=STORE_LEVELS, min_size=MIN_SIZE):
+    """``{encoding: bytes}`` for every available encoding that makes ``data`` smaller."""
+    if len(data) < min_size:
+        return {}
+    variants = {}
+    for encoding in available_encodings():
+        compressed = compress(data, encoding, levels[encoding])
+        if len(compressed) < len(data):
+            variants[encoding] = compressed
+    return variants
+
+
+class CompressionMiddleware:
+    """
+    Compress text responses on the fly at ``DYNAMIC_LEVELS``, streamed ones
+    chunk by chunk.
+
+    Replaces ``GZipMiddleware``/``gzip_page``. Responses that are already
+    encoded, such as cached or baked pages, pass through untouched.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not is_compressible(response):
+            return response
+        if not response.streaming and len(response.content) < MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = negotiate(request.headers.get("Accept-Encoding", ""), available_encodings())
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            stream = acompress_stream if response.is_async else compress_stream
+            response.streaming_content = stream(
+                response.streaming_content, encoding, DYNAMIC_LEVELS[encoding]
+            )
+            del response["Content-Length"]
+        else:
+            compressed = compress(response.content, encoding, DYNAMIC_LEVELS[encoding])
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        # The body differs per encoding, so a strong ETag no longer holds
+        etag = response.get("ETag")
+        if etag and _STRONG_ETAG.match(etag):
+            response["ETag"] = "W/" + etag
+        return response
@@ -0,0 +1,119 @@
+"""
+Database connection reuse, read replica routing and connection metrics.
+
+Settings keep connections open (``DB_CONN_MAX_AGE``) or pool them with
+psycopg 3 (``DB_POOL``). When ``DATABASE_REPLICA_URL`` is set, the
+``replica`` alias exists and ``ReplicaRouter`` is installed:
+``ReplicaReadsMiddleware`` sends the reads of anonymous GET requests, the
+ones the page cache would store and that tolerate replication lag, to the
+replica. ``replica_reads()`` does the same for other read-only code.
+Writes always go to the primary, and reads after a write in the same
+context stay there.
+
+The ``db`` metrics provider reports, per alias, how many connections this
+process opened and, for pooled aliases, the pool's own statistics.
+"""
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+
+from .instrumentation import register_metrics
+from .page_cache import is_cacheable_request
+
+REPLICA = "replica"
+
+_use_replica = ContextVar("use_replica", default=False)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+@contextmanager
+def replica_reads():
+    """Route reads inside the block to the replica, if there is one."""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class ReplicaRouter:
+    """Reads go to ``replica`` inside ``replica_reads()``; everything else to the primary."""
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and replica_configured():
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Read your own writes: the replica may not have this one yet
+        _use_replica.set(False)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA
+
+
+class ReplicaReadsMiddleware:
+    """Serve anonymous GET and HEAD requests from the replica."""
+
+    def __init__(self, get_response):
+        if not replica_configured():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not is_cacheable_request(request):
+            return self.get_response(request)
+        # Template responses are rendered inside get_response, so lazy
+        # querysets evaluated by templates are covered too
+        with replica_reads():
+            return self.get_response(request)
+
+
+class ConnectionStats:
+    """Connections opened by this process, per database alias."""
+
+    def __init__(self):
+        self.opened = {}
+        self.lock = threading.Lock()
+
+    def connection_created(self, sender, connection, **kwargs):
+        with self.lock:
+            self.opened[connection.alias] = self.opened.get(connection.alias, 0) + 1
+
+    def snapshot(self):
+        metrics = {}
+        for alias in connections:
+            config = connections.settings[alias]
+            pooled = bool(config.get("OPTIONS", {}).get("pool"))
+            alias_metrics = {
+                "vendor": connections[alias].vendor,
+                "conn_max_age": config.get("CONN_MAX_AGE", 0),
+                "health_checks": config.get("CONN_HEALTH_CHECKS", False),
+                "pooled": pooled,
+                "opened": self.opened.get(alias, 0),
+            }
+            if pooled:
+                pool = getattr(connections[alias], "pool", None)
+                if pool is not None:
+                    alias_metrics["pool"] = pool.get_stats()
+            metrics[alias] = alias_metrics
+        return metrics
+
+
+stats = ConnectionStats()
+connection_created.connect(stats.connection_created, dispatch_uid="news.database.stats")
+register_metrics("db", stats.snapshot)
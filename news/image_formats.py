@@ -8,6 +8,8 @@ from wagtail.images.models import AbstractImage, AbstractRendition
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 
+from .placeholders import FALLBACK_PLACEHOLDER, get_placeholder, schedule_placeholder
+
 
 class ResponsiveImageFormat(Format):
     """
@@ -111,12 +113,11 @@ class LazyImageFormat(Format):
         except:
             return ''
         
-        # Create placeholder (low quality image placeholder)
-        try:
-            placeholder = image.get_rendition('width-50|jpegquality-20')
-            placeholder_src = placeholder.url
-        except:
-            placeholder_src = 'data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iODAwIiBoZWlnaHQ9IjYwMCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj48cmVjdCB3aWR0aD0iMTAwJSIgaGVpZ2h0PSIxMDAlIiBmaWxsPSIjZjBmMGYwIi8+PC9zdmc+'
+        # Inline the stored placeholder instead of requesting another rendition
+        placeholder_src = get_placeholder(image)
+        if not placeholder_src:
+            schedule_placeholder(image.pk)
+            placeholder_src = FALLBACK_PLACEHOLDER
         
         img_attrs = {
             'src': placeholder_src,
@@ -210,7 +211,9 @@ def register_custom_formats():
     ))
 
 
-# Auto-register formats when module is imported
+# Wagtail imports ``image_formats`` modules the first time formats are looked
+# up (rich text rendering or the editor), not at startup, so registering here
+# costs nothing on a cold start. Keep this module out of eager imports.
 register_custom_formats()
 
 
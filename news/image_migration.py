@@ -0,0 +1,176 @@
+"""
+Resumable, parallel migration of original image files between storages.
+
+Each image gets an ``ImageMigrationState`` row per target, so a rerun only
+picks up images that are not done yet. Files are streamed from the source
+storage in chunks while being hashed, uploaded by a pool of worker threads,
+and read back from the target to verify the SHA-1 before the image row is
+pointed at the new file.
+
+Worker threads only talk to the storages; every database write happens on
+the calling thread.
+"""
+
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+from django.core.files import File
+from wagtail.images import get_image_model
+
+from .models import ImageMigrationState
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 256 * 1024
+
+
+class ChecksumMismatch(Exception):
+    """Raised when the uploaded file does not match the source file."""
+
+
+class HashingReader:
+    """File-like wrapper that hashes everything read through it."""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.hasher = hashlib.sha1()
+        self.size = 0
+
+    def read(self, size=-1):
+        data = self.fileobj.read(size)
+        self.hasher.update(data)
+        self.size += len(data)
+        return data
+
+    def hexdigest(self):
+        return self.hasher.hexdigest()
+
+
+def hash_stored_file(storage, name, chunk_size=CHUNK_SIZE):
+    """SHA-1 of a stored file, read in chunks."""
+    hasher = hashlib.sha1()
+    with storage.open(name, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+@dataclass
+class TransferResult:
+    image_id: int
+    source_name: str
+    target_name: str = ""
+    checksum: str = ""
+    error: str = ""
+
+    @property
+    def ok(self):
+        return not self.error
+
+
+class ImageMigrator:
+    """
+    Copy image originals from ``source_storage`` to ``target_storage``.
+
+    ``target`` is the label stored on the state rows; use a different label
+    for every destination so separate migrations never share progress.
+    """
+
+    def __init__(self, source_storage, target_storage, target, workers=4,
+                 chunk_size=CHUNK_SIZE, verify=True, update_images=True):
+        self.source_storage = source_storage
+        self.target_storage = target_storage
+        self.target = target
+        self.workers = max(1, workers)
+        self.chunk_size = chunk_size
+        self.verify = verify
+        self.update_images = update_images
+
+    def pending_states(self, retry_failed=True):
+        """Create missing state rows and return the ones still to do."""
+        Image = get_image_model()
+        known = ImageMigrationState.objects.filter(target=self.target).values("image_id")
+        ImageMigrationState.objects.bulk_create(
+            [
+                ImageMigrationState(image_id=image_id, target=self.target)
+                for image_id in Image.objects.exclude(id__in=known).values_list("id", flat=True)
+            ],
+            ignore_conflicts=True,
+        )
+
+        statuses = [ImageMigrationState.STATUS_PENDING]
+        if retry_failed:
+            statuses.append(ImageMigrationState.STATUS_FAILED)
+        return (
+            ImageMigrationState.objects.filter(target=self.target, status__in=statuses)
+            .select_related("image")
+            .order_by("image_id")
+        )
+
+    def transfer(self, image_id, name):
+        """Stream one file to the target storage and verify it. Runs in a worker."""
+        result = TransferResult(image_id=image_id, source_name=name)
+        try:
+            with self.source_storage.open(name, "rb") as source:
+                reader = HashingReader(source)
+                uploaded = File(reader, name=name)
+                uploaded.size = getattr(source, "size", None)
+                result.target_name = self.target_storage.save(name, uploaded)
+            result.checksum = reader.hexdigest()
+
+            if self.verify:
+                remote = hash_stored_file(self.target_storage, result.target_name, self.chunk_size)
+                if remote != result.checksum:
+                    raise ChecksumMismatch(
+                        f"checksum mismatch: {result.checksum} != {remote}"
+                    )
+        except Exception as e:
+            result.error = str(e) or e.__class__.__name__
+        return result
+
+    def record(self, state, result):
+        state.attempts += 1
+        state.source_name = result.source_name
+        if result.ok:
+            state.status = ImageMigrationState.STATUS_DONE
+            state.target_name = result.target_name
+            state.checksum = result.checksum
+            state.error = ""
+            if self.update_images:
+                get_image_model().objects.filter(id=result.image_id).update(
+                    file=result.target_name
+                )
+        else:
+            state.status = ImageMigrationState.STATUS_FAILED
+            state.error = result.error
+        state.save(update_fields=[
+            "attempts", "source_name", "target_name", "checksum", "status", "error", "updated_at",
+        ])
+
+    def run(self, limit=None, retry_failed=True, progress=None):
+        """Migrate pending images; returns ``(migrated, failed)`` counts."""
+        states = self.pending_states(retry_failed)
+        if limit:
+            states = states[:limit]
+        migrated = failed = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(self.transfer, state.image_id, state.image.file.name): state
+                for state in states
+            }
+            for future in as_completed(futures):
+                state = futures[future]
+                result = future.result()
+                self.record(state, result)
+                if result.ok:
+                    migrated += 1
+                else:
+                    failed += 1
+                    logger.warning("Image %s failed to migrate: %s", state.image_id, result.error)
+                if progress:
+                    progress(state, result)
+
+        return migrated, failed
@@ -0,0 +1,110 @@
+"""
+Image processing helpers shared by the image management commands.
+
+Everything in here works on raw bytes and only depends on Pillow, so the
+functions can be shipped to a process pool without touching Django.
+"""
+
+import base64
+import hashlib
+import io
+from dataclasses import dataclass, field
+
+from PIL import Image as PILImage
+from PIL import ImageFilter, ImageOps
+
+# Focal point detection runs on a thumbnail; precision beyond this is wasted
+FOCAL_SAMPLE_SIZE = 64
+
+# Inline placeholders: a blurred preview this size ends up around 300 bytes
+PLACEHOLDER_SIZE = 24
+PLACEHOLDER_QUALITY = 40
+
+
+def hash_bytes(data):
+    """SHA-1 of ``data``, matching Wagtail's ``Image.file_hash``."""
+    return hashlib.sha1(data).hexdigest()
+
+
+@dataclass(frozen=True)
+class ImageInfo:
+    """Dimensions and focal point of an image."""
+
+    width: int
+    height: int
+    focal_point_x: int
+    focal_point_y: int
+    focal_point_width: int
+    focal_point_height: int
+    placeholder: str = field(default="", compare=False)
+
+    def as_model_fields(self):
+        return {
+            "width": self.width,
+            "height": self.height,
+            "focal_point_x": self.focal_point_x,
+            "focal_point_y": self.focal_point_y,
+            "focal_point_width": self.focal_point_width,
+            "focal_point_height": self.focal_point_height,
+        }
+
+
+def _edge_centroid(image):
+    """Return the centre of edge energy as fractions of width and height."""
+    sample = ImageOps.grayscale(image)
+    sample.thumbnail((FOCAL_SAMPLE_SIZE, FOCAL_SAMPLE_SIZE))
+    edges = sample.filter(ImageFilter.FIND_EDGES)
+    sample_width, sample_height = edges.size
+
+    total = weighted_x = weighted_y = 0
+    for index, value in enumerate(edges.getdata()):
+        if not value:
+            continue
+        y, x = divmod(index, sample_width)
+        total += value
+        weighted_x += x * value
+        weighted_y += y * value
+
+    if not total:
+        return 0.5, 0.5
+    return (
+        (weighted_x / total + 0.5) / sample_width,
+        (weighted_y / total + 0.5) / sample_height,
+    )
+
+
+def _placeholder_from_image(image):
+    preview = image.convert("RGBA" if "A" in image.getbands() or image.mode == "P" else "RGB")
+    preview.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    preview = preview.filter(ImageFilter.GaussianBlur(1))
+    buffer = io.BytesIO()
+    preview.save(buffer, "WEBP", quality=PLACEHOLDER_QUALITY, method=6)
+    return "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def make_placeholder(data):
+    """Tiny blurred WebP of encoded image ``data`` as a ``data:`` URI."""
+    with PILImage.open(io.BytesIO(data)) as image:
+        return _placeholder_from_image(ImageOps.exif_transpose(image))
+
+
+def analyse_image(data):
+    """
+    Read dimensions, estimate a focal point and build the inline placeholder
+    from encoded image ``data``.
+
+    The focal point is a box a third of the image in size, centred on the
+    area with the most edge detail and clamped to the image bounds.
+    """
+    with PILImage.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        width, height = image.size
+        centre_x, centre_y = _edge_centroid(image)
+        placeholder = _placeholder_from_image(image)
+
+    box_width = max(1, width // 3)
+    box_height = max(1, height // 3)
+    x = min(max(int(centre_x * width), box_width // 2), width - box_width // 2)
+    y = min(max(int(centre_y * height), box_height // 2), height - box_height // 2)
+
+    return ImageInfo(width, height, x, y, box_width, box_height, placeholder)
@@ -0,0 +1,42 @@
+"""
+In-process metrics registry.
+
+Components register a provider, a callable returning a dict of numbers,
+under a dotted name. ``collect()`` calls every provider and the
+``/metrics/`` view serves the result as JSON. Figures are per worker
+process; the response includes the pid so scrapes can be told apart.
+"""
+
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+_providers = {}
+_lock = threading.Lock()
+
+
+def register_metrics(name, provider):
+    """Publish ``provider()`` under ``name``, replacing any earlier provider."""
+    with _lock:
+        _providers[name] = provider
+
+
+def unregister_metrics(name):
+    with _lock:
+        _providers.pop(name, None)
+
+
+def collect():
+    """Return ``{name: metrics}`` for every registered provider."""
+    with _lock:
+        providers = sorted(_providers.items())
+    metrics = {"pid": os.getpid()}
+    for name, provider in providers:
+        try:
+            metrics[name] = provider()
+        except Exception as e:
+            logger.warning("Metrics provider %s failed: %s", name, e)
+            metrics[name] = {"error": str(e)}
+    return metrics
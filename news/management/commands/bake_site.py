@@ -0,0 +1,57 @@
+"""
+Management command to bake public pages to static files.
+
+Writes every anonymous route below ``BAKE_ROOT`` with ``.gz`` and ``.br``
+copies; ``BakedPageMiddleware`` serves them when ``STATIC_BAKING`` is on.
+Unchanged pages are not rewritten, so repeated runs only touch what moved.
+"""
+
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from news.baking import all_routes, bake_routes, get_bake_root, remove_baked, route_path, routes_for_tags
+
+
+class Command(BaseCommand):
+    help = 'Render public pages to static files for anonymous visitors'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tag',
+            action='append',
+            default=[],
+            help='Only rebake routes depending on this cache tag, e.g. article:12 (repeatable)'
+        )
+        parser.add_argument(
+            '--output',
+            help='Directory to bake into (default: BAKE_ROOT)'
+        )
+        parser.add_argument(
+            '--clean',
+            action='store_true',
+            help='Remove baked files for routes that no longer exist'
+        )
+
+    def handle(self, *args, **options):
+        root = Path(options['output'] or get_bake_root())
+        routes = routes_for_tags(set(options['tag'])) if options['tag'] else all_routes()
+        self.stdout.write(f'Baking {len(routes)} routes into {root}...')
+
+        counts = bake_routes(routes, root)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {counts['written']}, unchanged {counts['unchanged']}, removed {counts['removed']}"
+        ))
+
+        if options['clean'] and not options['tag']:
+            self.clean(root, routes)
+
+    def clean(self, root, routes):
+        keep = {route_path(route, root) for route in routes}
+        stale = [
+            path for path in root.resolve().rglob('*')
+            if path.suffix in ('.html', '.xml') and path not in keep
+        ]
+        for path in stale:
+            remove_baked(path)
+        self.stdout.write(self.style.WARNING(f'Removed {len(stale)} stale baked routes'))
@@ -0,0 +1,88 @@
+"""
+Management command to benchmark the JSON API list endpoints.
+
+Calls each endpoint's view directly, past the page cache, counts the SQL
+queries it runs and times it over a number of rounds. Fails if an
+endpoint runs more queries than the resource types it returns: a query
+per page of articles, one more for their bodies, and none per item.
+"""
+
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from news import api
+
+# (path, view, query budget): one query per resource type in the response
+ENDPOINTS = [
+    ("/api/v1/articles/", api.ArticleList, 1),
+    ("/api/v1/articles/?fields=id,title,url", api.ArticleList, 1),
+    ("/api/v1/articles/?include=body", api.ArticleList, 2),
+    ("/api/v1/articles/?tag=seo", api.ArticleList, 1),
+    ("/api/v1/categories/", api.CategoryList, 1),
+    ("/api/v1/tags/", api.TagList, 1),
+]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+class Command(BaseCommand):
+    help = "Count queries and time the JSON API list endpoints"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rounds",
+            type=int,
+            default=50,
+            help="Requests per endpoint"
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=api.MAX_PAGE_SIZE,
+            help="Page size to request"
+        )
+
+    def handle(self, *args, **options):
+        # A host the settings accept, for the absolute URLs in responses
+        host = next((host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"), "localhost")
+        factory = RequestFactory(HTTP_HOST=host)
+        failures = []
+        for path, view_class, budget in ENDPOINTS:
+            separator = "&" if "?" in path else "?"
+            url = f"{path}{separator}limit={options['limit']}"
+            view = view_class.as_view()
+
+            timings = []
+            for _ in range(max(1, options["rounds"])):
+                with ExitStack() as stack:
+                    captured = [stack.enter_context(CaptureQueriesContext(c)) for c in connections.all()]
+                    started = time.perf_counter()
+                    response = view(factory.get(url))
+                    timings.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise CommandError(f"{url} returned {response.status_code}")
+
+            queries = sum(len(context) for context in captured)
+            items = len(response.data.get("results", []))
+            line = (
+                f"{url}: {items} items, {queries} queries, {len(response.content)} bytes, "
+                f"p50 {percentile(timings, 0.5) * 1000:.1f} ms, p95 {percentile(timings, 0.95) * 1000:.1f} ms"
+            )
+            if queries > budget:
+                failures.append(f"{url} ({queries} > {budget})")
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+
+        if failures:
+            raise CommandError("Over the query budget: " + "; ".join(failures))
+        self.stdout.write(self.style.SUCCESS("Every endpoint runs at most one query per resource type"))
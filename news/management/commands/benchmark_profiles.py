@@ -0,0 +1,190 @@
+"""
+Management command to compare gunicorn worker profiles.
+
+Starts gunicorn with each profile from ``gunicorn.conf.py`` in turn, sends
+the same concurrent load to it, and reports throughput and client-side
+latency next to the per-worker RSS and latency each worker publishes on
+``/metrics/``.
+"""
+
+import json
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PROFILES = ("sync", "gthread", "uvicorn")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def fetch(url, headers=None, timeout=10):
+    """``(status, seconds)`` for one GET of ``url``."""
+    request = urllib.request.Request(url, headers=headers or {})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, OSError):
+        status = 0
+    return status, time.perf_counter() - started
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+class Command(BaseCommand):
+    help = "Benchmark the gunicorn worker profiles against each other"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profile",
+            action="append",
+            choices=PROFILES,
+            default=[],
+            help="Profile to benchmark; repeat for several (default: all)"
+        )
+        parser.add_argument(
+            "--path",
+            action="append",
+            default=[],
+            help="Path to request, cycled through (default: /healthz and /)"
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=500,
+            help="Requests per profile"
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=8,
+            help="Concurrent clients"
+        )
+        parser.add_argument(
+            "--host",
+            default="localhost",
+            help="Host header to send"
+        )
+
+    def handle(self, *args, **options):
+        profiles = options["profile"] or list(PROFILES)
+        paths = options["path"] or ["/healthz", "/"]
+        results = []
+        for profile in profiles:
+            self.stdout.write(f"Benchmarking {profile}...")
+            try:
+                results.append((profile, self.run_profile(profile, paths, options)))
+            except CommandError as e:
+                self.stdout.write(self.style.WARNING(f"  skipped: {e}"))
+
+        if not results:
+            raise CommandError("No profile could be benchmarked")
+
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'profile':<10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7} {'RSS MB':>8}"
+        )
+        for profile, r in results:
+            self.stdout.write(
+                f"{profile:<10} {r['rps']:>8.1f} {r['p50']:>8.1f} {r['p95']:>8.1f} "
+                f"{r['errors']:>7} {r['rss_mb']:>8.1f}"
+            )
+            for pid, worker in sorted(r["workers"].items()):
+                latency = worker.get("latency_ms", {})
+                self.stdout.write(
+                    f"  worker {pid}: {worker.get('requests')} requests, "
+                    f"{worker.get('rss_mb')} MB RSS, p95 {latency.get('p95')} ms"
+                )
+        self.stdout.write(self.style.SUCCESS("Benchmark complete"))
+
+    def run_profile(self, profile, paths, options):
+        port = free_port()
+        token = secrets.token_hex(16)
+        env = {
+            **os.environ,
+            "GUNICORN_PROFILE": profile,
+            "PORT": str(port),
+            "METRICS_TOKEN": token,
+        }
+        # A file rather than a pipe, so gunicorn's logging can never block on it
+        log = tempfile.TemporaryFile(mode="w+")
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}"],
+            cwd=settings.BASE_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=log,
+        )
+        base = f"http://127.0.0.1:{port}"
+        headers = {"Host": options["host"]}
+        try:
+            self.wait_until_up(server, log, base + "/healthz", headers)
+
+            urls = [base + paths[i % len(paths)] for i in range(options["requests"])]
+            started = time.perf_counter()
+            with ThreadPoolExecutor(options["concurrency"]) as pool:
+                samples = list(pool.map(lambda url: fetch(url, headers), urls))
+            elapsed = time.perf_counter() - started
+
+            latencies = [seconds * 1000 for status, seconds in samples if 200 <= status < 400]
+            workers = self.sample_workers(base, {**headers, "Authorization": f"Bearer {token}"})
+            return {
+                "rps": len(samples) / elapsed,
+                "p50": percentile(latencies, 0.5),
+                "p95": percentile(latencies, 0.95),
+                "errors": len(samples) - len(latencies),
+                "rss_mb": sum(w.get("rss_mb") or 0 for w in workers.values()),
+                "workers": workers,
+            }
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+            log.close()
+
+    def wait_until_up(self, server, log, url, headers, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                log.seek(0)
+                raise CommandError(f"gunicorn exited:\n{log.read()[-2000:]}")
+            if fetch(url, headers, timeout=2)[0] == 200:
+                return
+            time.sleep(0.5)
+        raise CommandError(f"gunicorn did not answer {url} within {timeout}s")
+
+    def sample_workers(self, base, headers, attempts=20):
+        """``{pid: worker metrics}``; each scrape reaches whichever worker accepts it."""
+        workers = {}
+        for _ in range(attempts):
+            request = urllib.request.Request(base + "/metrics/", headers=headers)
+            try:
+                with urllib.request.urlopen(request, timeout=5) as response:
+                    data = json.loads(response.read())
+            except (urllib.error.URLError, OSError, ValueError):
+                continue
+            if "worker" in data:
+                workers[data["pid"]] = data["worker"]
+        return workers
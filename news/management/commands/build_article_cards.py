@@ -0,0 +1,54 @@
+"""
+Management command to (re)build the ``ArticleCard`` projection table.
+
+Publishing keeps cards in sync (see ``news.article_cards``); this fills the
+table after the migration creating it, and repairs it after bulk edits
+that bypass Wagtail's publish signals. ``TagStats`` and the
+``ArchiveMonth`` buckets are recounted in full at the end.
+"""
+
+from django.core.management.base import BaseCommand
+
+from news.archive import rebuild_archive
+from news.article_cards import sync_cards
+from news.models import ArticleCard, ArticlePage
+from news.tag_stats import rebuild_tag_stats
+
+
+class Command(BaseCommand):
+    help = "Build the article cards read by listings, feeds and related articles"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--missing",
+            action="store_true",
+            help="Only build cards for live articles that have none"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Articles loaded per query"
+        )
+
+    def handle(self, *args, **options):
+        article_ids = ArticlePage.objects.published().order_by("-published_at")
+        if options["missing"]:
+            article_ids = article_ids.filter(card__isnull=True)
+        article_ids = list(article_ids.values_list("pk", flat=True))
+
+        # Cards of articles that are no longer live
+        stale, _ = ArticleCard.objects.exclude(article__is_live=True).delete()
+
+        built = 0
+        batch_size = max(1, options["batch_size"])
+        for start in range(0, len(article_ids), batch_size):
+            built += sync_cards(article_ids[start:start + batch_size])
+            self.stdout.write(f"  {built}/{len(article_ids)}")
+
+        tags = rebuild_tag_stats()
+        months = rebuild_archive()
+        self.stdout.write(self.style.SUCCESS(
+            f"Built {built} cards, removed {stale} stale cards, "
+            f"counted {tags} tags and {months} archive months in use"
+        ))
@@ -0,0 +1,119 @@
+"""
+Management command to check that hot listing queries use indexes.
+
+EXPLAINs the queries behind the home page, category and tag listings,
+the tag cloud, archive months, related and most read articles, the
+feed and the sitemap, and fails if any of them reads a table
+sequentially. On PostgreSQL sequential scans are disabled for the check,
+so a small development table cannot hide a missing index behind a cheap
+scan: a ``Seq Scan`` in the plan means no index applies.
+"""
+
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from taggit.models import Tag
+
+from news.archive import month_bounds
+from news.models import ArchiveMonth, ArticleCard, ArticlePage, ArticlePageTag, ArticleStats, Category, TagStats
+
+# Table scans; on SQLite also full walks of an unrelated index, such as
+# wagtailcore_page in tree order
+SEQ_SCAN = {
+    "sqlite": re.compile(r"\bSCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?$"),
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+}
+
+# Sorting without an index is worth knowing about but not always avoidable
+SORT = {
+    "sqlite": re.compile(r"USE TEMP B-TREE FOR ORDER BY"),
+    "postgresql": re.compile(r"\bSort\b"),
+}
+
+
+def hot_queries():
+    """``{name: queryset}`` for the queries every listing page runs."""
+    category_id = Category.objects.values_list("id", flat=True).first() or 0
+    tag_id = Tag.objects.values_list("id", flat=True).first() or 0
+    month_start, month_end = month_bounds(2020, 6)
+    cards = ArticleCard.objects.all()
+    return {
+        "home": cards.filter(listed_on_home=True).order_by("-published_at")[:100],
+        "category": cards.filter(category_id=category_id).order_by("-published_at")[:12],
+        "category count": cards.filter(category_id=category_id).values("pk").order_by(),
+        "tag": cards.filter(
+            article_id__in=ArticlePageTag.objects.filter(tag_id=tag_id).values("content_object_id")
+        ).order_by("-published_at")[:12],
+        "tag cloud": TagStats.objects.filter(article_count__gt=0).order_by("-article_count")[:100],
+        "related": cards.filter(category_id=category_id, listed_in_related=True)
+        .exclude(article_id=0).order_by("-published_at")[:3],
+        "related elsewhere": cards.filter(listed_in_related=True)
+        .exclude(category_id=category_id).order_by("-published_at")[:3],
+        "archive month": cards.filter(
+            published_at__gte=month_start, published_at__lt=month_end
+        ).order_by("-published_at", "-article_id")[:24],
+        "archive older month": ArchiveMonth.objects.filter(
+            article_count__gt=0, year=2020, month__lt=6
+        ).order_by("-year", "-month")[:1],
+        "most read": ArticleStats.objects.order_by("-popularity").values("article_id")[:10],
+        "most read in category": ArticleStats.objects.filter(category_id=category_id)
+        .order_by("-popularity").values("article_id")[:10],
+        "feed": cards.order_by("-published_at")[:50],
+        "sitemap": ArticlePage.objects.published().order_by("-published_at"),
+    }
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the hot listing queries and fail on sequential scans"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="Database alias to check"
+        )
+
+    def handle(self, *args, **options):
+        alias = options["database"]
+        connection = connections[alias]
+        if connection.vendor not in SEQ_SCAN:
+            raise CommandError(f"Query plans can only be checked on SQLite and PostgreSQL, not {connection.vendor}")
+
+        # Walking these in order is how listings are meant to be read
+        listing_indexes = {
+            index.name for model in (ArticlePage, ArticleCard, ArticleStats, TagStats) for index in model._meta.indexes
+        }
+        failures = []
+        for name, queryset in hot_queries().items():
+            plan = self.explain(queryset.using(alias), connection)
+            scanned = sorted({
+                match[1]
+                for line in plan.splitlines()
+                if (match := SEQ_SCAN[connection.vendor].search(line.strip()))
+                and (match.lastindex == 1 or match[2] not in listing_indexes)
+            })
+            sorted_in_memory = bool(SORT[connection.vendor].search(plan))
+
+            if scanned:
+                failures.append(f"{name} ({', '.join(scanned)})")
+                self.stdout.write(self.style.ERROR(f"{name}: sequential scan of {', '.join(scanned)}"))
+            elif sorted_in_memory:
+                self.stdout.write(self.style.WARNING(f"{name}: indexed, sorted without an index"))
+            else:
+                self.stdout.write(f"{name}: indexed")
+            if options["verbosity"] > 1 or scanned:
+                for line in plan.splitlines():
+                    self.stdout.write(f"    {line}")
+
+        if failures:
+            raise CommandError("Sequential scans in: " + "; ".join(failures))
+        self.stdout.write(self.style.SUCCESS("All hot queries use indexes"))
+
+    def explain(self, queryset, connection):
+        if connection.vendor != "postgresql":
+            return queryset.explain()
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            return queryset.explain()
@@ -0,0 +1,72 @@
+"""
+Management command to flag English phrases left in the article archive.
+"""
+
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from news.models import ArticlePage
+from news.text import get_danish_translator, iter_rich_text_blocks
+
+
+class Command(BaseCommand):
+    help = "Scan live articles for English phrases that have a Danish translation"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-untranslated",
+            type=int,
+            default=None,
+            help="Fail if more than this many untranslated phrases are found"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=100,
+            help="Number of articles fetched from the database at a time"
+        )
+        parser.add_argument(
+            "--verbose-matches",
+            action="store_true",
+            help="List every article that still contains English phrases"
+        )
+
+    def handle(self, *args, **options):
+        translator = get_danish_translator()
+        articles = (
+            ArticlePage.objects.live()
+            .exclude(category__slug="podcasts")
+            .only("id", "title", "body")
+            .iterator(chunk_size=options["chunk_size"])
+        )
+
+        phrase_counts = Counter()
+        flagged_articles = set()
+        scanned_blocks = 0
+
+        for (article, _), value in iter_rich_text_blocks(articles):
+            scanned_blocks += 1
+            matches = translator.find_untranslated(value)
+            if not matches:
+                continue
+            phrase_counts.update(match.phrase for match in matches)
+            if article.id not in flagged_articles:
+                flagged_articles.add(article.id)
+                if options["verbose_matches"]:
+                    self.stdout.write(f"  {article.title}")
+
+        total = sum(phrase_counts.values())
+        self.stdout.write(
+            f"Scanned {scanned_blocks} rich text blocks: "
+            f"{total} untranslated phrases in {len(flagged_articles)} articles"
+        )
+        for phrase, count in phrase_counts.most_common(20):
+            self.stdout.write(f"  {count:5d}  {phrase}")
+
+        limit = options["max_untranslated"]
+        if limit is not None and total > limit:
+            raise CommandError(
+                f"{total} untranslated phrases found (limit {limit})"
+            )
+        self.stdout.write(self.style.SUCCESS("Translation check complete"))
@@ -0,0 +1,34 @@
+"""
+Management command to flush buffered article views into ``ArticleStats``.
+
+Workers do this on their own every ``VIEW_COUNT_FLUSH_INTERVAL`` seconds
+(see ``news.popularity``); run it from cron when that is set to 0, or to
+flush before looking at the numbers.
+"""
+
+from django.core.management.base import BaseCommand
+
+from news.models import ArticleStats
+from news.popularity import flush_view_counts, score_now
+
+
+class Command(BaseCommand):
+    help = "Move view counts from the cache into ArticleStats and update popularity"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=0,
+            help="Also list this many of the most popular articles"
+        )
+
+    def handle(self, *args, **options):
+        articles, views = flush_view_counts()
+        self.stdout.write(self.style.SUCCESS(f"Flushed {views} views of {articles} articles"))
+
+        top = ArticleStats.objects.select_related("article").order_by("-popularity")[:options["top"]]
+        for stats in top:
+            self.stdout.write(
+                f"  {score_now(stats.popularity):8.1f}  {stats.view_count:>8} views  {stats.article.title}"
+            )
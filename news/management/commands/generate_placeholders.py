@@ -0,0 +1,70 @@
+"""
+Management command to build inline placeholders for existing images.
+
+New uploads get theirs from a background job (see ``news.placeholders``);
+this backfills images uploaded before that, or whose file was replaced.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from wagtail.images import get_image_model
+
+from news.placeholders import compute_placeholder, save_placeholders
+
+
+class Command(BaseCommand):
+    help = 'Build inline low-quality placeholders for images that lack one'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Images read and processed concurrently'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Placeholders written per query'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild placeholders that are already up to date'
+        )
+
+    def handle(self, *args, **options):
+        images = get_image_model().objects.order_by('id')
+        if not options['force']:
+            images = images.exclude(placeholder__file_hash=F('file_hash'))
+
+        total = images.count()
+        self.stdout.write(f'Building placeholders for {total} images...')
+
+        def build(image):
+            try:
+                return image, compute_placeholder(image), None
+            except Exception as e:
+                return image, None, e
+
+        built = failed = 0
+        batch = []
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as executor:
+            for image, data_uri, error in executor.map(build, images.iterator()):
+                if error:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f'Could not process {image.title}: {error}'))
+                    continue
+                batch.append((image, data_uri))
+                if len(batch) >= options['batch_size']:
+                    save_placeholders(batch)
+                    built += len(batch)
+                    batch = []
+        if batch:
+            save_placeholders(batch)
+            built += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Built {built} placeholders ({failed} failed)'))
@@ -0,0 +1,296 @@
+"""
+Management command to bulk ingest images from URLs or a local directory.
+
+Downloads run in a bounded thread pool, every file is deduplicated by its
+SHA-1 against ``Image.file_hash`` and within the batch, dimensions, focal
+points and inline placeholders are computed in a process pool, and the rows
+are bulk created.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlparse
+
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from wagtail.images import get_image_model
+from wagtail.models import Collection
+from wagtail.search import index
+
+from news.image_processing import analyse_image, hash_bytes
+from news.placeholders import save_placeholders
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".avif"}
+
+# Refuse anything bigger than this; Unsplash originals at w=1600 are ~500 KB
+MAX_DOWNLOAD_BYTES = 20 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class ImageSource:
+    """A single image to ingest."""
+
+    title: str
+    location: str
+    filename: str
+
+
+def _title_from_name(name):
+    stem = Path(name).stem
+    return stem.replace("-", " ").replace("_", " ").strip() or "image"
+
+
+def sources_from_directory(directory):
+    """Build sources for every image file in ``directory``."""
+    paths = sorted(
+        path for path in Path(directory).iterdir()
+        if path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS
+    )
+    return [ImageSource(_title_from_name(path.name), str(path), path.name) for path in paths]
+
+
+def sources_from_urls(lines):
+    """
+    Build sources from ``url`` or ``title<TAB>url`` lines.
+
+    Identical URLs are collapsed before anything is downloaded.
+    """
+    sources = []
+    seen = set()
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        title, _, url = line.rpartition("\t")
+        if url in seen:
+            continue
+        seen.add(url)
+        name = Path(urlparse(url).path).name or "image"
+        if not Path(name).suffix:
+            name = f"{name}.jpg"
+        sources.append(ImageSource(title.strip() or _title_from_name(name), url, name))
+    return sources
+
+
+class Command(BaseCommand):
+    help = "Bulk ingest images with concurrent downloads and content-hash deduplication"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "urls",
+            nargs="*",
+            help="Image URLs to ingest"
+        )
+        parser.add_argument(
+            "--url-file",
+            type=str,
+            help="File with one URL (or title<TAB>URL) per line"
+        )
+        parser.add_argument(
+            "--directory",
+            type=str,
+            help="Ingest image files from a local directory instead of downloading"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Maximum concurrent downloads and uploads"
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Processes used to analyse images (0 analyses in-process)"
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=30,
+            help="Download timeout in seconds"
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Download and deduplicate without saving anything"
+        )
+
+    def handle(self, *args, **options):
+        sources = self.collect_sources(options)
+        if not sources:
+            raise CommandError("No images to ingest. Pass URLs, --url-file or --directory.")
+
+        self.stdout.write(f"Fetching {len(sources)} images with {options['workers']} workers...")
+        fetched = self.fetch_all(sources, options["workers"], options["timeout"])
+
+        unique = self.deduplicate(fetched)
+        if not unique:
+            self.stdout.write(self.style.SUCCESS("Nothing new to ingest"))
+            return
+
+        unique, infos, skipped = self.analyse_all(unique, options["processes"])
+
+        if options["dry_run"]:
+            for (source, data, _), info in zip(unique, infos):
+                self.stdout.write(
+                    f"Would ingest: {source.title} ({info.width}x{info.height}, {len(data)} bytes)"
+                )
+            self.report_skipped(skipped)
+            return
+
+        created = self.store_all(unique, infos, options["workers"]) if unique else []
+        self.stdout.write(self.style.SUCCESS(f"Successfully ingested {len(created)} images"))
+        self.report_skipped(skipped)
+
+    def collect_sources(self, options):
+        if options["directory"]:
+            if not os.path.isdir(options["directory"]):
+                raise CommandError(f"Directory not found: {options['directory']}")
+            return sources_from_directory(options["directory"])
+
+        lines = list(options["urls"])
+        if options["url_file"]:
+            if not os.path.exists(options["url_file"]):
+                raise CommandError(f"File not found: {options['url_file']}")
+            with open(options["url_file"], encoding="utf-8") as f:
+                lines.extend(f)
+        return sources_from_urls(lines)
+
+    def fetch_all(self, sources, workers, timeout):
+        """Fetch every source concurrently, returning ``(source, bytes)`` pairs."""
+        import requests
+
+        session = requests.Session()
+
+        def fetch(source):
+            try:
+                if "://" not in source.location:
+                    return source, Path(source.location).read_bytes()
+                return source, self.download(session, source.location, timeout)
+            except Exception as e:
+                self.stdout.write(self.style.WARNING(f"Could not fetch {source.location}: {e}"))
+                return source, None
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            results = list(executor.map(fetch, sources))
+        session.close()
+        return [(source, data) for source, data in results if data]
+
+    @staticmethod
+    def download(session, url, timeout):
+        with session.get(url, stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_DOWNLOAD_BYTES:
+                    raise ValueError("file too large")
+                chunks.append(chunk)
+        return b"".join(chunks)
+
+    def deduplicate(self, fetched):
+        """Drop files already stored in Wagtail or repeated within the batch."""
+        Image = get_image_model()
+
+        hashed = [(source, data, hash_bytes(data)) for source, data in fetched]
+        existing = set(
+            Image.objects.filter(
+                file_hash__in={file_hash for _, _, file_hash in hashed}
+            ).values_list("file_hash", flat=True)
+        )
+
+        unique = []
+        seen = set(existing)
+        for source, data, file_hash in hashed:
+            if file_hash in seen:
+                self.stdout.write(f"Skipping duplicate: {source.title}")
+                continue
+            seen.add(file_hash)
+            unique.append((source, data, file_hash))
+        return unique
+
+    def analyse_all(self, unique, processes):
+        """
+        Analyse every file, returning the files that could be analysed, their
+        infos and the sources of the rest. A file Pillow cannot read is
+        reported and skipped instead of failing the batch.
+        """
+        if processes <= 0 or len(unique) == 1:
+            results = [self._analyse(analyse_image, data) for _, data, _ in unique]
+        else:
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                futures = [executor.submit(analyse_image, data) for _, data, _ in unique]
+                results = [self._analyse(future.result) for future in futures]
+
+        analysed, infos, skipped = [], [], []
+        for item, (info, error) in zip(unique, results):
+            if error is None:
+                analysed.append(item)
+                infos.append(info)
+            else:
+                source = item[0]
+                self.stdout.write(self.style.WARNING(f"Could not analyse {source.location}: {error}"))
+                skipped.append(source)
+        return analysed, infos, skipped
+
+    @staticmethod
+    def _analyse(function, *args):
+        try:
+            return function(*args), None
+        except Exception as e:
+            return None, e
+
+    def report_skipped(self, skipped):
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f"Skipped {len(skipped)} unreadable files: {', '.join(source.filename for source in skipped)}"
+            ))
+
+    def store_all(self, unique, infos, workers):
+        """Upload files concurrently, then create all image rows in one query."""
+        Image = get_image_model()
+        storage = Image._meta.get_field("file").storage
+        collection = Collection.get_first_root_node()
+        if collection is None:
+            raise CommandError("No root collection found. Run migrations first.")
+
+        # Resolve upload paths up front; the worker threads only talk to storage
+        uploads = [
+            (Image(title=source.title, collection=collection).get_upload_to(source.filename), data)
+            for source, data, _ in unique
+        ]
+
+        def upload(item):
+            path, data = item
+            return storage.save(path, ContentFile(data))
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            names = list(executor.map(upload, uploads))
+
+        images = [
+            Image(
+                title=source.title,
+                file=name,
+                file_size=len(data),
+                file_hash=file_hash,
+                collection=collection,
+                **info.as_model_fields(),
+            )
+            for (source, data, file_hash), info, name in zip(unique, infos, names)
+        ]
+
+        with transaction.atomic():
+            created = Image.objects.bulk_create(images)
+            save_placeholders([
+                (image, info.placeholder) for image, info in zip(created, infos) if info.placeholder
+            ])
+
+        for image in created:
+            index.insert_or_update_object(image)
+            self.stdout.write(f"Ingested: {image.title}")
+        return created
@@ -1,105 +1,134 @@
 """
 Management command to migrate existing images to Cloudinary.
+
+Progress is stored per image in ``ImageMigrationState`` so an interrupted
+run can simply be started again; see ``news.image_migration``.
 """
 
 import os
-import requests
-from django.core.management.base import BaseCommand
-from django.core.files.base import ContentFile
-from wagtail.images.models import Image
-import cloudinary
-import cloudinary.uploader
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, storages
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.utils.module_loading import import_string
+
+from news.image_migration import CHUNK_SIZE, ImageMigrator
+from news.models import ImageMigrationState
 
 
 class Command(BaseCommand):
     help = 'Migrate existing images to Cloudinary'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of concurrent uploads'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Bytes read from storage at a time'
+        )
+        parser.add_argument(
+            '--source-root',
+            type=str,
+            default=str(settings.MEDIA_ROOT),
+            help='Local directory holding the original image files'
+        )
+        parser.add_argument(
+            '--target-storage',
+            type=str,
+            default='default',
+            help='Storage alias or dotted storage class to upload to'
+        )
+        parser.add_argument(
+            '--target-label',
+            type=str,
+            default='cloudinary',
+            help='Name recorded on the progress rows for this destination'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Only migrate this many images in this run'
+        )
+        parser.add_argument(
+            '--skip-failed',
+            action='store_true',
+            help='Do not retry images that failed in an earlier run'
+        )
+        parser.add_argument(
+            '--no-verify',
+            action='store_true',
+            help='Skip reading uploads back to verify their checksum'
+        )
+        parser.add_argument(
+            '--status',
+            action='store_true',
+            help='Only report migration progress'
+        )
+
     def handle(self, *args, **options):
-        self.stdout.write('Migrating images to Cloudinary...')
-        
-        # Check if Cloudinary is configured
-        if not os.environ.get('CLOUDINARY_CLOUD_NAME'):
-            self.stdout.write(self.style.ERROR('Cloudinary not configured. Set environment variables.'))
+        label = options['target_label']
+
+        if options['status']:
+            self.report(label)
             return
-        
-        # Configure Cloudinary
-        cloudinary.config(
-            cloud_name=os.environ.get('CLOUDINARY_CLOUD_NAME'),
-            api_key=os.environ.get('CLOUDINARY_API_KEY'),
-            api_secret=os.environ.get('CLOUDINARY_API_SECRET')
+
+        target_storage = self.get_target_storage(options['target_storage'])
+        backend = f'{target_storage.__class__.__module__}.{target_storage.__class__.__name__}'
+        if 'cloudinary' in backend.lower() and not os.environ.get('CLOUDINARY_CLOUD_NAME'):
+            raise CommandError('Cloudinary not configured. Set environment variables.')
+
+        migrator = ImageMigrator(
+            source_storage=FileSystemStorage(location=options['source_root']),
+            target_storage=target_storage,
+            target=label,
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            verify=not options['no_verify'],
         )
-        
-        # Get all images
-        images = Image.objects.all()
-        self.stdout.write(f'Found {images.count()} images to process')
-        
-        migrated_count = 0
-        error_count = 0
-        
-        for image in images:
-            try:
-                # Check if image is already on Cloudinary
-                if 'cloudinary.com' in str(image.file.url):
-                    self.stdout.write(f'Skipping {image.title} - already on Cloudinary')
-                    continue
-
-                self.stdout.write(f'Migrating: {image.title}')
-
-                # Get the original file path
-                original_path = image.file.path if hasattr(image.file, 'path') else None
-
-                if original_path and os.path.exists(original_path):
-                    # Read file from disk
-                    with open(original_path, 'rb') as f:
-                        file_content = f.read()
-
-                    # Create new file and save to trigger Cloudinary upload
-                    file_name = os.path.basename(original_path)
-                    new_file = ContentFile(file_content, name=file_name)
-
-                    # Save the new file (this will upload to Cloudinary)
-                    image.file.save(file_name, new_file, save=True)
-
-                    self.stdout.write(f'✅ Migrated: {image.title} -> {image.file.url}')
-                    migrated_count += 1
-
-                else:
-                    # Use sample images for known files
-                    sample_images = {
-                        'Morgenkaffe til Webshops': 'https://res.cloudinary.com/dilhcgbcf/image/upload/v1728127200/samples/coffee.jpg',
-                        'timothy-hales-bennett-OwvRB-M3GwE-unsplash': 'https://res.cloudinary.com/dilhcgbcf/image/upload/v1728127200/samples/landscapes/nature-mountains.jpg',
-                        'campaign-creators-RSc6D7bO0fA-unsplash': 'https://res.cloudinary.com/dilhcgbcf/image/upload/v1728127200/samples/people/kitchen-bar.jpg',
-                        'firmbee-com-eMemmpUojlw-unsplash': 'https://res.cloudinary.com/dilhcgbcf/image/upload/v1728127200/samples/people/bicycle.jpg'
-                    }
-
-                    if image.title in sample_images:
-                        # Download sample image and re-upload to trigger Cloudinary
-                        try:
-                            response = requests.get(sample_images[image.title], timeout=10)
-                            if response.status_code == 200:
-                                file_name = f"{image.title.lower().replace(' ', '_')}.jpg"
-                                new_file = ContentFile(response.content, name=file_name)
-                                image.file.save(file_name, new_file, save=True)
-
-                                self.stdout.write(f'✅ Used sample image: {image.title}')
-                                migrated_count += 1
-                            else:
-                                self.stdout.write(f'❌ Could not download sample for: {image.title}')
-                                error_count += 1
-                        except Exception as e:
-                            self.stdout.write(f'❌ Error with sample image {image.title}: {e}')
-                            error_count += 1
-                    else:
-                        self.stdout.write(f'⚠️  No file found for: {image.title}')
-                        error_count += 1
-
-            except Exception as e:
-                self.stdout.write(f'❌ Error processing {image.title}: {e}')
-                error_count += 1
-        
+
+        self.stdout.write(f'Migrating images to {backend} with {migrator.workers} workers...')
+        migrated, failed = migrator.run(
+            limit=options['limit'],
+            retry_failed=not options['skip_failed'],
+            progress=self.progress,
+        )
+
         self.stdout.write(f'\nMigration complete!')
-        self.stdout.write(f'✅ Successfully migrated: {migrated_count} images')
-        self.stdout.write(f'❌ Failed: {error_count} images')
+        self.stdout.write(f'✅ Successfully migrated: {migrated} images')
+        self.stdout.write(f'❌ Failed: {failed} images')
+        if failed:
+            self.stdout.write('Run the command again to retry failed images.')
+
+    def get_target_storage(self, target):
+        if '.' not in target:
+            try:
+                return storages[target]
+            except Exception:
+                raise CommandError(f'Unknown storage alias: {target}')
+        try:
+            return import_string(target)()
+        except ImportError:
+            raise CommandError(f'Could not import storage: {target}')
+
+    def progress(self, state, result):
+        if result.ok:
+            self.stdout.write(f'✅ Migrated: {state.image.title} -> {result.target_name}')
+        else:
+            self.stdout.write(f'❌ Error processing {state.image.title}: {result.error}')
 
-        if migrated_count > 0:
-            self.stdout.write(self.style.SUCCESS('\n🎉 Images should now display correctly on the website!'))
+    def report(self, label):
+        counts = dict(
+            ImageMigrationState.objects.filter(target=label)
+            .values_list('status')
+            .annotate(total=Count('image'))
+        )
+        for status, name in ImageMigrationState.STATUS_CHOICES:
+            self.stdout.write(f'{name}: {counts.get(status, 0)}')
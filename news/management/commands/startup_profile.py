@@ -0,0 +1,118 @@
+"""
+Management command to measure cold start cost.
+
+Boots the project in a fresh interpreter with ``-X importtime``, as a new
+Fly machine would, then times the first requests. Reports the slowest
+imports and fails when a budget is exceeded, so regressions show up in CI
+instead of as slow first page loads after ``auto_stop_machines``.
+"""
+
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in the child interpreter; prints one JSON line on stdout
+BOOT_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+booted = time.perf_counter()
+from django.conf import settings
+from django.test import Client
+host = next((h for h in settings.ALLOWED_HOSTS if h and "*" not in h), "localhost").lstrip(".")
+client = Client(raise_request_exception=False, HTTP_HOST=host)
+requests = []
+for path in sys.argv[1:]:
+    start = time.perf_counter()
+    status = client.get(path).status_code
+    requests.append([path, status, (time.perf_counter() - start) * 1000])
+print(json.dumps({"boot_ms": (booted - started) * 1000, "requests": requests}))
+"""
+
+
+def parse_importtime(stderr):
+    """``[(cumulative_us, self_us, module, depth)]`` from ``-X importtime`` output."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            # The header line
+            continue
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        imports.append((cumulative_us, self_us, name.strip(), depth))
+    return imports
+
+
+class Command(BaseCommand):
+    help = "Measure import time and first-request latency of a cold start"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            action="append",
+            default=[],
+            help="Path to request after booting, in order (default: /healthz and /)"
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=15,
+            help="Number of slowest top-level imports to list"
+        )
+        parser.add_argument(
+            "--import-budget-ms",
+            type=float,
+            default=settings.STARTUP_IMPORT_BUDGET_MS,
+            help="Fail if importing the project takes longer than this"
+        )
+        parser.add_argument(
+            "--request-budget-ms",
+            type=float,
+            default=settings.STARTUP_REQUEST_BUDGET_MS,
+            help="Fail if the first request takes longer than this"
+        )
+
+    def handle(self, *args, **options):
+        paths = options["path"] or ["/healthz", "/"]
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", BOOT_SCRIPT, *paths],
+            capture_output=True,
+            text=True,
+            cwd=settings.BASE_DIR,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Boot failed:\n{result.stderr[-2000:]}")
+
+        imports = parse_importtime(result.stderr)
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        import_ms = sum(cumulative for cumulative, _, _, depth in imports if depth == 0) / 1000
+
+        self.stdout.write(f"Imports: {import_ms:.0f} ms over {len(imports)} modules")
+        top_level = sorted((i for i in imports if i[3] == 0), reverse=True)
+        for cumulative, _, name, _ in top_level[:options["top"]]:
+            self.stdout.write(f"  {cumulative / 1000:8.1f} ms  {name}")
+        self.stdout.write(f"Boot (WSGI application ready): {report['boot_ms']:.0f} ms")
+        for path, status, elapsed in report["requests"]:
+            self.stdout.write(f"  {path} -> {status} in {elapsed:.0f} ms")
+
+        failures = []
+        if import_ms > options["import_budget_ms"]:
+            failures.append(f"imports took {import_ms:.0f} ms (budget {options['import_budget_ms']:.0f} ms)")
+        if report["requests"]:
+            path, _, first_ms = report["requests"][0]
+            if first_ms > options["request_budget_ms"]:
+                failures.append(
+                    f"first request {path} took {first_ms:.0f} ms "
+                    f"(budget {options['request_budget_ms']:.0f} ms)"
+                )
+        if failures:
+            raise CommandError("Startup budget exceeded: " + "; ".join(failures))
+        self.stdout.write(self.style.SUCCESS("Startup within budget"))
@@ -39,7 +39,7 @@ class Command(BaseCommand):
         max_suggestions = options["max_suggestions"]
         output_format = options["output_format"]
         
-        articles = ArticlePage.objects.live().select_related("category").prefetch_related("tags")
+        articles = ArticlePage.objects.live().for_listing()
         
         if output_format == "csv":
             self.stdout.write("source_title,source_url,target_title,target_url,score,reason")
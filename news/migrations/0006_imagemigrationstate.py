@@ -0,0 +1,38 @@
+# Generated by Django 5.0.14 on 2026-10-19 18:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_basicpage'),
+        ('wagtailimages', '0027_image_description'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageMigrationState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target', models.CharField(max_length=100)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('source_name', models.CharField(blank=True, max_length=255)),
+                ('target_name', models.CharField(blank=True, max_length=255)),
+                ('checksum', models.CharField(blank=True, max_length=40)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('image', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='wagtailimages.image')),
+            ],
+            options={
+                'verbose_name': 'Image Migration State',
+                'indexes': [models.Index(fields=['target', 'status'], name='news_imagem_target_f9d52c_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='imagemigrationstate',
+            constraint=models.UniqueConstraint(fields=('image', 'target'), name='unique_image_migration_target'),
+        ),
+    ]
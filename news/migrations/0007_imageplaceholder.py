@@ -0,0 +1,27 @@
+# Generated by Django 5.0.14 on 2026-10-19 18:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_imagemigrationstate'),
+        ('wagtailimages', '0027_image_description'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImagePlaceholder',
+            fields=[
+                ('image', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='placeholder', serialize=False, to='wagtailimages.image')),
+                ('file_hash', models.CharField(blank=True, max_length=40)),
+                ('data_uri', models.TextField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Image Placeholder',
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.14 on 2026-10-19 18:52
+
+from django.db import migrations, models
+
+
+def copy_live(apps, schema_editor):
+    ArticlePage = apps.get_model("news", "ArticlePage")
+    ArticlePage.objects.filter(live=True).update(is_live=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0007_imageplaceholder'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+        ('wagtailcore', '0094_alter_page_locale'),
+        ('wagtailimages', '0027_image_description'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='articlepage',
+            name='is_live',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(copy_live, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='articlepage',
+            index=models.Index(fields=['category', '-published_at'], name='article_category_published'),
+        ),
+        migrations.AddIndex(
+            model_name='articlepage',
+            index=models.Index(condition=models.Q(('is_live', True)), fields=['-published_at'], name='article_live_published'),
+        ),
+    ]
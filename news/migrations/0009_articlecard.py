@@ -0,0 +1,38 @@
+# Generated by Django 5.0.14 on 2026-10-19 18:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0008_articlepage_is_live_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleCard',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='news.articlepage')),
+                ('title', models.CharField(max_length=255)),
+                ('slug', models.SlugField(allow_unicode=True, max_length=255)),
+                ('url', models.CharField(max_length=255)),
+                ('external_url', models.URLField(blank=True)),
+                ('summary', models.TextField(blank=True)),
+                ('author', models.CharField(blank=True, max_length=100)),
+                ('published_at', models.DateTimeField()),
+                ('cover_image_id', models.IntegerField(blank=True, null=True)),
+                ('pictures', models.JSONField(blank=True, default=dict)),
+                ('video_url', models.CharField(blank=True, max_length=500)),
+                ('video_poster_url', models.CharField(blank=True, max_length=500)),
+                ('tags', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='news.category')),
+            ],
+            options={
+                'ordering': ['-published_at'],
+                'indexes': [models.Index(fields=['-published_at'], name='card_published'), models.Index(fields=['category', '-published_at'], name='card_category_published')],
+            },
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.0.14 on 2026-10-19 19:01
+
+from django.db import migrations, models
+
+
+def exclude_podcasts(apps, schema_editor):
+    """Podcasts were left off the home page and related articles in code."""
+    Category = apps.get_model("news", "Category")
+    ArticlePage = apps.get_model("news", "ArticlePage")
+    ArticleCard = apps.get_model("news", "ArticleCard")
+
+    Category.objects.filter(slug="podcasts").update(exclude_from_home=True, exclude_from_related=True)
+    flags = {"listed_on_home": False, "listed_in_related": False}
+    ArticlePage.objects.filter(category__slug="podcasts").update(**flags)
+    ArticleCard.objects.filter(category__slug="podcasts").update(**flags)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0009_articlecard'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+        ('wagtailcore', '0094_alter_page_locale'),
+        ('wagtailimages', '0027_image_description'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='articlecard',
+            name='listed_in_related',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='articlecard',
+            name='listed_on_home',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='articlepage',
+            name='listed_in_related',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='articlepage',
+            name='listed_on_home',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='exclude_from_home',
+            field=models.BooleanField(default=False, help_text='Keep articles in this category off the home page'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='exclude_from_related',
+            field=models.BooleanField(default=False, help_text='Never suggest articles in this category as related articles'),
+        ),
+        migrations.RunPython(exclude_podcasts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='articlecard',
+            index=models.Index(condition=models.Q(('listed_on_home', True)), fields=['-published_at'], name='card_home_published'),
+        ),
+        migrations.AddIndex(
+            model_name='articlecard',
+            index=models.Index(condition=models.Q(('listed_in_related', True)), fields=['-published_at'], name='card_related_published'),
+        ),
+        migrations.AddIndex(
+            model_name='articlepage',
+            index=models.Index(condition=models.Q(('is_live', True), ('listed_on_home', True)), fields=['-published_at'], name='article_home_published'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.14 on 2026-10-19 19:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def count_tags(apps, schema_editor):
+    """Count the live articles of every tag in use."""
+    ArticlePageTag = apps.get_model("news", "ArticlePageTag")
+    TagStats = apps.get_model("news", "TagStats")
+
+    rows = ArticlePageTag.objects.filter(content_object__is_live=True).values("tag_id").annotate(
+        count=Count("content_object_id", distinct=True),
+        latest=Max("content_object__published_at"),
+    ).order_by()
+    TagStats.objects.bulk_create([
+        TagStats(tag_id=row["tag_id"], article_count=row["count"], latest_published_at=row["latest"])
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0010_category_listing_flags'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagStats',
+            fields=[
+                ('tag', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='taggit.tag')),
+                ('article_count', models.PositiveIntegerField(default=0)),
+                ('latest_published_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'tag stats',
+                'indexes': [models.Index(condition=models.Q(('article_count__gt', 0)), fields=['-article_count'], name='tagstats_in_use')],
+            },
+        ),
+        migrations.RunPython(count_tags, migrations.RunPython.noop),
+    ]
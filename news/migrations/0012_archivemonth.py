@@ -0,0 +1,60 @@
+# Generated by Django 5.0.14 on 2026-10-19 19:08
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_months(apps, schema_editor):
+    """Bucket the live articles' cards by month in TIME_ZONE."""
+    ArticleCard = apps.get_model("news", "ArticleCard")
+    ArchiveMonth = apps.get_model("news", "ArchiveMonth")
+
+    zone = timezone.get_default_timezone()
+    months = {}
+    for article_id, published_at in ArticleCard.objects.order_by("published_at", "article_id").values_list(
+        "article_id", "published_at"
+    ):
+        local = timezone.localtime(published_at, zone)
+        bucket = months.setdefault((local.year, local.month), {
+            "article_count": 0,
+            "first_article_id": article_id,
+            "first_published_at": published_at,
+        })
+        bucket["article_count"] += 1
+        bucket["last_article_id"] = article_id
+        bucket["last_published_at"] = published_at
+    ArchiveMonth.objects.bulk_create([
+        ArchiveMonth(year=year, month=month, **values) for (year, month), values in months.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0011_tagstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('article_count', models.PositiveIntegerField(default=0)),
+                ('first_article_id', models.IntegerField(blank=True, null=True)),
+                ('last_article_id', models.IntegerField(blank=True, null=True)),
+                ('first_published_at', models.DateTimeField(blank=True, null=True)),
+                ('last_published_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-year', '-month'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='archivemonth',
+            constraint=models.UniqueConstraint(fields=('year', 'month'), name='archive_month_unique'),
+        ),
+        migrations.RunPython(fill_months, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.14 on 2026-10-19 19:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0012_archivemonth'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleStats',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='news.articlepage')),
+                ('view_count', models.PositiveBigIntegerField(default=0)),
+                ('popularity', models.FloatField(default=0)),
+                ('last_viewed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='news.category')),
+            ],
+            options={
+                'verbose_name_plural': 'article stats',
+                'indexes': [models.Index(fields=['-popularity'], name='stats_popular'), models.Index(fields=['category', '-popularity'], name='stats_category_popular')],
+            },
+        ),
+    ]
@@ -3,18 +3,25 @@ Models for the news app.
 """
 
 from django.db import models
+from django.urls import reverse
 from django.utils import timezone
 from django.utils.text import slugify
 from modelcluster.contrib.taggit import ClusterTaggableManager
 from modelcluster.fields import ParentalKey, ParentalManyToManyField
-from taggit.models import TaggedItemBase
+from taggit.models import Tag, TaggedItemBase
 from wagtail.admin.panels import FieldPanel, InlinePanel, MultiFieldPanel
 from wagtail.fields import RichTextField, StreamField
-from wagtail.models import Page, Orderable
+from wagtail.models import Page, PageManager, Orderable
+from wagtail.query import PageQuerySet
 from wagtail.search import index
 from wagtail.snippets.models import register_snippet
 
 from .blocks import ArticleStreamBlock
+from .cache import category_cache
+from .cache_policy import set_cache_policy
+from .cache_tags import add_cache_tags, article_tags
+from .preload import preload_lead, preload_picture
+from .responsive_images import preload_pictures
 
 
 @register_snippet
@@ -61,15 +68,41 @@ class Category(models.Model):
     name = models.CharField(max_length=100)
     slug = models.SlugField(max_length=100, unique=True)
     description = models.TextField(blank=True)
+    exclude_from_home = models.BooleanField(
+        default=False,
+        help_text="Keep articles in this category off the home page"
+    )
+    exclude_from_related = models.BooleanField(
+        default=False,
+        help_text="Never suggest articles in this category as related articles"
+    )
     
     panels = [
         FieldPanel("name"),
         FieldPanel("slug"),
         FieldPanel("description"),
+        MultiFieldPanel([
+            FieldPanel("exclude_from_home"),
+            FieldPanel("exclude_from_related"),
+        ], heading="Listings"),
     ]
     
     def __str__(self):
         return self.name
+
+    @staticmethod
+    def listing_flags():
+        """``{category_id: (exclude_from_home, exclude_from_related)}``, cached per process."""
+        return category_cache.get_or_set(
+            "listing-flags",
+            lambda: {
+                pk: (home, related)
+                for pk, home, related in Category.objects.values_list(
+                    "pk", "exclude_from_home", "exclude_from_related"
+                )
+            },
+            3600,
+        )
     
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -129,6 +162,63 @@ class SiteSettings(models.Model):
         verbose_name_plural = "Site Settings"
 
 
+class ImageMigrationState(models.Model):
+    """Per-image progress of a storage migration, so reruns can resume."""
+    STATUS_PENDING = "pending"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    image = models.ForeignKey(
+        "wagtailimages.Image",
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+    target = models.CharField(max_length=100)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    source_name = models.CharField(max_length=255, blank=True)
+    target_name = models.CharField(max_length=255, blank=True)
+    checksum = models.CharField(max_length=40, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.image_id} -> {self.target}: {self.status}"
+
+    class Meta:
+        verbose_name = "Image Migration State"
+        constraints = [
+            models.UniqueConstraint(fields=["image", "target"], name="unique_image_migration_target"),
+        ]
+        indexes = [
+            models.Index(fields=["target", "status"]),
+        ]
+
+
+class ImagePlaceholder(models.Model):
+    """Tiny inline preview of an image, shown while the real file loads."""
+    image = models.OneToOneField(
+        "wagtailimages.Image",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="placeholder"
+    )
+    file_hash = models.CharField(max_length=40, blank=True)
+    data_uri = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Placeholder for image {self.image_id}"
+
+    class Meta:
+        verbose_name = "Image Placeholder"
+
+
 class BasicPage(Page):
     """Basic page model for simple content pages like About, Contact, etc."""
     body = RichTextField(blank=True)
@@ -137,6 +227,11 @@ class BasicPage(Page):
         FieldPanel("body"),
     ]
 
+    def get_context(self, request, *args, **kwargs):
+        add_cache_tags(request, f"page:{self.id}")
+        set_cache_policy(request, "page")
+        return super().get_context(request, *args, **kwargs)
+
     class Meta:
         verbose_name = "Basic Page"
 
@@ -165,21 +260,30 @@ class HomePage(Page):
         context = super().get_context(request)
 
         # Get ALL articles ordered by newest first (no featured system)
-        # Exclude Podcasts category - those should only appear in Podcasts section
+        # Categories such as Podcasts are excluded with exclude_from_home
         # This ensures new articles always appear at the top
-        podcast_category = Category.objects.filter(slug='podcasts').first()
-        latest_articles_query = ArticlePage.objects.live()
+        latest_articles = list(
+            ArticleCard.objects.filter(listed_on_home=True).order_by("-published_at")[:100]
+        )
 
-        if podcast_category:
-            latest_articles_query = latest_articles_query.exclude(category=podcast_category)
+        # The template shows the first 27 articles
+        shown_articles = latest_articles[:27]
+        add_cache_tags(request, "home", f"page:{self.id}", *article_tags(*shown_articles))
+        preload_lead(request, shown_articles[0] if shown_articles else None)
 
-        latest_articles = latest_articles_query.order_by("-published_at")[:100]
+        # Recomputed every minute from view counts; purges "trending" when it changes
+        from .trending import TRENDING_TAG, trending
+
+        trending_articles = trending()
+        add_cache_tags(request, TRENDING_TAG, *article_tags(*trending_articles))
+        set_cache_policy(request, "home")
 
         # Get categories
         categories = Category.objects.all()
 
         context.update({
             "latest_articles": latest_articles,
+            "trending_articles": trending_articles,
             "categories": categories,
         })
         return context
@@ -203,7 +307,7 @@ class CategoryPage(Page):
         context = super().get_context(request)
         
         # Get articles in this category
-        articles = ArticlePage.objects.live().filter(
+        articles = ArticleCard.objects.filter(
             category=self.category
         ).order_by("-published_at")
         
@@ -212,6 +316,14 @@ class CategoryPage(Page):
         paginator = Paginator(articles, 12)
         page_number = request.GET.get("page")
         page_obj = paginator.get_page(page_number)
+        add_cache_tags(
+            request,
+            f"page:{self.id}",
+            f"category:{self.category_id}",
+            *article_tags(*page_obj),
+        )
+        set_cache_policy(request, "listing")
+        preload_lead(request, page_obj[0] if page_obj else None)
         
         context.update({
             "articles": page_obj,
@@ -220,6 +332,20 @@ class CategoryPage(Page):
         return context
 
 
+class ArticlePageQuerySet(PageQuerySet):
+    def published(self):
+        """Live articles, filtered on ``is_live`` so listings can use its indexes."""
+        return self.filter(is_live=True)
+
+    def for_listing(self):
+        """Everything a list of pages shows, in one query per relation.
+
+        The category is joined and the tags of the whole list are fetched
+        with a single query, instead of one ``tags.all()`` query per page.
+        """
+        return self.select_related("category").prefetch_related("tags")
+
+
 class ArticlePage(Page):
     """Article page model."""
     summary = models.TextField(
@@ -257,7 +383,16 @@ class ArticlePage(Page):
         help_text="External URL to redirect to (e.g. for podcasts)"
     )
     tags = ClusterTaggableManager(through=ArticlePageTag, blank=True)
-    
+    # Copy of Page.live on this table, so listings filter and sort without
+    # joining wagtailcore_page first; kept in sync by save() and signals
+    is_live = models.BooleanField(default=False, editable=False)
+    # Copies of the category's listing flags, kept in sync by save() and
+    # when a category changes, so listings filter on an indexed column
+    listed_on_home = models.BooleanField(default=True, editable=False)
+    listed_in_related = models.BooleanField(default=True, editable=False)
+
+    objects = PageManager.from_queryset(ArticlePageQuerySet)()
+
     content_panels = Page.content_panels + [
         FieldPanel("summary"),
         FieldPanel("cover_image"),
@@ -283,49 +418,98 @@ class ArticlePage(Page):
         # Auto-generate slug if empty
         if not self.slug:
             self.slug = slugify(self.title)
+        self.is_live = self.live
+        exclude_home, exclude_related = Category.listing_flags().get(self.category_id, (False, False))
+        self.listed_on_home = not exclude_home
+        self.listed_in_related = not exclude_related
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if "live" in update_fields:
+                update_fields.add("is_live")
+            if "category" in update_fields:
+                update_fields |= {"listed_on_home", "listed_in_related"}
+            kwargs["update_fields"] = update_fields
         super().save(*args, **kwargs)
     
     def get_context(self, request):
         context = super().get_context(request)
 
-        # Exclude podcast category from related articles
-        podcast_category = Category.objects.filter(slug='podcasts').first()
-
-        # Get related articles from same category (excluding podcasts and current article)
-        related_query = ArticlePage.objects.live().filter(
-            category=self.category
-        ).exclude(id=self.id)
-
-        if podcast_category:
-            related_query = related_query.exclude(category=podcast_category)
+        # Get related articles from same category (excluding current article
+        # and categories marked exclude_from_related, such as Podcasts)
+        related_query = ArticleCard.objects.filter(
+            category=self.category, listed_in_related=True
+        ).exclude(article_id=self.id)
 
         related_articles = list(related_query.order_by("-published_at")[:3])
 
-        # If not enough related by category, get from other categories (excluding podcasts)
+        # If not enough related by category, get from other categories
         if len(related_articles) < 3:
-            # Get articles from other categories (not podcasts, not current category, not current article)
-            additional_query = ArticlePage.objects.live().exclude(id=self.id)
-
-            if podcast_category:
-                additional_query = additional_query.exclude(category=podcast_category)
+            # Get articles from other categories (not excluded, not current category, not current article)
+            additional_query = ArticleCard.objects.filter(
+                listed_in_related=True
+            ).exclude(article_id=self.id)
 
             # Exclude current category and already selected articles
             additional_query = additional_query.exclude(category=self.category)
-            if related_articles:
-                additional_query = additional_query.exclude(
-                    id__in=[art.id for art in related_articles]
-                )
 
-            additional_related = list(additional_query.order_by("-published_at")[:3 - len(related_articles)])
+            additional_related = list(
+                additional_query.order_by("-published_at")[:3 - len(related_articles)]
+            )
             related_articles = related_articles + additional_related
 
+        preload_pictures(
+            request,
+            ([self.cover_image], ["cover"]),
+            ([block.value["image"] for block in self.body if block.block_type == "image"], ["body"]),
+        )
+        if not self.cover_video_id:
+            preload_picture(request, self.cover_image, "cover")
+        add_cache_tags(
+            request,
+            f"page:{self.id}",
+            f"category:{self.category_id}",
+            *article_tags(self, *related_articles),
+        )
+        set_cache_policy(request, "article")
+
         context.update({
             "related_articles": related_articles,
         })
         return context
-    
+
+    def serve(self, request, *args, **kwargs):
+        """Stream long articles block by block, see ``news.streaming``."""
+        from .streaming import should_stream, stream_page
+
+        if not should_stream(request, self.body):
+            return super().serve(request, *args, **kwargs)
+        request.is_preview = False
+        return stream_page(
+            request,
+            self.get_template(request, *args, **kwargs),
+            self.get_context(request, *args, **kwargs),
+            self.body,
+        )
+
     class Meta:
         ordering = ["-published_at"]
+        indexes = [
+            # Category listings and related articles
+            models.Index(fields=["category", "-published_at"], name="article_category_published"),
+            # Home page, feed and sitemap: only live rows, newest first
+            models.Index(
+                fields=["-published_at"],
+                condition=models.Q(is_live=True),
+                name="article_live_published",
+            ),
+            # Live articles for the home page, without excluded categories
+            models.Index(
+                fields=["-published_at"],
+                condition=models.Q(is_live=True, listed_on_home=True),
+                name="article_home_published",
+            ),
+        ]
 
 
 class RelatedArticle(Orderable):
@@ -340,3 +524,179 @@ class RelatedArticle(Orderable):
     panels = [
         FieldPanel("related_page"),
     ]
+
+
+class ArticleCardManager(models.Manager):
+    def get_queryset(self):
+        # Cards show the category name; the join is to a handful of rows
+        return super().get_queryset().select_related("category")
+
+
+class ArticleCard(models.Model):
+    """
+    What an article list shows for one live article, in one narrow table.
+
+    Listings read cards instead of joining ``wagtailcore_page`` and
+    ``news_articlepage`` and looking up images, videos and tags per row.
+    A card exists exactly while its article is live; ``news.article_cards``
+    keeps the table in sync on publish, unpublish and move, and
+    ``build_article_cards`` rebuilds it. Attribute names follow
+    ``ArticlePage``, so list templates render cards and pages alike.
+    """
+    article = models.OneToOneField(
+        ArticlePage,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="card"
+    )
+    title = models.CharField(max_length=255)
+    slug = models.SlugField(max_length=255, allow_unicode=True)
+    url = models.CharField(max_length=255)
+    external_url = models.URLField(blank=True)
+    summary = models.TextField(blank=True)
+    author = models.CharField(max_length=100, blank=True)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="+")
+    published_at = models.DateTimeField()
+    cover_image_id = models.IntegerField(null=True, blank=True)
+    # {breakpoint: picture data} as built by news.responsive_images
+    pictures = models.JSONField(default=dict, blank=True)
+    video_url = models.CharField(max_length=500, blank=True)
+    video_poster_url = models.CharField(max_length=500, blank=True)
+    # [{"name": ..., "slug": ...}] in the article's tag order
+    tags = models.JSONField(default=list, blank=True)
+    listed_on_home = models.BooleanField(default=True)
+    listed_in_related = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ArticleCardManager()
+
+    class Meta:
+        ordering = ["-published_at"]
+        indexes = [
+            models.Index(fields=["-published_at"], name="card_published"),
+            models.Index(fields=["category", "-published_at"], name="card_category_published"),
+            models.Index(
+                fields=["-published_at"],
+                condition=models.Q(listed_on_home=True),
+                name="card_home_published",
+            ),
+            models.Index(
+                fields=["-published_at"],
+                condition=models.Q(listed_in_related=True),
+                name="card_related_published",
+            ),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    @property
+    def id(self):
+        return self.article_id
+
+    @property
+    def cover_image(self):
+        from .cards import CardImage
+
+        return CardImage(self.pictures) if self.pictures else None
+
+    def get_url(self, request=None):
+        return self.url
+
+
+class TagStats(models.Model):
+    """
+    How many live articles carry a tag, and when the latest was published.
+
+    Kept up to date for the tags of each article whose card is synced (see
+    ``news.tag_stats``), so tag pages and the tag cloud read one row per tag
+    instead of counting through ``ArticlePageTag``.
+    """
+    tag = models.OneToOneField(
+        Tag,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats"
+    )
+    article_count = models.PositiveIntegerField(default=0)
+    latest_published_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "tag stats"
+        indexes = [
+            # The tag cloud: tags in use, most used first
+            models.Index(
+                fields=["-article_count"],
+                condition=models.Q(article_count__gt=0),
+                name="tagstats_in_use",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.tag}: {self.article_count}"
+
+
+class ArticleStats(models.Model):
+    """
+    Views of an article and its time-decayed popularity.
+
+    Written only by ``news.popularity.flush_view_counts``, in batches, from
+    counters kept in the cache. ``popularity`` is the logarithm of a
+    forward-decayed view count (see ``news.popularity``), so ordering by
+    it ranks by recent views. ``category`` is copied from the card at each
+    flush, for per-category rankings without a join.
+    """
+    article = models.OneToOneField(
+        ArticlePage,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats"
+    )
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="+")
+    view_count = models.PositiveBigIntegerField(default=0)
+    popularity = models.FloatField(default=0)
+    last_viewed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "article stats"
+        indexes = [
+            models.Index(fields=["-popularity"], name="stats_popular"),
+            models.Index(fields=["category", "-popularity"], name="stats_category_popular"),
+        ]
+
+    def __str__(self):
+        return f"{self.article_id}: {self.view_count} views"
+
+
+class ArchiveMonth(models.Model):
+    """
+    One month of the archive: how many live articles it holds and its
+    first and last article, in ``TIME_ZONE``.
+
+    Kept up to date for the months of each article whose card is synced
+    (see ``news.archive``); archive pages read a month's cards by
+    ``published_at`` range and find neighbouring months by key, without
+    OFFSET pagination through older listings.
+    """
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    article_count = models.PositiveIntegerField(default=0)
+    first_article_id = models.IntegerField(null=True, blank=True)
+    last_article_id = models.IntegerField(null=True, blank=True)
+    first_published_at = models.DateTimeField(null=True, blank=True)
+    last_published_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-year", "-month"]
+        constraints = [
+            models.UniqueConstraint(fields=["year", "month"], name="archive_month_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.year}-{self.month:02d}"
+
+    def get_absolute_url(self):
+        return reverse("archive_month", args=[f"{self.year:04d}", f"{self.month:02d}"])
@@ -0,0 +1,190 @@
+"""
+Full-page cache for anonymous visitors.
+
+``AnonymousPageCacheMiddleware`` replaces Django's per-site cache
+middleware, which keys on the path only through ``cache_page`` and pickles
+whole response objects. Here:
+
+* the key covers host, path and the query string with tracking parameters
+  removed and keys sorted
+* requests with a session or CSRF cookie, or an ``Authorization`` header,
+  bypass the cache, so editors and forms always see live pages
+* only plain 200 responses without cookies or private cache directives are
+  stored, as status, headers and a body compressed once per encoding
+  (``news.compression``), and hits serve the variant the client accepts
+* entries carry the versions of the dependency tags the view recorded
+  (``news.cache_tags``), so publishing an article invalidates exactly the
+  pages showing it and TTLs can be long
+* a miss marks the request as a cache fill (``is_cache_fill``), so views
+  that can stream, such as long articles, render the whole page instead
+* bake requests (``BAKE_HEADER``, see ``news.baking``) always render, so
+  the baker sees the cache tags of the view
+"""
+
+import hashlib
+import logging
+import re
+import time
+from urllib.parse import parse_qsl, urlencode
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from .cache import get_backend
+from .cache_tags import get_cache_tags, tag_versions, versions_match
+from .compression import compress_variants, decompress, is_compressible, negotiate
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 6 * 60 * 60
+FILL_ATTR = "_page_cache_fill"
+
+# Sent by the baker so it renders pages instead of reading old copies
+BAKE_HEADER = "X-Bake-Request"
+
+# Marketing parameters never change the page
+IGNORED_QUERY_PARAMS = re.compile(r"^(utm_\w+|fbclid|gclid|dclid|msclkid|mc_cid|mc_eid|_ga|_gl)$")
+
+BYPASS_PREFIXES = (
+    "/admin/", "/django-admin/", "/documents/", "/static/", "/media/",
+    "/metrics/", "/healthz",
+)
+
+# Not replayed from the cache; Content-* are set from the stored body
+STRIP_HEADERS = {
+    "set-cookie", "content-length", "content-encoding", "vary", "x-cache", "age",
+}
+
+def normalize_query(query_string):
+    """Sort query parameters and drop tracking ones."""
+    params = [
+        (key, value)
+        for key, value in parse_qsl(query_string, keep_blank_values=True)
+        if not IGNORED_QUERY_PARAMS.match(key)
+    ]
+    return urlencode(sorted(params))
+
+
+def page_cache_key(request):
+    raw = "|".join([
+        request.get_host(),
+        request.path,
+        normalize_query(request.META.get("QUERY_STRING", "")),
+    ])
+    return f"page:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+
+def is_cacheable_request(request):
+    """Whether ``request`` is an anonymous read that shared copies can answer."""
+    if request.method not in ("GET", "HEAD"):
+        return False
+    if request.path.startswith(BYPASS_PREFIXES):
+        return False
+    if "Authorization" in request.headers:
+        return False
+    cookies = request.COOKIES
+    return not (
+        settings.SESSION_COOKIE_NAME in cookies or settings.CSRF_COOKIE_NAME in cookies
+    )
+
+
+def is_cache_fill(request):
+    """Whether the response to ``request`` is about to be stored in the page cache."""
+    return getattr(request, FILL_ATTR, False)
+
+
+def is_cacheable_response(response, allow_streaming=False):
+    """Whether ``response`` is the same for every anonymous visitor."""
+    if response.status_code != 200 or response.cookies:
+        return False
+    if response.streaming and not allow_streaming:
+        return False
+    if response.has_header("Content-Encoding"):
+        return False
+    cache_control = response.get("Cache-Control", "").lower()
+    if any(d in cache_control for d in ("private", "no-store", "no-cache")):
+        return False
+    vary = {v.strip().lower() for v in response.get("Vary", "").split(",") if v.strip()}
+    return vary <= {"cookie", "accept-encoding"}
+
+
+class AnonymousPageCacheMiddleware:
+    """Serve and store full pages for anonymous GET and HEAD requests."""
+
+    def __init__(self, get_response, timeout=None):
+        self.get_response = get_response
+        self.timeout = timeout or getattr(settings, "PAGE_CACHE_TIMEOUT", DEFAULT_TIMEOUT)
+
+    @property
+    def backend(self):
+        return get_backend("pages")
+
+    def __call__(self, request):
+        if not self.should_cache_request(request):
+            return self.get_response(request)
+
+        try:
+            key = page_cache_key(request)
+        except Exception:
+            # e.g. DisallowedHost; let the normal stack produce the error
+            return self.get_response(request)
+
+        entry = self.backend.get(key)
+        if entry is not None and versions_match(entry["tags"]):
+            return self.build_response(request, entry)
+
+        if request.method == "GET":
+            setattr(request, FILL_ATTR, True)
+        response = self.get_response(request)
+        if request.method == "GET" and self.should_cache_response(response):
+            entry = self.store(key, request, response)
+            return self.build_response(request, entry, "MISS")
+        return response
+
+    def should_cache_request(self, request):
+        # A hit runs no view, so the baker would record no tags
+        return is_cacheable_request(request) and BAKE_HEADER not in request.headers
+
+    def should_cache_response(self, response):
+        return is_cacheable_response(response)
+
+    def store(self, key, request, response):
+        body = response.content
+        variants = compress_variants(body) if is_compressible(response) else {}
+        entry = {
+            "status": response.status_code,
+            "headers": [
+                (name, value) for name, value in response.items()
+                if name.lower() not in STRIP_HEADERS
+            ],
+            # Identity is rebuilt from gzip for the few clients without it
+            "body": None if "gzip" in variants else body,
+            "variants": variants,
+            "tags": tag_versions(get_cache_tags(request)),
+            "created": time.time(),
+        }
+        try:
+            self.backend.set(key, entry, self.timeout)
+        except Exception as e:
+            logger.warning("Could not store %s in the page cache: %s", request.path, e)
+        return entry
+
+    def build_response(self, request, entry, status="HIT"):
+        variants = entry["variants"]
+        encoding = negotiate(request.headers.get("Accept-Encoding", ""), variants)
+        if encoding:
+            body = variants[encoding]
+        else:
+            body = entry["body"] if entry["body"] is not None else decompress(variants["gzip"], "gzip")
+
+        response = HttpResponse(b"" if request.method == "HEAD" else body, status=entry["status"])
+        for name, value in entry["headers"]:
+            response[name] = value
+        if encoding:
+            response["Content-Encoding"] = encoding
+        response["Content-Length"] = str(len(body))
+        response["Age"] = str(max(0, int(time.time() - entry["created"])))
+        response["X-Cache"] = status
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
@@ -0,0 +1,19 @@
+"""
+Pagination for listings whose size is already known.
+"""
+
+from django.core.paginator import Paginator
+
+
+class CountedPaginator(Paginator):
+    """A ``Paginator`` given its item count, so it runs no ``COUNT`` query.
+
+    ``count`` comes from a summary table such as ``TagStats``; when it is
+    ``None`` the object list is counted as usual.
+    """
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            # Replaces the cached_property before it is first read
+            self.count = count
@@ -5,15 +5,16 @@ Performance monitoring and optimization utilities for MarketingNyt.dk
 import time
 import logging
 from functools import wraps
-from django.core.cache import cache, caches
+from django.core.cache import cache
 from django.conf import settings
 from django.db import connection
-from django.utils.decorators import method_decorator
+from django.utils.decorators import decorator_from_middleware_with_args, method_decorator
 from django.views.decorators.cache import cache_page, vary_on_headers
-from django.views.decorators.gzip import gzip_page
 from django.http import HttpResponse
 from django.template.response import TemplateResponse
 
+from .page_cache import AnonymousPageCacheMiddleware
+
 logger = logging.getLogger(__name__)
 
 
@@ -45,38 +46,22 @@ class PerformanceMiddleware:
                 f'with {len(connection.queries)} DB queries'
             )
         
-        # Add cache headers for static content
-        if request.path.startswith('/static/') or request.path.startswith('/media/'):
-            response['Cache-Control'] = 'public, max-age=31536000'  # 1 year
-            response['Expires'] = 'Thu, 31 Dec 2025 23:59:59 GMT'
+        # Static and media names are content-hashed; Cache-Control alone
+        # governs freshness, a fixed Expires date only goes stale
+        if request.path.startswith(('/static/', '/media/')) and not response.has_header('Cache-Control'):
+            response['Cache-Control'] = 'public, max-age=31536000, immutable'  # 1 year
         
         return response
 
 
 def cache_page_per_user(timeout):
     """
-    Cache decorator that varies by user authentication status.
+    Cache a view's full response for anonymous visitors.
+
+    Uses the same keying, bypass rules and tag invalidation as
+    ``AnonymousPageCacheMiddleware``; logged-in users are never cached.
     """
-    def decorator(view_func):
-        @wraps(view_func)
-        def wrapper(request, *args, **kwargs):
-            cache_key = f'page_{request.path}_{request.user.is_authenticated}'
-            
-            # Try to get from cache
-            cached_response = cache.get(cache_key)
-            if cached_response:
-                return cached_response
-            
-            # Generate response
-            response = view_func(request, *args, **kwargs)
-            
-            # Cache the response
-            if response.status_code == 200:
-                cache.set(cache_key, response, timeout)
-            
-            return response
-        return wrapper
-    return decorator
+    return decorator_from_middleware_with_args(AnonymousPageCacheMiddleware)(timeout=timeout)
 
 
 def cache_template_fragment(fragment_name, timeout=300):
@@ -99,121 +84,6 @@ def cache_template_fragment(fragment_name, timeout=300):
     return decorator
 
 
-class DatabaseOptimizer:
-    """
-    Database query optimization utilities.
-    """
-    
-    @staticmethod
-    def get_optimized_articles(limit=10, category=None):
-        """
-        Get articles with optimized queries using select_related and prefetch_related.
-        """
-        from .models import ArticlePage
-        
-        cache_key = f'optimized_articles_{limit}_{category}'
-        cached_articles = caches['pages'].get(cache_key)
-        
-        if cached_articles is not None:
-            return cached_articles
-        
-        queryset = ArticlePage.objects.live().public().select_related(
-            'category'
-        ).prefetch_related(
-            'tags'
-        ).order_by('-published_at')
-        
-        if category:
-            queryset = queryset.filter(category=category)
-        
-        articles = list(queryset[:limit])
-        
-        # Cache for 30 minutes
-        caches['pages'].set(cache_key, articles, 1800)
-        
-        return articles
-    
-    @staticmethod
-    def get_popular_articles(limit=5):
-        """
-        Get popular articles based on view count or other metrics.
-        """
-        cache_key = f'popular_articles_{limit}'
-        cached_articles = caches['pages'].get(cache_key)
-        
-        if cached_articles is not None:
-            return cached_articles
-        
-        from .models import ArticlePage
-        
-        # For now, use recent articles as popular
-        # In production, you might track view counts
-        articles = list(
-            ArticlePage.objects.live().public()
-            .select_related('category')
-            .order_by('-published_at')[:limit]
-        )
-        
-        # Cache for 1 hour
-        caches['pages'].set(cache_key, articles, 3600)
-        
-        return articles
-
-
-class ImageOptimizer:
-    """
-    Image optimization and caching utilities.
-    """
-    
-    @staticmethod
-    def get_optimized_rendition(image, filter_spec, cache_timeout=3600):
-        """
-        Get image rendition with caching.
-        """
-        if not image:
-            return None
-        
-        cache_key = f'image_rendition_{image.id}_{filter_spec}'
-        cached_rendition = caches['images'].get(cache_key)
-        
-        if cached_rendition is not None:
-            return cached_rendition
-        
-        try:
-            rendition = image.get_rendition(filter_spec)
-            caches['images'].set(cache_key, rendition, cache_timeout)
-            return rendition
-        except Exception as e:
-            logger.error(f'Error generating image rendition: {e}')
-            return None
-    
-    @staticmethod
-    def preload_article_images(articles):
-        """
-        Preload images for a list of articles to reduce database queries.
-        """
-        image_ids = [
-            article.cover_image.id for article in articles 
-            if hasattr(article, 'cover_image') and article.cover_image
-        ]
-        
-        if not image_ids:
-            return
-        
-        from wagtail.images.models import Image
-        
-        # Preload images
-        images = {
-            img.id: img for img in 
-            Image.objects.filter(id__in=image_ids)
-        }
-        
-        # Attach images to articles to avoid additional queries
-        for article in articles:
-            if hasattr(article, 'cover_image') and article.cover_image:
-                article._cached_cover_image = images.get(article.cover_image.id)
-
-
 def performance_monitor(func):
     """
     Decorator to monitor function performance.
@@ -256,17 +126,11 @@ class CacheInvalidator:
         # Invalidate article-specific caches
         cache_patterns = [
             f'page_{article.url}*',
-            f'optimized_articles_*',
-            f'popular_articles_*',
             f'template_fragment_*',
         ]
         
         for pattern in cache_patterns:
             cache.delete_pattern(pattern)
-        
-        # Invalidate category caches if article has category
-        if hasattr(article, 'category') and article.category:
-            cache.delete_pattern(f'optimized_articles_*_{article.category.id}')
     
     @staticmethod
     def invalidate_homepage_cache():
@@ -275,8 +139,6 @@ class CacheInvalidator:
         """
         cache_patterns = [
             'page_/*',
-            'optimized_articles_*',
-            'popular_articles_*',
             'template_fragment_homepage_*',
         ]
         
@@ -290,9 +152,9 @@ def optimized_page_view(timeout=300):
     Comprehensive optimization decorator for page views.
     """
     def decorator(view_func):
-        # Apply multiple optimizations
-        view_func = gzip_page(view_func)
-        view_func = vary_on_headers('User-Agent', 'Accept-Encoding')(view_func)
+        # Apply multiple optimizations. Compression happens in the page
+        # cache and CompressionMiddleware, and nothing varies on
+        # User-Agent, which would make every browser a separate entry
         view_func = cache_page_per_user(timeout)(view_func)
         view_func = performance_monitor(view_func)
         
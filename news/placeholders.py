@@ -0,0 +1,130 @@
+"""
+Inline low-quality image placeholders.
+
+Every image gets an ``ImagePlaceholder`` row holding a ~300 byte blurred
+WebP as a ``data:`` URI, keyed to the image's ``file_hash`` so a replaced
+file is picked up again. Templates inline it as the ``<img>`` background,
+so readers see the shape and colours of a picture without an extra
+rendition request.
+
+Placeholders are built off the request path: saving an image schedules a
+job on a small background thread pool once the transaction commits, and
+``generate_placeholders`` backfills existing images.
+
+Rich text loads its images through ``PlaceholderImageEmbedHandler``
+(registered in ``news.wagtail_hooks``), which joins the placeholders into
+the one query Wagtail makes for all images of a block.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import connections
+from wagtail.images import get_image_model
+from wagtail.images.rich_text import ImageEmbedHandler
+
+from .image_processing import make_placeholder
+from .models import ImagePlaceholder
+
+logger = logging.getLogger(__name__)
+
+# Light grey box for images whose placeholder is not ready yet
+FALLBACK_PLACEHOLDER = (
+    "data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iODAwIiBoZWlnaHQ9IjYwMCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj48cmVjdCB3aWR0aD0iMTAwJSIgaGVpZ2h0PSIxMDAlIiBmaWxsPSIjZjBmMGYwIi8+PC9zdmc+"
+)
+
+_executor = None
+_lock = threading.Lock()
+_queued = set()
+
+
+def get_placeholder(image):
+    """The placeholder ``data:`` URI of ``image``, or ``""`` when missing or stale."""
+    try:
+        placeholder = image.placeholder
+    except ObjectDoesNotExist:
+        return ""
+    if placeholder.file_hash and placeholder.file_hash != image.file_hash:
+        return ""
+    return placeholder.data_uri
+
+
+class PlaceholderImageEmbedHandler(ImageEmbedHandler):
+    """Wagtail's rich text image embeds, loaded with their placeholders."""
+
+    @classmethod
+    def get_many(cls, attrs_list):
+        ids = [attrs.get("id") for attrs in attrs_list]
+        images = cls.get_model()._default_manager.select_related("placeholder").in_bulk(ids)
+        images = {str(pk): image for pk, image in images.items()}
+        return [images.get(str(image_id)) for image_id in ids]
+
+
+def compute_placeholder(image):
+    """Read the original file of ``image`` and build its placeholder."""
+    storage = image._meta.get_field("file").storage
+    with storage.open(image.file.name, "rb") as f:
+        return make_placeholder(f.read())
+
+
+def save_placeholders(rows):
+    """Upsert ``(image, data_uri)`` pairs and drop cached pictures using them."""
+    from .article_cards import refresh_cards_for_images
+    from .responsive_images import invalidate_pictures
+
+    ImagePlaceholder.objects.bulk_create(
+        [
+            ImagePlaceholder(image_id=image.pk, file_hash=image.file_hash, data_uri=data_uri)
+            for image, data_uri in rows
+        ],
+        update_conflicts=True,
+        unique_fields=["image"],
+        update_fields=["file_hash", "data_uri", "updated_at"],
+    )
+    for image, _ in rows:
+        invalidate_pictures(image)
+    refresh_cards_for_images([image.pk for image, _ in rows])
+
+
+def generate_placeholder(image_id):
+    """Build the placeholder of one image unless it is already up to date."""
+    try:
+        image = get_image_model().objects.get(pk=image_id)
+        if ImagePlaceholder.objects.filter(image_id=image_id, file_hash=image.file_hash).exists():
+            return
+        save_placeholders([(image, compute_placeholder(image))])
+    except Exception as e:
+        logger.warning("Could not build placeholder for image %s: %s", image_id, e)
+
+
+def _run(image_id):
+    try:
+        generate_placeholder(image_id)
+    finally:
+        with _lock:
+            _queued.discard(image_id)
+        connections.close_all()
+
+
+def schedule_placeholder(image_id):
+    """
+    Build a placeholder in the background; repeated calls are collapsed.
+
+    With ``IMAGE_PLACEHOLDERS_ASYNC = False`` the work runs inline instead.
+    """
+    global _executor
+
+    if not getattr(settings, "IMAGE_PLACEHOLDERS_ASYNC", True):
+        generate_placeholder(image_id)
+        return
+
+    with _lock:
+        if image_id in _queued:
+            return
+        _queued.add(image_id)
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="placeholders")
+    _executor.submit(_run, image_id)
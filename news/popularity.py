@@ -0,0 +1,238 @@
+"""
+Article view counting and "mest læste" rankings.
+
+Article pages send a beacon (``static/js/main.js``) to ``article_view``,
+which drops bots and prefetches and adds one to the article's counter in
+the ``default`` cache, an ``INCR`` on Redis: counting a view never touches
+the database. ``flush_view_counts`` moves the counters into
+``ArticleStats`` in one batch. Each worker tries it every
+``VIEW_COUNT_FLUSH_INTERVAL`` seconds on a background thread, and an
+``add()`` lock lets one worker per interval through; the
+``flush_view_counts`` command does the same by hand. Each flush also
+feeds the per-minute counts of ``news.trending``.
+
+Popularity uses forward decay: a view at time ``t`` adds ``exp(t / tau)``
+to an article's score, with ``tau`` the half-life over ln 2, and the score
+is stored as its logarithm. Ordering by it is ordering by exponentially
+decayed view counts at any moment, yet a flush only writes the articles
+that were viewed since the last one.
+
+Pages showing a "mest læste" list carry its cache tag (``most_read_tag``).
+A flush purges the tags of the lists whose leaders changed, and
+publishing, unpublishing or deleting an article purges the lists it can
+appear in.
+"""
+
+import datetime
+import logging
+import math
+import os
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from .cache import get_backend, popular_cache
+from .cache_tags import purge_tags
+from .models import ArticleCard, ArticleStats
+from .trending import update_trending
+
+logger = logging.getLogger(__name__)
+
+COUNTER_PREFIX = "views:"
+# Counters of articles that are never flushed, e.g. unpublished ones
+COUNTER_TIMEOUT = 7 * 24 * 60 * 60
+FLUSH_LOCK = "views-flush-lock"
+
+# Articles in a "mest læste" list, as {% most_read %} shows it
+MOST_READ_LIMIT = 5
+
+# Scores are exp(seconds since EPOCH / tau); only differences matter
+EPOCH = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+# Crawlers, link previews, uptime checks and HTTP libraries
+BOT_PATTERN = re.compile(
+    r"bot|crawl|spider|slurp|scrape|preview|monitor|pingdom|lighthouse|headless|"
+    r"facebookexternalhit|embedly|whatsapp|curl|wget|python|java/|go-http|okhttp|httpclient",
+    re.IGNORECASE,
+)
+
+
+def is_bot(request):
+    """Whether ``request`` comes from a bot or a speculative prefetch."""
+    user_agent = request.headers.get("User-Agent", "")
+    if not user_agent or BOT_PATTERN.search(user_agent):
+        return True
+    purpose = request.headers.get("Sec-Purpose") or request.headers.get("Purpose") or ""
+    return "prefetch" in purpose.lower()
+
+
+def counter_key(article_id):
+    return f"{COUNTER_PREFIX}{article_id}"
+
+
+def live_article_ids():
+    """IDs of the articles with a card; views of anything else are dropped."""
+    return popular_cache.get_or_set(
+        "live-ids", lambda: set(ArticleCard.objects.values_list("article_id", flat=True)), 300
+    )
+
+
+def record_view(article_id):
+    """Count one view of ``article_id`` in the shared cache."""
+    backend = get_backend("default")
+    key = counter_key(article_id)
+    try:
+        backend.incr(key)
+    except ValueError:
+        # First view since the last flush; incr if another request won the add
+        if not backend.add(key, 1, COUNTER_TIMEOUT):
+            backend.incr(key)
+
+
+def _tau():
+    return settings.POPULARITY_HALF_LIFE_HOURS * 60 * 60 / math.log(2)
+
+
+def _log_add(a, b):
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def score_now(log_score, now=None):
+    """Views of an article with ``log_score``, decayed to ``now``."""
+    elapsed = ((now or timezone.now()) - EPOCH).total_seconds()
+    return math.exp(log_score - elapsed / _tau())
+
+
+def flush_view_counts(now=None):
+    """Move counted views into ``ArticleStats``; returns ``(articles, views)``."""
+    now = now or timezone.now()
+    backend = get_backend("default")
+    categories = dict(ArticleCard.objects.values_list("article_id", "category_id"))
+    keys = {counter_key(article_id): article_id for article_id in categories}
+    counts = {}
+    for key, value in (backend.get_many(list(keys)) or {}).items():
+        if not value:
+            continue
+        try:
+            # Views counted meanwhile stay for the next flush
+            backend.decr(key, value)
+        except ValueError:
+            continue
+        counts[keys[key]] = int(value)
+    # Every minute, with or without views, so trending scores decay
+    update_trending(counts, now)
+    if not counts:
+        return 0, 0
+
+    lists = {None} | {categories[article_id] for article_id in counts}
+    leaders = _leaders(lists)
+    offset = (now - EPOCH).total_seconds() / _tau()
+    existing = ArticleStats.objects.in_bulk(list(counts))
+    created = []
+    for article_id, views in counts.items():
+        weight = math.log(views) + offset
+        stats = existing.get(article_id)
+        if stats is None:
+            created.append(ArticleStats(
+                article_id=article_id,
+                category_id=categories[article_id],
+                view_count=views,
+                popularity=weight,
+                last_viewed_at=now,
+            ))
+            continue
+        stats.category_id = categories[article_id]
+        stats.view_count += views
+        stats.popularity = _log_add(stats.popularity, weight)
+        stats.last_viewed_at = now
+        stats.updated_at = now
+    ArticleStats.objects.bulk_create(created)
+    ArticleStats.objects.bulk_update(
+        existing.values(), ["category_id", "view_count", "popularity", "last_viewed_at", "updated_at"]
+    )
+
+    popular_cache.delete_pattern("most-read:*")
+    # Not every flush reorders what the lists show; only purge those it did
+    changed = [category_id for category_id, ids in _leaders(lists).items() if ids != leaders[category_id]]
+    if changed:
+        purge_tags(*(most_read_tag(category_id) for category_id in changed))
+    return len(counts), sum(counts.values())
+
+
+def most_read_tag(category_id=None):
+    """Cache tag of pages showing the most read list of ``category_id`` or the whole site."""
+    return f"most-read:{category_id or 'all'}"
+
+
+def _leaders(category_ids, limit=MOST_READ_LIMIT):
+    """``{category_id: article IDs}`` that ``most_read`` picks its cards from."""
+    stats = ArticleStats.objects.order_by("-popularity")
+    return {
+        category_id: list(
+            (stats.filter(category_id=category_id) if category_id else stats)
+            .values_list("article_id", flat=True)[:limit * 2]
+        )
+        for category_id in category_ids
+    }
+
+
+def forget_most_read(tags):
+    """Drop the cached lists, then the pages showing the lists ``tags``."""
+    popular_cache.delete_pattern("most-read:*")
+    purge_tags(*tags)
+
+
+def most_read_tags_showing(article_id, category_id):
+    """Tags of the most read lists ``article_id`` is ranked high enough to appear in."""
+    return [
+        most_read_tag(list_id)
+        for list_id, ids in _leaders({category_id, None}).items()
+        if article_id in ids
+    ]
+
+
+def most_read(category_id=None, limit=MOST_READ_LIMIT):
+    """Cards of the most read live articles, in ``category_id`` or overall."""
+    def load():
+        stats = ArticleStats.objects.order_by("-popularity")
+        if category_id:
+            stats = stats.filter(category_id=category_id)
+        # Room for articles that have been unpublished since
+        ids = list(stats.values_list("article_id", flat=True)[:limit * 2])
+        cards = ArticleCard.objects.in_bulk(ids)
+        return [cards[article_id] for article_id in ids if article_id in cards][:limit]
+
+    return popular_cache.get_or_set(f"most-read:{category_id or 'all'}:{limit}", load, 10 * 60)
+
+
+def _flush_periodically(interval):
+    backend = get_backend("default")
+    while True:
+        # Spread the workers out; the lock decides who flushes anyway
+        time.sleep(interval * (0.5 + os.getpid() % 100 / 100))
+        try:
+            if backend.add(FLUSH_LOCK, os.getpid(), max(1, interval - 1)):
+                articles, views = flush_view_counts()
+                if views:
+                    logger.info("Flushed %s views of %s articles", views, articles)
+        except Exception:
+            logger.exception("Flushing view counts failed")
+        finally:
+            connections.close_all()
+
+
+def start_view_count_flusher():
+    """Flush view counts from a daemon thread, if ``VIEW_COUNT_FLUSH_INTERVAL`` is set."""
+    interval = settings.VIEW_COUNT_FLUSH_INTERVAL
+    if interval <= 0:
+        return None
+    thread = threading.Thread(
+        target=_flush_periodically, args=(interval,), name="view-count-flusher", daemon=True
+    )
+    thread.start()
+    return thread
@@ -0,0 +1,149 @@
+"""
+``Link: rel=preload`` headers and 103 Early Hints for critical resources.
+
+Browsers find the stylesheet, the main script and the cover image only
+once they parse the HTML that references them. ``PreloadLinkMiddleware``
+names them in a ``Link`` header of every HTML page instead:
+
+* ``CRITICAL_ASSETS``, the static files every page needs (the site uses
+  system fonts, so there are no font files to preload)
+* what the view adds with ``add_preload``, e.g. ``preload_picture`` for
+  the cover of an article at the size its ``<picture>`` will pick
+
+The middleware runs inside the page cache, so the header is stored with
+the cached page (and with baked files) and costs nothing on hits.
+Cloudflare turns these headers into 103 Early Hints. Served over ASGI by
+a server with the ``http.response.early_hint`` extension, such as
+Hypercorn, ``EarlyHintsMiddleware`` sends the 103 itself, with the
+header this worker last sent for the path.
+"""
+
+import threading
+from collections import OrderedDict
+
+from django.templatetags.static import static
+
+from .cards import CardImage
+from .responsive_images import get_picture
+
+REQUEST_ATTR = "_preloads"
+
+# (static path, as); the files base.html loads before first paint
+CRITICAL_ASSETS = (
+    ("css/dr-style.css", "style"),
+    ("js/main.js", "script"),
+)
+
+# Paths whose Link header this worker remembers for Early Hints
+RECENT_LINKS_SIZE = 512
+
+_recent_links = OrderedDict()
+_recent_lock = threading.Lock()
+
+
+def _link(href, as_, **attrs):
+    params = [f"<{href}>", "rel=preload", f"as={as_}"]
+    params += [f'{name}="{value}"' for name, value in attrs.items() if value]
+    return "; ".join(params)
+
+
+def critical_links():
+    return [_link(static(path), as_) for path, as_ in CRITICAL_ASSETS]
+
+
+def add_preload(request, href, as_, **attrs):
+    """Preload ``href`` for the response to ``request``; ``attrs`` become link parameters."""
+    if request is None:
+        return
+    if not hasattr(request, REQUEST_ATTR):
+        setattr(request, REQUEST_ATTR, [])
+    link = _link(href, as_, **attrs)
+    if link not in getattr(request, REQUEST_ATTR):
+        getattr(request, REQUEST_ATTR).append(link)
+
+
+def preload_picture(request, image, breakpoint):
+    """Preload the preferred format of ``image`` as ``{% responsive_image %}`` shows it."""
+    if not image:
+        return
+    if isinstance(image, CardImage):
+        picture = image.picture(breakpoint)
+        if picture is None:
+            return
+    else:
+        picture = get_picture(image, breakpoint, request)
+    if picture["sources"]:
+        source = picture["sources"][0]
+    else:
+        source = {"type": "image/jpeg", "srcset": picture["srcset"]}
+    href = source["srcset"].split(",")[0].split()[0]
+    add_preload(
+        request,
+        href,
+        "image",
+        type=source["type"],
+        imagesrcset=source["srcset"],
+        imagesizes=picture["sizes"],
+        fetchpriority="high",
+    )
+
+
+def preload_lead(request, card, breakpoint="hero"):
+    """Preload what a listing shows largest for its first ``card``: video poster or cover."""
+    if card is None:
+        return
+    if card.video_url:
+        if card.video_poster_url:
+            add_preload(request, card.video_poster_url, "image", fetchpriority="high")
+        return
+    preload_picture(request, card.cover_image, breakpoint)
+
+
+def page_links(request):
+    """The preload links of the page for ``request``, critical assets first."""
+    return critical_links() + list(getattr(request, REQUEST_ATTR, ()))
+
+
+def remember_links(path, links):
+    with _recent_lock:
+        _recent_links.pop(path, None)
+        _recent_links[path] = links
+        while len(_recent_links) > RECENT_LINKS_SIZE:
+            _recent_links.popitem(last=False)
+
+
+class PreloadLinkMiddleware:
+    """Add the ``Link`` preload header to successful HTML responses."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        content_type = response.get("Content-Type", "")
+        if response.status_code != 200 or not content_type.startswith("text/html"):
+            return response
+        if not response.has_header("Link"):
+            links = page_links(request)
+            response["Link"] = ", ".join(links)
+            remember_links(request.path, links)
+        return response
+
+
+class EarlyHintsMiddleware:
+    """ASGI middleware sending a 103 with the preloads last sent for the path."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] == "http"
+            and scope["method"] == "GET"
+            and "http.response.early_hint" in scope.get("extensions", {})
+        ):
+            # Only pages this worker has rendered; not static files or the API
+            links = _recent_links.get(scope["path"])
+            if links:
+                await send({"type": "http.response.early_hint", "links": [link.encode() for link in links]})
+        await self.app(scope, receive, send)
@@ -0,0 +1,30 @@
+"""
+JSON rendering for the API with orjson.
+
+Kept apart from ``news.api``: DRF loads the renderer named in
+``REST_FRAMEWORK`` while the API views are being defined.
+"""
+
+import orjson
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer
+
+
+def _default(value):
+    if isinstance(value, Promise):
+        return force_str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class ORJSONRenderer(BaseRenderer):
+    """``JSONRenderer`` without its options, several times faster."""
+
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return orjson.dumps(data, default=_default)
@@ -0,0 +1,254 @@
+"""
+Responsive ``<picture>`` markup for article images.
+
+Every place a template shows an image is described by a named ``Breakpoint``
+listing the widths to generate and the ``sizes`` attribute the layout needs.
+Each width is rendered once per format in ``RESPONSIVE_IMAGE_FORMATS``
+(AVIF and WebP by default, JPEG last as the ``<img>`` fallback), so phones
+pick a small modern file instead of the desktop JPEG.
+
+The computed sources are plain dicts cached per image in the ``images``
+cache. Views call ``preload_pictures`` with every image a page will show:
+one ``get_many`` against the cache, then one batched rendition query for
+the misses, and the ``{% responsive_image %}`` tag reads the results from
+the request. The inline placeholder of each image (``news.placeholders``)
+is stored with its cached picture.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.conf import settings
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils.html import format_html, format_html_join
+
+from .cache import get_backend
+
+CACHE_TIMEOUT = 60 * 60 * 24 * 7
+REQUEST_ATTR = "_responsive_pictures"
+
+MIME_TYPES = {
+    "avif": "image/avif",
+    "webp": "image/webp",
+    "jpeg": "image/jpeg",
+}
+
+
+@dataclass(frozen=True)
+class Breakpoint:
+    """Widths and ``sizes`` for one image slot in the layout."""
+    widths: tuple
+    sizes: str
+    ratio: tuple = None
+
+    def spec(self, width):
+        if self.ratio:
+            height = round(width * self.ratio[1] / self.ratio[0])
+            return f"fill-{width}x{height}"
+        return f"width-{width}"
+
+
+BREAKPOINTS = {
+    # Lead story on the front and category pages (was fill-800x400)
+    "hero": Breakpoint((400, 800, 1200), "(max-width: 768px) 100vw, 800px", (2, 1)),
+    # Sidebar cards (was fill-300x200)
+    "card": Breakpoint((300, 600), "(max-width: 768px) 100vw, 300px", (3, 2)),
+    # Three-column rows (was fill-300x180)
+    "card_small": Breakpoint((300, 600), "(max-width: 768px) 100vw, 300px", (5, 3)),
+    # Related articles and tag listings (was fill-400x250)
+    "teaser": Breakpoint((400, 800), "(max-width: 768px) 100vw, 400px", (8, 5)),
+    # Article cover (was width-1200)
+    "cover": Breakpoint((480, 800, 1200, 1600), "(max-width: 900px) 100vw, 900px"),
+    # Image blocks in the article body (was width-800)
+    "body": Breakpoint((400, 800, 1200), "(max-width: 800px) 100vw, 800px"),
+}
+
+
+@lru_cache(maxsize=None)
+def can_encode(fmt):
+    """Whether Pillow can write ``fmt``; AVIF needs Pillow 11.2+ or a plugin."""
+    from PIL import Image as PILImage
+
+    PILImage.init()
+    return fmt.upper() in PILImage.SAVE
+
+
+def get_formats():
+    formats = [
+        f.strip() for f in settings.RESPONSIVE_IMAGE_FORMATS
+        if f.strip() in MIME_TYPES and can_encode(f.strip())
+    ]
+    if "jpeg" not in formats:
+        formats.append("jpeg")
+    return formats
+
+
+def filter_specs(name):
+    """All rendition filter specs needed for breakpoint ``name``."""
+    breakpoint = BREAKPOINTS[name]
+    return [
+        f"{breakpoint.spec(width)}|format-{fmt}"
+        for fmt in get_formats()
+        for width in breakpoint.widths
+    ]
+
+
+def get_cache():
+    return get_backend("images")
+
+
+def cache_key(image, name):
+    # The file hash and focal point change whenever the crops would
+    focal = (image.focal_point_x, image.focal_point_y, image.focal_point_width, image.focal_point_height)
+    raw = f"{image.pk}:{image.file_hash}:{focal}:{name}:{','.join(get_formats())}"
+    return f"responsive-picture:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+def invalidate_pictures(image):
+    """Forget the cached pictures of ``image`` for every breakpoint."""
+    get_cache().delete_many([cache_key(image, name) for name in BREAKPOINTS])
+
+
+def build_picture(image, name):
+    """Render every rendition for ``name`` and return the ``<picture>`` data."""
+    from .placeholders import get_placeholder
+
+    breakpoint = BREAKPOINTS[name]
+    renditions = image.get_renditions(*filter_specs(name))
+
+    sources = []
+    for fmt in get_formats():
+        candidates = {}
+        for width in breakpoint.widths:
+            rendition = renditions[f"{breakpoint.spec(width)}|format-{fmt}"]
+            # Small originals give identical renditions for the larger widths
+            candidates.setdefault(rendition.width, rendition)
+        sources.append({
+            "type": MIME_TYPES[fmt],
+            "srcset": ", ".join(f"{r.url} {w}w" for w, r in sorted(candidates.items())),
+        })
+
+    # The JPEG set goes on the <img>; its src is the width closest to 800px
+    fallback = sources.pop()
+    src = min(candidates.values(), key=lambda r: abs(r.width - 800))
+    return {
+        "sources": sources,
+        "srcset": fallback["srcset"],
+        "src": src.url,
+        "width": src.width,
+        "height": src.height,
+        "sizes": breakpoint.sizes,
+        "placeholder": get_placeholder(image),
+    }
+
+
+def prefetch_pictures(pairs):
+    """
+    Return ``{(image_id, name): picture}`` for ``(image, name)`` pairs, with
+    ``None`` for pictures that are not cached yet.
+
+    Cached pictures come from one ``get_many``. For the misses the
+    renditions are fetched in a single query, and placeholders in another
+    unless they were selected with the image, and kept on the image
+    instances, so ``get_picture`` can build them without touching the
+    database again. Only renditions a template actually asks for are
+    generated.
+    """
+    images = {}
+    wanted = {}
+    for image, name in pairs:
+        if image:
+            images.setdefault(image.pk, image)
+            wanted[cache_key(image, name)] = (image.pk, name)
+    if not wanted:
+        return {}
+
+    pictures = {wanted[key]: picture for key, picture in get_cache().get_many(list(wanted)).items()}
+
+    missing = {pair for pair in wanted.values() if pair not in pictures}
+    pending = [images[image_id] for image_id in {image_id for image_id, _ in missing}]
+    if pending:
+        specs = {spec for _, name in missing for spec in filter_specs(name)}
+        Rendition = pending[0].get_rendition_model()
+        prefetch_related_objects(pending, Prefetch(
+            "renditions",
+            queryset=Rendition.objects.filter(filter_spec__in=specs),
+            to_attr="prefetched_renditions",
+        ), "placeholder")
+    pictures.update(dict.fromkeys(missing))
+    return pictures
+
+
+def preload_pictures(request, *groups):
+    """
+    Batch the image lookups of a page; the template tag reuses the result.
+
+    Each group is ``(images, breakpoint_names)``, e.g.
+    ``preload_pictures(request, (covers, ["hero", "card"]), ([page.cover_image], ["cover"]))``.
+    """
+    pictures = prefetch_pictures(
+        (image, name) for images, names in groups for image in images for name in names
+    )
+    if request is not None:
+        if not hasattr(request, REQUEST_ATTR):
+            setattr(request, REQUEST_ATTR, {})
+        getattr(request, REQUEST_ATTR).update(pictures)
+    return pictures
+
+
+def get_picture(image, name, request=None):
+    """Picture data for one image, from the request preload or the cache."""
+    key = cache_key(image, name)
+    preloaded = getattr(request, REQUEST_ATTR, {})
+    if (image.pk, name) in preloaded:
+        picture = preloaded[(image.pk, name)]
+    else:
+        picture = get_cache().get(key)
+    if picture is None:
+        picture = build_picture(image, name)
+        get_cache().set(key, picture, CACHE_TIMEOUT)
+        preloaded[(image.pk, name)] = picture
+    return picture
+
+
+def render_preload(picture):
+    """``<link rel="preload">`` for the first source of a picture the browser can use.
+
+    A preload cannot list alternative formats, so it names the preferred
+    one with ``type``; browsers without it skip the hint and load the
+    ``<picture>`` as usual.
+    """
+    source = picture["sources"][0] if picture["sources"] else {"type": MIME_TYPES["jpeg"], "srcset": picture["srcset"]}
+    return format_html(
+        '<link rel="preload" as="image" type="{}" imagesrcset="{}" imagesizes="{}" fetchpriority="high">',
+        source["type"],
+        source["srcset"],
+        picture["sizes"],
+    )
+
+
+def render_picture(picture, alt="", **attrs):
+    """``<picture>`` markup for the data returned by ``get_picture``."""
+    attrs.setdefault("loading", "lazy")
+    attrs.setdefault("decoding", "async")
+    if picture.get("placeholder"):
+        # Shown behind the image until the real file has loaded
+        attrs.setdefault("style", f"background:url({picture['placeholder']}) center/cover no-repeat")
+    sources = format_html_join(
+        "",
+        '<source type="{}" srcset="{}" sizes="{}">',
+        ((source["type"], source["srcset"], picture["sizes"]) for source in picture["sources"]),
+    )
+    extra = format_html_join("", ' {}="{}"', ((k, v) for k, v in attrs.items() if v))
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}"{}></picture>',
+        sources,
+        picture["src"],
+        picture["srcset"],
+        picture["sizes"],
+        picture["width"],
+        picture["height"],
+        alt,
+        extra,
+    )
@@ -0,0 +1,126 @@
+"""
+Signal handlers for the news app, connected in ``NewsConfig.ready``.
+"""
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from wagtail.images import get_image_model
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+from .archive import month_of, refresh_archive_months
+from .article_cards import refresh_cards_for_images, sync_cards
+from .cache import category_cache
+from .cache_tags import SITE_TAG, purge_tags
+from .models import ArticleCard, ArticlePage, Category, CategoryPage, HomePage, SiteSettings
+from .placeholders import schedule_placeholder
+from .popularity import forget_most_read, most_read_tags_showing
+from .tag_stats import refresh_tag_stats
+
+
+@receiver(post_save, sender=get_image_model())
+def build_image_placeholder(sender, instance, **kwargs):
+    """Queue a placeholder for new or replaced image files."""
+    transaction.on_commit(lambda: schedule_placeholder(instance.pk))
+    # A new focal point changes the crops stored on cards
+    transaction.on_commit(lambda: refresh_cards_for_images([instance.pk]))
+
+
+def page_cache_tags(page):
+    """Cache tags of everything showing ``page``."""
+    tags = [f"page:{page.id}", "sitemap"]
+    if isinstance(page, ArticlePage):
+        tags += [f"article:{page.id}", f"category:{page.category_id}", "home", "feed"]
+        tags += [f"tag:{tag.slug}" for tag in page.tags.all()]
+        tags += most_read_tags_showing(page.id, page.category_id)
+    elif isinstance(page, CategoryPage):
+        tags.append(f"category:{page.category_id}")
+    elif isinstance(page, HomePage):
+        tags.append("home")
+    return tags
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def sync_article_is_live(sender, instance, **kwargs):
+    """Mirror ``live`` when Wagtail changes it without ``ArticlePage.save()``."""
+    if isinstance(instance, ArticlePage):
+        ArticlePage.objects.filter(pk=instance.pk).exclude(is_live=instance.live).update(
+            is_live=instance.live
+        )
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+@receiver(post_page_move)
+def sync_article_card(sender, instance, **kwargs):
+    """Keep the card of an article in line; before the purge, so listings rebuild with it."""
+    if issubclass(sender, ArticlePage):
+        transaction.on_commit(lambda: sync_cards([instance.pk]))
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def purge_page(sender, instance, **kwargs):
+    """Drop cached pages showing a page that was published or unpublished."""
+    tags = page_cache_tags(instance.specific)
+    transaction.on_commit(lambda: purge_tags(*tags))
+
+
+@receiver(post_delete, sender=ArticlePage)
+def purge_deleted_article(sender, instance, **kwargs):
+    purge_tags(f"article:{instance.id}", "sitemap", "feed")
+
+
+@receiver(pre_delete, sender=ArticlePage)
+def recount_deleted_article_tags(sender, instance, **kwargs):
+    """Recount the tags of a deleted article; its tags are gone by post_delete."""
+    slugs = [tag.slug for tag in instance.tags.all()]
+    transaction.on_commit(lambda: refresh_tag_stats(slugs))
+
+
+@receiver(pre_delete, sender=ArticlePage)
+def purge_deleted_article_most_read(sender, instance, **kwargs):
+    """Drop the most read lists showing a deleted article; its stats are gone by post_delete."""
+    tags = most_read_tags_showing(instance.id, instance.category_id)
+    if tags:
+        transaction.on_commit(lambda: forget_most_read(tags))
+
+
+@receiver(pre_delete, sender=ArticlePage)
+def recount_deleted_article_month(sender, instance, **kwargs):
+    """Recount the archive month of a deleted article; its card goes in the cascade."""
+    if instance.published_at is None:
+        return
+    month = month_of(instance.published_at)
+    transaction.on_commit(lambda: refresh_archive_months([month]))
+
+
+@receiver(post_save, sender=Category)
+def sync_listing_flags(sender, instance, **kwargs):
+    """Copy a category's listing flags to its articles and their cards."""
+    flags = {
+        "listed_on_home": not instance.exclude_from_home,
+        "listed_in_related": not instance.exclude_from_related,
+    }
+    changed = Q(listed_on_home=not flags["listed_on_home"]) | Q(listed_in_related=not flags["listed_in_related"])
+    ArticlePage.objects.filter(changed, category=instance).update(**flags)
+    # Cached pages go with the "site" purge below
+    ArticleCard.objects.filter(changed, category=instance).update(**flags)
+    forget_listing_flags(sender, instance)
+
+
+@receiver(post_delete, sender=Category)
+def forget_listing_flags(sender, instance, **kwargs):
+    category_cache.delete("listing-flags")
+    # Again once committed, in case another request cached the old flags meanwhile
+    transaction.on_commit(lambda: category_cache.delete("listing-flags"))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=SiteSettings)
+def purge_site(sender, **kwargs):
+    """Categories and site settings appear in the layout of every page."""
+    transaction.on_commit(lambda: purge_tags(SITE_TAG))
@@ -0,0 +1,345 @@
+"""
+Media storage with a local content-addressed cache in front of a remote store.
+
+``CachedMediaStorage`` keeps originals and renditions on local disk and
+serves URLs from a deterministic path scheme (``base_url + name``), so
+rendering a page never asks the remote store anything. Every saved file
+name embeds a hash of its content, which makes the files immutable: a CDN
+can cache them forever and two uploads of the same bytes share one file.
+
+Writes go to disk first and are copied to an optional upstream storage
+(Cloudinary in production) by a background thread pool. A file the
+upstream has confirmed gets an empty marker under ``.uploaded/``; when the
+cache grows past ``max_size`` only the least recently used files with a
+marker are evicted, and they are fetched again on the next miss. Files
+without one, because their upload failed or the process stopped first,
+are queued again by ``requeue_unconfirmed`` when a worker starts.
+Without an upstream the cache is the only copy and nothing is evicted,
+which is how dev and test run fully offline.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import Storage, storages
+from django.utils._os import safe_join
+from django.utils.deconstruct import deconstructible
+from django.utils.encoding import filepath_to_uri
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+HASH_LENGTH = 12
+UPLOAD_RETRIES = 3
+TEMP_PREFIX = ".tmp-"
+# Under the cache directory; holds an empty file per confirmed upload
+MARKER_DIR = ".uploaded"
+
+
+def hashed_name(name, digest):
+    """Insert the first characters of ``digest`` before the file extension."""
+    directory, filename = os.path.split(name)
+    stem, ext = os.path.splitext(filename)
+    suffix = digest[:HASH_LENGTH]
+    if stem.endswith(f".{suffix}"):
+        return name
+    return os.path.join(directory, f"{stem}.{suffix}{ext}")
+
+
+@deconstructible
+class CachedMediaStorage(Storage):
+    """
+    Local content-addressed media cache with asynchronous upstream uploads.
+
+    Options (``STORAGES["default"]["OPTIONS"]``):
+
+    * ``location``: cache directory, defaults to ``MEDIA_ROOT``
+    * ``base_url``: URL prefix, defaults to ``MEDIA_URL`` (point it at a CDN)
+    * ``max_size``: cache size in bytes before LRU eviction, ``None`` for no limit
+    * ``upstream``: storage alias or dotted class path of the remote store
+    * ``upload_workers``: threads used for background uploads
+    """
+
+    def __init__(self, location=None, base_url=None, max_size=None, upstream=None,
+                 upload_workers=2):
+        self._location = location
+        self._base_url = base_url
+        self.max_size = max_size
+        self.upstream_setting = upstream
+        self.upload_workers = upload_workers
+
+        self._upstream = None
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._cache_size = None
+
+    # Configuration ---------------------------------------------------------
+
+    @property
+    def location(self):
+        return Path(self._location or settings.MEDIA_ROOT)
+
+    @property
+    def base_url(self):
+        base_url = self._base_url or settings.MEDIA_URL
+        return base_url if base_url.endswith("/") else f"{base_url}/"
+
+    @property
+    def upstream(self):
+        if self._upstream is None and self.upstream_setting:
+            if "." in self.upstream_setting:
+                self._upstream = import_string(self.upstream_setting)()
+            else:
+                self._upstream = storages[self.upstream_setting]
+        return self._upstream
+
+    def path(self, name):
+        return safe_join(self.location, name)
+
+    # Storage API -----------------------------------------------------------
+
+    def url(self, name):
+        return f"{self.base_url}{filepath_to_uri(name).lstrip('/')}"
+
+    def exists(self, name):
+        if os.path.exists(self.path(name)):
+            return True
+        return bool(self.upstream and self.upstream.exists(name))
+
+    def get_available_name(self, name, max_length=None):
+        # Names are made unique by their content hash in _save
+        return name
+
+    def _open(self, name, mode="rb"):
+        path = self.path(name)
+        if not os.path.exists(path):
+            self._fetch(name)
+        self._touch(path)
+        # Named after the real path, like FileSystemStorage, so it can be reopened
+        return File(open(path, mode))
+
+    def _save(self, name, content):
+        self.location.mkdir(parents=True, exist_ok=True)
+        hasher = hashlib.sha1()
+        with tempfile.NamedTemporaryFile(
+            dir=self.location, prefix=TEMP_PREFIX, delete=False
+        ) as tmp:
+            if hasattr(content, "seek"):
+                try:
+                    content.seek(0)
+                except Exception:
+                    pass
+            for chunk in content.chunks():
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                hasher.update(chunk)
+                tmp.write(chunk)
+
+        name = hashed_name(name, hasher.hexdigest())
+        path = self.path(name)
+        if os.path.exists(path):
+            # Same content already cached
+            os.unlink(tmp.name)
+            self._touch(path)
+            return name
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp.name, path)
+        self._account(os.path.getsize(path))
+        self._schedule_upload(name)
+        self._evict()
+        return name
+
+    def delete(self, name):
+        path = self.path(name)
+        if os.path.exists(path):
+            size = os.path.getsize(path)
+            os.unlink(path)
+            self._account(-size)
+        try:
+            os.unlink(self._marker_path(name))
+        except OSError:
+            pass
+        if self.upstream:
+            self._submit(self._upstream_delete, name)
+
+    def size(self, name):
+        path = self.path(name)
+        if os.path.exists(path):
+            return os.path.getsize(path)
+        if self.upstream:
+            return self.upstream.size(name)
+        raise FileNotFoundError(name)
+
+    def listdir(self, path):
+        directories, files = [], []
+        full = self.location / path
+        if full.is_dir():
+            for entry in os.scandir(full):
+                (directories if entry.is_dir() else files).append(entry.name)
+        return directories, files
+
+    def get_modified_time(self, name):
+        return datetime.fromtimestamp(os.path.getmtime(self.path(name)), timezone.utc)
+
+    # Upstream synchronisation ---------------------------------------------
+
+    def _submit(self, func, *args):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.upload_workers, thread_name_prefix="media-upload"
+                )
+            return self._executor.submit(func, *args)
+
+    def _schedule_upload(self, name):
+        if not self.upstream:
+            return
+        with self._lock:
+            if name in self._pending:
+                return
+            self._pending[name] = None
+        future = self._submit(self._upload, name)
+        with self._lock:
+            if name in self._pending:
+                self._pending[name] = future
+
+    def _upload(self, name):
+        try:
+            for attempt in range(1, UPLOAD_RETRIES + 1):
+                try:
+                    if not self.upstream.exists(name):
+                        with open(self.path(name), "rb") as f:
+                            stored = self.upstream.save(name, File(f, name=name))
+                        if stored != name:
+                            logger.warning("Upstream stored %s as %s", name, stored)
+                    self._confirm(name)
+                    return
+                except Exception as e:
+                    logger.warning("Upload of %s failed (attempt %s): %s", name, attempt, e)
+            # Unconfirmed, so never evicted; retried by requeue_unconfirmed
+            logger.error("Giving up uploading %s; it stays in the local cache", name)
+        finally:
+            with self._lock:
+                self._pending.pop(name, None)
+
+    def _marker_path(self, name):
+        return safe_join(self.location / MARKER_DIR, name)
+
+    def _confirm(self, name):
+        """Record that the upstream holds ``name``, which makes it evictable."""
+        marker = self._marker_path(name)
+        os.makedirs(os.path.dirname(marker), exist_ok=True)
+        Path(marker).touch()
+
+    def _is_confirmed(self, name):
+        return os.path.exists(self._marker_path(name))
+
+    def requeue_unconfirmed(self):
+        """Schedule the upload of every cached file the upstream has not confirmed."""
+        if not self.upstream:
+            return 0
+        names = [
+            os.path.relpath(path, self.location)
+            for path, _ in self._iter_files()
+        ]
+        unconfirmed = [name for name in names if not self._is_confirmed(name)]
+        for name in unconfirmed:
+            self._schedule_upload(name)
+        if unconfirmed:
+            logger.info("Queued %s unconfirmed media uploads", len(unconfirmed))
+        return len(unconfirmed)
+
+    def _upstream_delete(self, name):
+        try:
+            self.upstream.delete(name)
+        except Exception as e:
+            logger.warning("Upstream delete of %s failed: %s", name, e)
+
+    def _fetch(self, name):
+        """Copy a file from the upstream into the cache after a miss."""
+        if not self.upstream:
+            raise FileNotFoundError(name)
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.upstream.open(name, "rb") as remote, tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(path), prefix=TEMP_PREFIX, delete=False
+        ) as tmp:
+            shutil.copyfileobj(remote, tmp)
+        os.replace(tmp.name, path)
+        self._confirm(name)
+        self._account(os.path.getsize(path))
+        self._evict(keep=path)
+
+    def flush(self, timeout=None):
+        """Block until every background upload has finished."""
+        with self._lock:
+            futures = [future for future in self._pending.values() if future]
+        for future in futures:
+            future.result(timeout=timeout)
+
+    # LRU cache management --------------------------------------------------
+
+    @staticmethod
+    def _touch(path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _iter_files(self):
+        for root, directories, files in os.walk(self.location):
+            if root == str(self.location) and MARKER_DIR in directories:
+                directories.remove(MARKER_DIR)
+            for filename in files:
+                if filename.startswith(TEMP_PREFIX):
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat
+
+    def _account(self, delta):
+        with self._lock:
+            if self._cache_size is not None:
+                self._cache_size += delta
+
+    def cache_size(self):
+        with self._lock:
+            if self._cache_size is None:
+                self._cache_size = sum(stat.st_size for _, stat in self._iter_files())
+            return self._cache_size
+
+    def _evict(self, keep=None):
+        # Without an upstream the cache is the only copy of the file
+        if not self.max_size or not self.upstream or self.cache_size() <= self.max_size:
+            return
+
+        # Only files the upstream confirmed; the rest may be the only copy
+        candidates = sorted(
+            (stat.st_mtime, path, stat.st_size)
+            for path, stat in self._iter_files()
+            if path != keep and self._is_confirmed(os.path.relpath(path, self.location))
+        )
+        size = self.cache_size()
+        for _, path, file_size in candidates:
+            if size <= self.max_size:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            size -= file_size
+            self._account(-file_size)
@@ -0,0 +1,79 @@
+"""
+Streamed rendering of long article pages.
+
+A buffered page sends nothing until the whole StreamField body has been
+rendered, so the time to first byte of a long guide includes every block.
+``stream_page`` renders the page template with ``body_marker`` in place of
+the body instead, sends everything before the marker (``<head>`` with its
+stylesheets and the cover preload, the article header and cover) at once,
+then renders and sends the body blocks one by one, and the rest of the
+page last. Related and most read articles are looked up in ``get_context``
+and are cheap next to the body.
+
+Streaming only pays off with many blocks and only works when nothing needs
+the whole page up front: page cache fills (``news.page_cache``), bakes
+previews and ``HEAD`` requests get the buffered page (``should_stream``).
+
+Under ASGI (the ``uvicorn`` profile of ``gunicorn.conf.py``) Django reads a
+sync iterator to the end before sending anything, so there the response
+gets an async iterator that renders each chunk in the view's thread.
+"""
+
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .baking import BAKE_HEADER
+from .page_cache import is_cache_fill
+
+logger = logging.getLogger(__name__)
+
+BODY_MARKER = "<!--stream:body-->"
+
+
+def should_stream(request, body):
+    """Whether to stream a page with the StreamField value ``body``."""
+    min_blocks = settings.ARTICLE_STREAMING_MIN_BLOCKS
+    if min_blocks <= 0 or len(body) < min_blocks:
+        return False
+    # A HEAD response has no body to stream
+    if request.method == "HEAD":
+        return False
+    if getattr(request, "is_preview", False) or BAKE_HEADER in request.headers:
+        return False
+    # The page cache stores whole responses
+    return not is_cache_fill(request)
+
+
+async def _aiterate(chunks):
+    # thread_sensitive: rendering uses the view's database connection
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    done = object()
+    while (chunk := await next_chunk(chunks, done)) is not done:
+        yield chunk
+
+
+def stream_page(request, template_name, context, body):
+    """``StreamingHttpResponse`` of ``template_name`` with the blocks of ``body`` streamed."""
+    def render():
+        html = render_to_string(template_name, {**context, "body_marker": mark_safe(BODY_MARKER)}, request)
+        head, tail = html.split(BODY_MARKER, 1)
+        yield head
+        block_context = {**context, "request": request}
+        for block in body:
+            try:
+                yield block.render_as_block(block_context)
+            except Exception:
+                # The status line is out already; keep the rest of the page
+                logger.exception("Rendering %s block of %s failed", block.block_type, request.path)
+        yield tail
+
+    chunks = render()
+    if isinstance(request, ASGIRequest):
+        chunks = _aiterate(chunks)
+    return StreamingHttpResponse(chunks, content_type="text/html; charset=utf-8")
@@ -0,0 +1,96 @@
+"""
+Maintenance of ``TagStats`` and the tag cloud built from it.
+
+``refresh_tag_stats`` recounts only the tags given, with one grouped query;
+``sync_cards`` calls it with the tags an article had and has, so a publish
+touches the rows of that article's tags and nothing else. ``rebuild_tag_stats``
+recounts every tag, for the migration and ``build_article_cards``.
+"""
+
+import math
+
+from django.db.models import Count, Max
+from taggit.models import Tag
+
+from .cache_tags import purge_tags
+from .models import ArticlePageTag, TagStats
+
+TAG_INDEX_TAG = "tags"
+
+# Font size steps of the tag cloud
+CLOUD_WEIGHTS = 5
+
+
+def _counts(tag_ids=None):
+    """``{tag_id: (live articles, latest published_at)}`` for tags in use."""
+    items = ArticlePageTag.objects.filter(content_object__is_live=True)
+    if tag_ids is not None:
+        items = items.filter(tag_id__in=tag_ids)
+    rows = items.values("tag_id").annotate(
+        count=Count("content_object_id", distinct=True),
+        latest=Max("content_object__published_at"),
+    ).order_by()
+    return {row["tag_id"]: (row["count"], row["latest"]) for row in rows}
+
+
+def refresh_tag_stats(slugs):
+    """Recount the tags with ``slugs``; returns the slugs whose stats changed."""
+    tags = dict(Tag.objects.filter(slug__in=set(slugs)).values_list("pk", "slug"))
+    if not tags:
+        return []
+    counts = _counts(tags)
+    current = {
+        stats.tag_id: (stats.article_count, stats.latest_published_at)
+        for stats in TagStats.objects.filter(tag_id__in=tags)
+    }
+    changed = []
+    for tag_id, slug in tags.items():
+        count, latest = counts.get(tag_id, (0, None))
+        if current.get(tag_id) == (count, latest):
+            continue
+        TagStats.objects.update_or_create(
+            tag_id=tag_id, defaults={"article_count": count, "latest_published_at": latest}
+        )
+        changed.append(slug)
+    if changed:
+        purge_tags(TAG_INDEX_TAG, *(f"tag:{slug}" for slug in changed))
+    return changed
+
+
+def rebuild_tag_stats():
+    """Recount every tag; returns the number of tags in use."""
+    counts = _counts()
+    TagStats.objects.exclude(tag_id__in=counts).filter(article_count__gt=0).update(
+        article_count=0, latest_published_at=None
+    )
+    for tag_id, (count, latest) in counts.items():
+        TagStats.objects.update_or_create(
+            tag_id=tag_id, defaults={"article_count": count, "latest_published_at": latest}
+        )
+    purge_tags(TAG_INDEX_TAG)
+    return len(counts)
+
+
+def tag_cloud(limit=100):
+    """The ``limit`` most used tags by name, each with a ``weight`` from 1 to ``CLOUD_WEIGHTS``."""
+    stats = list(
+        TagStats.objects.filter(article_count__gt=0)
+        .select_related("tag")
+        .order_by("-article_count")[:limit]
+    )
+    if not stats:
+        return []
+    # Log scale, so a few very common tags don't flatten the rest
+    low = math.log(min(s.article_count for s in stats))
+    spread = math.log(max(s.article_count for s in stats)) - low
+    cloud = []
+    for s in stats:
+        position = (math.log(s.article_count) - low) / spread if spread else 0.5
+        cloud.append({
+            "name": s.tag.name,
+            "slug": s.tag.slug,
+            "count": s.article_count,
+            "latest_published_at": s.latest_published_at,
+            "weight": 1 + round(position * (CLOUD_WEIGHTS - 1)),
+        })
+    return sorted(cloud, key=lambda tag: tag["name"].lower())
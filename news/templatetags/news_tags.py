@@ -88,6 +88,61 @@ def related_articles(context, article, limit=3):
     return {"related_articles": related}
 
 
+@register.inclusion_tag("news/tags/most_read.html", takes_context=True)
+def most_read(context, category=None, limit=None):
+    """The most read articles, in ``category`` or on the whole site."""
+    from news.cache_tags import add_cache_tags
+    from news.popularity import MOST_READ_LIMIT, most_read_tag
+    from news.popularity import most_read as ranking
+
+    category_id = category.id if category else None
+    # Purged when the list changes, see news.popularity
+    add_cache_tags(context.get("request"), most_read_tag(category_id))
+    return {
+        "articles": ranking(category_id, limit or MOST_READ_LIMIT),
+        "category": category,
+    }
+
+
+@register.simple_tag(takes_context=True)
+def responsive_image(context, image, breakpoint, alt="", **attrs):
+    """
+    Render ``image`` as a ``<picture>`` with AVIF/WebP/JPEG sources.
+
+    ``breakpoint`` names an entry in ``news.responsive_images.BREAKPOINTS``.
+    Pictures preloaded by the view are reused instead of queried one by one,
+    and the cover of an ``ArticleCard`` carries its pictures with it.
+
+    Usage: {% responsive_image article.cover_image "card" alt=article.title class="sidebar-article-image" %}
+    """
+    from news.cards import CardImage
+    from news.responsive_images import get_picture, render_picture
+
+    if not image:
+        return ""
+    if isinstance(image, CardImage):
+        picture = image.picture(breakpoint)
+        if picture is None:
+            return ""
+    else:
+        picture = get_picture(image, breakpoint, context.get("request"))
+    return render_picture(picture, alt, **attrs)
+
+
+@register.simple_tag(takes_context=True)
+def preload_image(context, image, breakpoint):
+    """
+    Preload hint for the picture ``responsive_image`` will show, for ``<head>``.
+
+    Usage: {% preload_image page.cover_image "cover" %}
+    """
+    from news.responsive_images import get_picture, render_preload
+
+    if not image:
+        return ""
+    return render_preload(get_picture(image, breakpoint, context.get("request")))
+
+
 @register.simple_tag
 def json_ld_organization():
     """Generate JSON-LD for organization."""
@@ -0,0 +1,220 @@
+"""
+Text utilities for the news app.
+
+The translation engine compiles an English -> Danish phrase dictionary once
+into a character trie and rewrites text in a single left-to-right pass:
+
+* the longest phrase starting at a position wins, so dictionary order no
+  longer matters;
+* phrases only match on word boundaries, so "team" never rewrites "steam";
+* markup is left untouched, only the text between HTML tags is translated;
+* the case of the source text is carried over to the replacement.
+
+The same compiled trie powers ``find_untranslated`` which flags English
+phrases that are still present, cheap enough to run over the whole archive.
+"""
+
+import html
+import re
+from dataclasses import dataclass
+
+TAG_RE = re.compile(r"(<[^>]*>)")
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == "_"
+
+
+@dataclass(frozen=True)
+class PhraseMatch:
+    """A dictionary phrase found in a piece of text."""
+
+    phrase: str
+    replacement: str
+    start: int
+    end: int
+
+    @property
+    def is_untranslated(self):
+        return self.phrase != self.replacement
+
+
+class _Node:
+    __slots__ = ("children", "variants")
+
+    def __init__(self):
+        self.children = {}
+        # Exact source spelling -> replacement for every phrase ending here
+        self.variants = None
+
+
+def _match_case(source, replacement):
+    """Carry the casing of ``source`` over to ``replacement``."""
+    if source.isupper() and len(source) > 1:
+        return replacement.upper()
+    if source[:1].isupper():
+        return replacement[:1].upper() + replacement[1:]
+    if source[:1].islower():
+        return replacement[:1].lower() + replacement[1:]
+    return replacement
+
+
+class Translator:
+    """
+    Phrase dictionary compiled into a trie for longest-match translation.
+
+    Build it once per process and reuse it; compiling is the only step that
+    depends on the size of the dictionary.
+    """
+
+    def __init__(self, phrases, html_aware=True):
+        self.root = _Node()
+        self.max_length = 0
+        self.html_aware = html_aware
+        for phrase, replacement in phrases.items():
+            self._add(phrase, replacement)
+            escaped = html.escape(phrase, quote=False)
+            if html_aware and escaped != phrase:
+                # Rich text stores "Q&A" as "Q&amp;A"
+                self._add(escaped, html.escape(replacement, quote=False))
+
+    def _add(self, phrase, replacement):
+        if not phrase:
+            return
+        node = self.root
+        for char in phrase.casefold():
+            node = node.children.setdefault(char, _Node())
+        if node.variants is None:
+            node.variants = {}
+        node.variants.setdefault(phrase, replacement)
+        self.max_length = max(self.max_length, len(phrase))
+
+    def _longest_match(self, text, start):
+        """Return ``(end, source, replacement)`` for the longest phrase at ``start``."""
+        if start > 0 and _is_word_char(text[start]) and _is_word_char(text[start - 1]):
+            return None
+
+        node = self.root
+        best = None
+        length = len(text)
+        position = start
+        while position < length:
+            node = node.children.get(text[position].casefold())
+            if node is None:
+                break
+            position += 1
+            if node.variants is None:
+                continue
+            if (
+                position < length
+                and _is_word_char(text[position - 1])
+                and _is_word_char(text[position])
+            ):
+                continue
+            best = (position, node.variants)
+
+        if best is None:
+            return None
+
+        end, variants = best
+        source = text[start:end]
+        if source in variants:
+            return end, source, variants[source]
+        # Fall back to the lower-case entry (or any entry) and re-case it
+        replacement = variants.get(source.lower()) or next(iter(variants.values()))
+        return end, source, _match_case(source, replacement)
+
+    def _scan(self, text):
+        """Yield every non-overlapping phrase match in plain ``text``."""
+        position = 0
+        length = len(text)
+        while position < length:
+            match = self._longest_match(text, position)
+            if match is None:
+                position += 1
+                continue
+            end, source, replacement = match
+            yield PhraseMatch(source, replacement, position, end)
+            position = end
+
+    def _segments(self, text):
+        """Split ``text`` into ``(offset, segment, is_markup)`` chunks."""
+        if not self.html_aware:
+            yield 0, text, False
+            return
+        offset = 0
+        for segment in TAG_RE.split(text):
+            if segment:
+                yield offset, segment, segment.startswith("<") and segment.endswith(">")
+            offset += len(segment)
+
+    def translate(self, text):
+        """Return ``text`` with every dictionary phrase translated."""
+        if not text:
+            return text
+        parts = []
+        for _, segment, is_markup in self._segments(text):
+            if is_markup:
+                parts.append(segment)
+                continue
+            position = 0
+            for match in self._scan(segment):
+                parts.append(segment[position:match.start])
+                parts.append(match.replacement)
+                position = match.end
+            parts.append(segment[position:])
+        return "".join(parts)
+
+    def find_untranslated(self, text):
+        """Return matches for phrases in ``text`` that would still be translated."""
+        if not text:
+            return []
+        found = []
+        for offset, segment, is_markup in self._segments(text):
+            if is_markup:
+                continue
+            for match in self._scan(segment):
+                if match.is_untranslated:
+                    found.append(
+                        PhraseMatch(
+                            match.phrase,
+                            match.replacement,
+                            match.start + offset,
+                            match.end + offset,
+                        )
+                    )
+        return found
+
+    def translate_stream(self, items):
+        """
+        Translate an iterable of ``(key, text)`` pairs lazily.
+
+        Yields ``(key, translated_text, changed)`` so callers can walk the
+        whole archive without holding it in memory.
+        """
+        for key, text in items:
+            translated = self.translate(text)
+            yield key, translated, translated != text
+
+
+def iter_rich_text_blocks(articles):
+    """Yield ``((article, index), html)`` for every rich text block in ``articles``."""
+    for article in articles:
+        if not article.body:
+            continue
+        for index, block in enumerate(article.body.raw_data):
+            if block.get("type") == "rich_text" and isinstance(block.get("value"), str):
+                yield (article, index), block["value"]
+
+
+_danish_translator = None
+
+
+def get_danish_translator():
+    """Return the process-wide translator for the Danish dictionary."""
+    global _danish_translator
+    if _danish_translator is None:
+        from .danish_dictionary import DANISH_TRANSLATIONS
+
+        _danish_translator = Translator(DANISH_TRANSLATIONS)
+    return _danish_translator
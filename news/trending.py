@@ -0,0 +1,132 @@
+"""
+"Trender nu": articles ranked by their views over the last hours.
+
+Every view count flush (see ``news.popularity``) hands this module the
+views per article since the previous flush. They go into a ring buffer of
+per-minute counters per article, ``TRENDING_WINDOW_MINUTES`` long, kept in
+the ``default`` cache as one value that only the flushing worker writes.
+Rings that have emptied are dropped, so the state grows with the number of
+articles viewed inside the window, not with the archive.
+
+Each minute's counts are weighted by ``exp(-age / tau)``, with ``tau``
+from ``TRENDING_HALF_LIFE_MINUTES``, and the top articles are stored as a
+small list of cards that the home page reads. The ``trending`` cache tag
+is purged only when that list changes.
+"""
+
+import math
+
+from django.conf import settings
+from django.utils import timezone
+
+from .cache import get_backend, popular_cache
+from .cache_tags import purge_tags
+from .models import ArticleCard
+
+STATE_KEY = "trending:window"
+LIST_KEY = "trending"
+TRENDING_TAG = "trending"
+LIST_SIZE = 10
+
+
+def current_minute(now=None):
+    return int((now or timezone.now()).timestamp() // 60)
+
+
+class MinuteRing:
+    """Views per minute over the last ``window`` minutes, in a fixed-size ring."""
+
+    __slots__ = ("window", "minute", "counts")
+
+    def __init__(self, window, minute, counts=None):
+        self.window = window
+        # The newest minute the ring holds
+        self.minute = minute
+        self.counts = counts or [0] * window
+
+    def advance(self, minute):
+        """Move the ring forward to ``minute``, clearing the slots it passes."""
+        if minute <= self.minute:
+            return
+        for m in range(self.minute + 1, min(minute, self.minute + self.window) + 1):
+            self.counts[m % self.window] = 0
+        self.minute = minute
+
+    def add(self, minute, count):
+        self.advance(minute)
+        if minute > self.minute - self.window:
+            self.counts[minute % self.window] += count
+
+    def score(self, minute, tau):
+        """Views in the window, each weighted down by its age in minutes."""
+        self.advance(minute)
+        return sum(
+            self.counts[m % self.window] * math.exp(-(minute - m) / tau)
+            for m in range(minute - self.window + 1, minute + 1)
+        )
+
+    def is_empty(self):
+        return not any(self.counts)
+
+    def to_list(self):
+        return [self.minute, *self.counts]
+
+    @classmethod
+    def from_list(cls, window, data):
+        minute, counts = data[0], list(data[1:])
+        if len(counts) != window:
+            # TRENDING_WINDOW_MINUTES changed; start the ring over
+            return cls(window, minute)
+        return cls(window, minute, counts)
+
+
+def _window():
+    return settings.TRENDING_WINDOW_MINUTES
+
+
+def _tau():
+    return settings.TRENDING_HALF_LIFE_MINUTES / math.log(2)
+
+
+def load_rings():
+    window = _window()
+    state = get_backend("default").get(STATE_KEY) or {}
+    return {int(article_id): MinuteRing.from_list(window, data) for article_id, data in state.items()}
+
+
+def save_rings(rings):
+    state = {article_id: ring.to_list() for article_id, ring in rings.items()}
+    # Outlives a few missed flushes, not an hour without any
+    get_backend("default").set(STATE_KEY, state, _window() * 60)
+
+
+def update_trending(counts, now=None):
+    """Add ``{article_id: views}`` for this minute and recompute the list.
+
+    Returns the IDs of the trending articles, best first.
+    """
+    minute = current_minute(now)
+    window = _window()
+    rings = load_rings()
+    for article_id, views in counts.items():
+        rings.setdefault(article_id, MinuteRing(window, minute)).add(minute, views)
+
+    tau = _tau()
+    scores = {article_id: ring.score(minute, tau) for article_id, ring in rings.items()}
+    rings = {article_id: ring for article_id, ring in rings.items() if not ring.is_empty()}
+    save_rings(rings)
+
+    ranked = sorted(rings, key=lambda article_id: scores[article_id], reverse=True)
+    # Podcasts and other categories kept off the home page stay off here
+    cards = ArticleCard.objects.filter(listed_on_home=True).in_bulk(ranked[:LIST_SIZE * 2])
+    trending_ids = [article_id for article_id in ranked if article_id in cards][:LIST_SIZE]
+    previous = [card.id for card in popular_cache.get(LIST_KEY) or []]
+    popular_cache.set(LIST_KEY, [cards[article_id] for article_id in trending_ids], 10 * 60)
+    if trending_ids != previous:
+        purge_tags(TRENDING_TAG)
+    return trending_ids
+
+
+def trending(limit=5):
+    """Cards of the articles trending now, as of the last flush."""
+    return (popular_cache.get(LIST_KEY) or [])[:limit]
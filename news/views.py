@@ -2,14 +2,27 @@
 Views for the news app.
 """
 
+from django.conf import settings
 from django.contrib.sitemaps import Sitemap
 from django.contrib.syndication.views import Feed
-from django.http import HttpResponse, Http404
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, Http404, JsonResponse
 from django.shortcuts import render, get_object_or_404
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 
-from .models import ArticlePage, Category
+from .cache_policy import set_cache_policy
+from .cache_tags import add_cache_tags, article_tags
+from .instrumentation import collect
+from .archive import ARCHIVE_TAG, is_past_month, month_bounds, month_cards, month_tag, neighbours
+from .models import ArchiveMonth, ArticleCard, ArticlePage, ArticlePageTag, Category
+from .pagination import CountedPaginator
+from .popularity import is_bot, live_article_ids, record_view
+from .preload import preload_lead
+from .tag_stats import TAG_INDEX_TAG, tag_cloud
 
 
 def robots_txt(request):
@@ -39,8 +52,11 @@ def sitemap_index(request):
         "articles": ArticleSitemap,
         "categories": CategorySitemap,
         "static": StaticSitemap,
+        "archive": ArchiveSitemap,
     }
 
+    add_cache_tags(request, "sitemap")
+    set_cache_policy(request, "sitemap")
     return index(request, sitemaps)
 
 
@@ -52,8 +68,11 @@ def sitemap_section(request, section):
         "articles": ArticleSitemap,
         "categories": CategorySitemap,
         "static": StaticSitemap,
+        "archive": ArchiveSitemap,
     }
 
+    add_cache_tags(request, "sitemap")
+    set_cache_policy(request, "sitemap")
     return sitemap(request, sitemaps, section)
 
 
@@ -62,41 +81,86 @@ def health_check(request):
     return HttpResponse("OK", content_type="text/plain")
 
 
+def metrics(request):
+    """Cache and worker metrics of the process serving the request.
+
+    Open to staff users, or to scrapers sending ``Authorization: Bearer``
+    with ``METRICS_TOKEN``.
+    """
+    token = settings.METRICS_TOKEN
+    authorised = request.user.is_staff or (
+        token and constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}")
+    )
+    if not authorised:
+        return HttpResponse(status=403)
+    response = JsonResponse(collect())
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+@csrf_exempt
+@require_POST
+def article_view(request, article_id):
+    """Count a view of an article, sent by a beacon once the page is shown.
+
+    Cached and baked pages never reach Django, so the count comes from the
+    browser. Nothing is written to the database here; see news.popularity.
+    """
+    if not is_bot(request) and article_id in live_article_ids():
+        record_view(article_id)
+    response = HttpResponse(status=204)
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+def media_file(request, path):
+    """Serve a media file from the local media cache.
+
+    Names stored by ``CachedMediaStorage`` embed a content hash, so the
+    response can be cached by browsers and the CDN indefinitely.
+    """
+    try:
+        media = default_storage.open(path, "rb")
+    except Exception:
+        # Missing locally and upstream, unreachable upstream or a bad path
+        raise Http404("Media file not found")
+
+    response = FileResponse(media)
+    response["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
+
 def article_detail(request, slug):
     """Article detail view."""
     article = get_object_or_404(ArticlePage, slug=slug)
 
-    # Get related articles from same category (excluding podcasts)
-    from news.models import Category
-    podcast_category = Category.objects.filter(slug='podcasts').first()
-
-    related_query = ArticlePage.objects.filter(
-        live=True,
-        category=article.category
-    ).exclude(id=article.id)
-
-    if podcast_category:
-        related_query = related_query.exclude(category=podcast_category)
+    # Get related articles from same category (excluding categories
+    # marked exclude_from_related, such as Podcasts)
+    related_query = ArticleCard.objects.filter(
+        category=article.category, listed_in_related=True
+    ).exclude(article_id=article.id)
 
     related_articles = list(related_query.order_by('-published_at')[:3])
 
-    # If not enough related by category, get from other categories (excluding podcasts)
+    # If not enough related by category, get from other categories
     if len(related_articles) < 3:
-        additional_query = ArticlePage.objects.filter(live=True).exclude(id=article.id)
+        additional_query = ArticleCard.objects.filter(
+            listed_in_related=True
+        ).exclude(article_id=article.id)
 
-        if podcast_category:
-            additional_query = additional_query.exclude(category=podcast_category)
-
-        # Exclude current category and already selected articles
+        # Exclude current category; the articles selected so far are all in it
         additional_query = additional_query.exclude(category=article.category)
-        if related_articles:
-            additional_query = additional_query.exclude(
-                id__in=[art.id for art in related_articles]
-            )
 
         additional_related = list(additional_query.order_by('-published_at')[:3 - len(related_articles)])
         related_articles = related_articles + additional_related
 
+    add_cache_tags(
+        request,
+        f"category:{article.category_id}",
+        *article_tags(article, *related_articles),
+    )
+    set_cache_policy(request, "article")
+
     context = {
         'page': article,
         'related_articles': related_articles,
@@ -108,19 +172,21 @@ def article_detail(request, slug):
 def tag_detail(request, tag_slug):
     """Tag detail view - shows all articles with a specific tag."""
     from taggit.models import Tag
-    from django.core.paginator import Paginator
 
-    tag = get_object_or_404(Tag, slug=tag_slug)
+    tag = get_object_or_404(Tag.objects.select_related("stats"), slug=tag_slug)
 
-    # Get articles with this tag
-    articles = ArticlePage.objects.live().filter(
-        tags__slug=tag_slug
+    # Get articles with this tag, from the tagged items straight to the cards
+    articles = ArticleCard.objects.filter(
+        article_id__in=ArticlePageTag.objects.filter(tag=tag).values("content_object_id")
     ).order_by("-published_at")
 
-    # Pagination
-    paginator = Paginator(articles, 12)
+    # Pagination, counted by TagStats instead of a COUNT over the join
+    stats = getattr(tag, "stats", None)
+    paginator = CountedPaginator(articles, 12, count=stats.article_count if stats else None)
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
+    add_cache_tags(request, f"tag:{tag.slug}", *article_tags(*page_obj))
+    set_cache_policy(request, "listing")
 
     context = {
         'tag': tag,
@@ -131,6 +197,19 @@ def tag_detail(request, tag_slug):
     return render(request, 'news/tag_page.html', context)
 
 
+def tag_index(request):
+    """Tag index view - the tag cloud of every tag in use."""
+    add_cache_tags(request, TAG_INDEX_TAG)
+    set_cache_policy(request, "listing")
+
+    context = {
+        'tags': tag_cloud(),
+        'page_title': 'Emner',
+    }
+
+    return render(request, 'news/tag_index.html', context)
+
+
 def category_detail(request, category_slug):
     """Category detail view - shows all articles in a specific category."""
     from django.core.paginator import Paginator
@@ -138,7 +217,7 @@ def category_detail(request, category_slug):
     category = get_object_or_404(Category, slug=category_slug)
 
     # Get articles in this category
-    articles = ArticlePage.objects.live().filter(
+    articles = ArticleCard.objects.filter(
         category=category
     ).order_by("-published_at")
 
@@ -146,6 +225,9 @@ def category_detail(request, category_slug):
     paginator = Paginator(articles, 12)
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
+    add_cache_tags(request, f"category:{category.id}", *article_tags(*page_obj))
+    set_cache_policy(request, "listing")
+    preload_lead(request, page_obj[0] if page_obj else None)
 
     context = {
         'category': category,
@@ -156,14 +238,61 @@ def category_detail(request, category_slug):
     return render(request, 'news/category_page.html', context)
 
 
+def archive_index(request):
+    """Archive index view - every month with articles, grouped by year."""
+    years = {}
+    for bucket in ArchiveMonth.objects.filter(article_count__gt=0):
+        years.setdefault(bucket.year, []).append(bucket)
+    add_cache_tags(request, ARCHIVE_TAG)
+    set_cache_policy(request, "listing")
+
+    context = {
+        'years': list(years.items()),
+        'page_title': 'Arkiv',
+    }
+
+    return render(request, 'news/archive_index.html', context)
+
+
+def archive_month(request, year, month):
+    """Archive month view - the articles of one month, from its bucket."""
+    bucket = get_object_or_404(ArchiveMonth, year=int(year), month=int(month), article_count__gt=0)
+
+    # Pagination within the month, counted by the bucket
+    paginator = CountedPaginator(
+        month_cards(bucket.year, bucket.month), 24, count=bucket.article_count
+    )
+    page_number = request.GET.get("page")
+    page_obj = paginator.get_page(page_number)
+    older, newer = neighbours(bucket)
+    add_cache_tags(request, month_tag(bucket.year, bucket.month), *article_tags(*page_obj))
+    set_cache_policy(request, "archive" if is_past_month(bucket.year, bucket.month) else "listing")
+
+    context = {
+        'bucket': bucket,
+        'month_start': month_bounds(bucket.year, bucket.month)[0],
+        'articles': page_obj,
+        'older': older,
+        'newer': newer,
+        'page_title': f'Arkiv {bucket}',
+    }
+
+    return render(request, 'news/archive_month.html', context)
+
+
 class RSSFeed(Feed):
     """RSS feed for articles."""
     title = "MarketingNyt.dk - Seneste nyheder"
     link = "/"
     description = "De seneste nyheder fra MarketingNyt.dk"
+
+    def __call__(self, request, *args, **kwargs):
+        add_cache_tags(request, "feed")
+        set_cache_policy(request, "feed")
+        return super().__call__(request, *args, **kwargs)
     
     def items(self):
-        return ArticlePage.objects.live().order_by("-published_at")[:50]
+        return ArticleCard.objects.order_by("-published_at")[:50]
     
     def item_title(self, item):
         return item.title
@@ -172,7 +301,8 @@ class RSSFeed(Feed):
         return item.summary
     
     def item_link(self, item):
-        return item.get_full_url()
+        # Made absolute by Feed
+        return item.url
     
     def item_pubdate(self, item):
         return item.published_at
@@ -190,7 +320,7 @@ class ArticleSitemap(Sitemap):
     priority = 0.8
     
     def items(self):
-        return ArticlePage.objects.live().order_by("-published_at")
+        return ArticlePage.objects.published().order_by("-published_at")
     
     def lastmod(self, obj):
         return obj.last_published_at or obj.published_at
@@ -215,6 +345,18 @@ class CategorySitemap(Sitemap):
         return obj.get_full_url()
 
 
+class ArchiveSitemap(Sitemap):
+    """Sitemap for archive months."""
+    changefreq = "monthly"
+    priority = 0.4
+
+    def items(self):
+        return ArchiveMonth.objects.filter(article_count__gt=0)
+
+    def lastmod(self, obj):
+        return obj.updated_at
+
+
 class StaticSitemap(Sitemap):
     """Sitemap for static pages."""
     changefreq = "monthly"
@@ -0,0 +1,13 @@
+"""
+Wagtail hooks for the news app.
+"""
+
+from wagtail import hooks
+
+from .placeholders import PlaceholderImageEmbedHandler
+
+
+@hooks.register("register_rich_text_features")
+def register_placeholder_image_embeds(features):
+    """Replace the image embed handler of ``wagtail.images``, whose hooks run first."""
+    features.register_embed_type(PlaceholderImageEmbedHandler)
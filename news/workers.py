@@ -0,0 +1,200 @@
+"""
+Worker process lifecycle: warm-up, memory recycling and metrics.
+
+Used by ``gunicorn.conf.py``. With ``preload_app`` the master imports the
+project and runs ``warm_shared()`` once, so URL patterns and compiled
+templates are shared copy-on-write by every worker. Each worker then runs
+``warm_worker()`` for state that needs its own database connection or
+threads (one worker per restart also queues the media uploads the last
+run left unconfirmed), and ``start_memory_watchdog()``, which asks the worker to exit gracefully once
+its resident memory passes ``GUNICORN_MAX_RSS_MB``; the master replaces it.
+
+``WorkerMetricsMiddleware`` records request latency, and the ``worker``
+metrics provider publishes it with RSS and uptime on ``/metrics/``.
+"""
+
+import logging
+import os
+import resource
+import signal
+import threading
+import time
+from collections import deque
+
+from django.db import connections
+
+from .instrumentation import register_metrics
+
+logger = logging.getLogger(__name__)
+
+# Latency percentiles are computed over the most recent requests
+LATENCY_WINDOW = 1024
+
+WATCHDOG_INTERVAL = 10
+
+# One worker re-queues unconfirmed media uploads per restart
+REQUEUE_LOCK_KEY = "media:requeue-uploads"
+REQUEUE_LOCK_TIMEOUT = 300
+
+# Templates most requests render, compiled once in the master
+WARM_TEMPLATES = (
+    "base.html",
+    "news/home_page.html",
+    "news/article_page.html",
+    "news/category_page.html",
+    "news/tag_page.html",
+)
+
+
+def rss_bytes():
+    """Current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Peak rather than current RSS, but better than nothing off Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def max_rss_bytes():
+    return int(os.environ.get("GUNICORN_MAX_RSS_MB", "0")) * 1024 * 1024
+
+
+class WorkerStats:
+    """Request count and latency of this process."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.requests = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.requests += 1
+            self.latencies.append(seconds)
+
+    def snapshot(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            requests = self.requests
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 1)
+
+        return {
+            "profile": os.environ.get("GUNICORN_PROFILE", ""),
+            "uptime_s": round(time.time() - self.started),
+            "requests": requests,
+            "rss_mb": round(rss_bytes() / 1024 / 1024, 1),
+            "max_rss_mb": round(max_rss_bytes() / 1024 / 1024) or None,
+            "latency_ms": {
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": round(latencies[-1] * 1000, 1) if latencies else None,
+            },
+        }
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.requests = 0
+            self.latencies.clear()
+
+
+stats = WorkerStats()
+register_metrics("worker", stats.snapshot)
+
+
+class WorkerMetricsMiddleware:
+    """Time every request for the ``worker`` metrics."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        try:
+            return self.get_response(request)
+        finally:
+            stats.record(time.perf_counter() - started)
+
+
+def warm_shared():
+    """Load what every worker needs, before forking. Touches no database."""
+    from django.template import TemplateDoesNotExist
+    from django.template.loader import get_template
+    from django.urls import get_resolver
+
+    started = time.perf_counter()
+    get_resolver().url_patterns
+    for name in WARM_TEMPLATES:
+        try:
+            get_template(name)
+        except TemplateDoesNotExist:
+            pass
+    # Nothing opened in the master may be shared with the workers
+    connections.close_all()
+    logger.info("Warmed shared state in %.0f ms", (time.perf_counter() - started) * 1000)
+
+
+def warm_worker():
+    """Per-worker warm-up after forking: fresh connections and site routing."""
+    from wagtail.models import Site
+
+    connections.close_all()
+    stats.reset()
+    try:
+        Site.get_site_root_paths()
+    except Exception as e:
+        logger.warning("Worker warm-up failed: %s", e)
+    finally:
+        connections.close_all()
+    requeue_media_uploads()
+
+
+def requeue_media_uploads():
+    """Queue uploads of cached media the upstream never confirmed; see ``news.storage``."""
+    from django.core.cache import cache
+    from django.core.files.storage import storages
+
+    from .storage import CachedMediaStorage
+
+    storage = storages["default"]
+    if not isinstance(storage, CachedMediaStorage):
+        return 0
+    try:
+        if not cache.add(REQUEUE_LOCK_KEY, os.getpid(), REQUEUE_LOCK_TIMEOUT):
+            return 0
+        return storage.requeue_unconfirmed()
+    except Exception as e:
+        logger.warning("Re-queueing media uploads failed: %s", e)
+        return 0
+
+
+def start_memory_watchdog(interval=WATCHDOG_INTERVAL):
+    """Exit gracefully once RSS passes ``GUNICORN_MAX_RSS_MB``; 0 disables it."""
+    limit = max_rss_bytes()
+    if not limit:
+        return None
+
+    def watch():
+        while True:
+            time.sleep(interval)
+            rss = rss_bytes()
+            if rss > limit:
+                logger.warning(
+                    "Worker %s at %.0f MB RSS (limit %.0f MB), recycling",
+                    os.getpid(), rss / 1024 / 1024, limit / 1024 / 1024,
+                )
+                # The same graceful shutdown as a master-initiated restart:
+                # finish in-flight requests, then exit and get replaced
+                os.kill(os.getpid(), signal.SIGTERM)
+                return
+
+    thread = threading.Thread(target=watch, name="memory-watchdog", daemon=True)
+    thread.start()
+    return thread
@@ -169,6 +169,29 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 });
 
+// Count an article view once the page is actually shown; cached pages
+// never reach the server, so the count comes from here
+(function() {
+    const article = document.querySelector('[data-view-url]');
+    if (!article || !navigator.sendBeacon) {
+        return;
+    }
+    const send = function() {
+        navigator.sendBeacon(article.dataset.viewUrl);
+    };
+    if (document.visibilityState === 'visible') {
+        send();
+    } else {
+        // Prerendered or opened in a background tab
+        document.addEventListener('visibilitychange', function onVisible() {
+            if (document.visibilityState === 'visible') {
+                document.removeEventListener('visibilitychange', onVisible);
+                send();
+            }
+        });
+    }
+})();
+
 // Add CSS for reading progress and notifications
 const style = document.createElement('style');
 style.textContent = `